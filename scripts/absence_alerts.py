@@ -0,0 +1,200 @@
+"""
+Weekly absence alerts: children who missed N or more Sundays in a row.
+
+Reads every class's "Điểm danh" export once, row by row. Per student it only
+keeps the last Sunday they attended and how many excused (P) Sundays followed,
+so a class is done as soon as its file is; students who attended recently are
+dropped straight away. A Sunday counts once the class has recorded any mark for
+it, and a child attended if either column (TL or GL) is present or late.
+
+Usage:   python3 scripts/absence_alerts.py <export.csv or directory ...> [options]
+Example: python3 scripts/absence_alerts.py exports/ --min-sundays 3
+"""
+
+import argparse
+import csv
+import sys
+import time
+from datetime import date, datetime
+from itertools import accumulate
+from pathlib import Path
+from typing import NamedTuple
+
+from roster import active_season, load_seasons
+from sheet_export import class_code_from_export, load_status_codes, stream_export
+
+DEFAULT_MIN_SUNDAYS = 3
+
+
+class Alert(NamedTuple):
+    class_code: str
+    row: int  # row in the class's Điểm danh sheet
+    name: str
+    absent_sundays: int
+    since: date  # first missed Sunday of the streak
+    last_seen: date  # last Sunday attended (None if never this year)
+
+
+def collect_exports(paths):
+    files = []
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            files.extend(sorted(path.glob("*.csv")))
+        elif path.suffix == ".csv" and path.exists():
+            files.append(path)
+        else:
+            print(f"⚠️  Skipping {raw}: not a CSV file or directory")
+    return files
+
+
+def scan_class(path, codes, min_sundays, as_of=None):
+    """Stream one export and return its alerts (None if it is not a Điểm danh export)"""
+    attended_marks = {codes["present"], codes["late"]}
+    excused_mark = codes["excused"]
+
+    header = None
+    held = []
+    candidates = []  # (entry, last attended index, excused Sunday indices since)
+    for header, entry, marks in stream_export(path):
+        if not held:
+            held = [False] * len(header.sessions)
+            cutoff = sum(
+                1 for day in header.sessions if not as_of or not day or day <= as_of
+            )
+
+        last_seen = -1
+        excused = []
+        for index, (tl, gl) in enumerate(marks[:cutoff]):
+            tl, gl = tl.upper(), gl.upper()
+            if tl or gl:
+                held[index] = True
+            if tl in attended_marks or gl in attended_marks:
+                last_seen, excused = index, []
+            elif excused_mark in (tl, gl):
+                excused.append(index)
+
+        # the streak can't be longer than the Sundays since they were last seen
+        if cutoff - last_seen - 1 - len(excused) >= min_sundays:
+            candidates.append((entry, last_seen, excused))
+
+    if header is None:
+        return None
+
+    # held_before[i] = Sundays recorded before session i
+    held_before = [0, *accumulate(held)]
+    alerts = []
+    for entry, last_seen, excused in candidates:
+        missed = held_before[len(held)] - held_before[last_seen + 1] - len(excused)
+        if missed < min_sundays:
+            continue
+        # an excused Sunday is not the start of the absence
+        excused = set(excused)
+        first_missed = next(
+            i for i in range(last_seen + 1, len(held)) if held[i] and i not in excused
+        )
+        alerts.append(
+            Alert(
+                entry.class_code,
+                entry.line,
+                entry.name,
+                missed,
+                header.sessions[first_missed],
+                header.sessions[last_seen] if last_seen >= 0 else None,
+            )
+        )
+    return alerts
+
+
+def write_report(alerts, output_path):
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(
+            ["class", "row", "name", "absent_sundays", "since", "last_seen"]
+        )
+        for alert in alerts:
+            writer.writerow(
+                [
+                    alert.class_code,
+                    alert.row,
+                    alert.name,
+                    alert.absent_sundays,
+                    alert.since.strftime("%d/%m/%Y") if alert.since else "",
+                    alert.last_seen.strftime("%d/%m/%Y") if alert.last_seen else "",
+                ]
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="List children absent several Sundays in a row, across all classes"
+    )
+    parser.add_argument("exports", nargs="+", help="Điểm danh CSV exports or folders")
+    parser.add_argument(
+        "--min-sundays",
+        type=int,
+        default=DEFAULT_MIN_SUNDAYS,
+        help=f"consecutive missed Sundays to report (default {DEFAULT_MIN_SUNDAYS})",
+    )
+    parser.add_argument("--as-of", help="ignore Sundays after this date (dd/mm/yyyy)")
+    parser.add_argument(
+        "--output", help="report CSV (default output/absence_alerts_<date>.csv)"
+    )
+    args = parser.parse_args()
+
+    try:
+        as_of = datetime.strptime(args.as_of, "%d/%m/%Y").date() if args.as_of else None
+    except ValueError:
+        print(f"❌ Error: --as-of must be dd/mm/yyyy, got '{args.as_of}'")
+        sys.exit(1)
+
+    files = collect_exports(args.exports)
+    if not files:
+        print("❌ Error: no CSV exports found")
+        sys.exit(1)
+
+    codes = load_status_codes()
+    seasons = load_seasons()
+    season = active_season(seasons)
+    class_order = {
+        code: index for index, code in enumerate(seasons[season]["spreadsheets"])
+    }
+
+    started = time.perf_counter()
+    alerts = []
+    for path in files:
+        class_alerts = scan_class(path, codes, args.min_sundays, as_of)
+        if class_alerts is None:
+            print(f"⚠️  Skipping {path.name}: no 'Điểm danh' header found")
+            continue
+        class_code = class_code_from_export(path)
+        if class_order and class_code not in class_order:
+            print(f"⚠️  {path.name}: class '{class_code}' is not in season {season}")
+        print(f"📁 {path.name}: {len(class_alerts)} alerts")
+        alerts.extend(class_alerts)
+
+    # season class order (config/seasons.json), longest streak first in a class
+    alerts.sort(
+        key=lambda alert: (
+            class_order.get(alert.class_code, len(class_order)),
+            alert.class_code,
+            -alert.absent_sundays,
+            alert.row,
+        )
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    output_path = Path(
+        args.output or f"output/absence_alerts_{(as_of or date.today()):%Y-%m-%d}.csv"
+    )
+    write_report(alerts, output_path)
+    print(
+        f"\n🚨 {len(alerts)} children missed {args.min_sundays}+ Sundays in a row "
+        f"({len(files)} classes in {elapsed_ms:.0f} ms)"
+    )
+    print(f"💾 Report written to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
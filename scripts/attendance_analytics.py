@@ -0,0 +1,275 @@
+"""
+Attendance analytics over exported "Điểm danh" sheets.
+
+All exports are loaded into one uint8 status cube (student x Sunday x TL/GL)
+and every metric below is computed with whole-array NumPy operations:
+  - attendance rate per student and per class (Mass and catechism separately)
+  - share of late check-ins per class and its trend over the year
+  - current and longest attendance / absence streaks per student
+
+A blank cell on a Sunday the class recorded counts as absent (the scanner only
+writes the children it sees); P (excused) neither counts nor breaks a streak.
+
+Usage:   python3 scripts/attendance_analytics.py <export.csv ...> [--csv out.csv]
+Example: python3 scripts/attendance_analytics.py exports/*.csv --csv output/stats.csv
+"""
+
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+from sheet_export import load_status_codes, read_export
+
+# uint8 codes in the status cube
+BLANK, PRESENT, LATE, EXCUSED, ABSENT = 0, 1, 2, 3, 4
+
+
+class AttendanceCube(NamedTuple):
+    codes: np.ndarray  # uint8 (students, sessions, 2)
+    held: np.ndarray  # bool (classes, sessions, 2): the class recorded that column
+    student_class: np.ndarray  # int (students,) index into classes
+    classes: list
+    students: list  # RosterEntry per student (entry.line = sheet row)
+    dates: list  # datetime.date per session, sorted (union over classes)
+
+
+def letter_codes_from_config():
+    """Map sheet letters to cube codes using "status_codes" in gas_config.json"""
+    codes = load_status_codes()
+    return {
+        codes["present"]: PRESENT,
+        codes["late"]: LATE,
+        codes["excused"]: EXCUSED,
+        codes["absent"]: ABSENT,
+    }
+
+
+def encode_marks(marks, letter_codes):
+    """Vectorised text -> code: only the few distinct values go through the dict"""
+    values = np.asarray(marks, dtype=object).astype(str)
+    if values.size == 0:
+        return np.zeros(values.shape, dtype=np.uint8)
+    unique, inverse = np.unique(np.char.upper(values), return_inverse=True)
+    lut = np.array([letter_codes.get(value, BLANK) for value in unique], np.uint8)
+    return lut[inverse].reshape(values.shape)
+
+
+def load_exports(paths, letter_codes=None):
+    """Read class exports into one AttendanceCube"""
+    letter_codes = letter_codes or letter_codes_from_config()
+    exports = []
+    for path in paths:
+        header, students = read_export(path)
+        if header is None:
+            print(f"⚠️  Skipping {path}: no 'Điểm danh' header found")
+            continue
+        exports.append((header, students))
+
+    dates = sorted({day for header, _ in exports for day in header.sessions if day})
+    date_index = {day: index for index, day in enumerate(dates)}
+    classes = [header.class_code for header, _ in exports]
+
+    n_students = sum(len(students) for _, students in exports)
+    codes = np.zeros((n_students, len(dates), 2), dtype=np.uint8)
+    student_class = np.zeros(n_students, dtype=np.intp)
+    roster = []
+
+    start = 0
+    for class_index, (header, students) in enumerate(exports):
+        keep = [i for i, day in enumerate(header.sessions) if day in date_index]
+        targets = [date_index[header.sessions[i]] for i in keep]
+        stop = start + len(students)
+        if students and keep:
+            marks = np.asarray([marks for _, marks in students], dtype=object)
+            codes[start:stop][:, targets] = encode_marks(marks[:, keep], letter_codes)
+        student_class[start:stop] = class_index
+        roster.extend(entry for entry, _ in students)
+        start = stop
+
+    cube = AttendanceCube(codes, None, student_class, classes, roster, dates)
+    return cube._replace(held=held_columns(cube))
+
+
+def class_onehot(cube):
+    """(classes, students) 0/1 matrix: class totals become one matrix product"""
+    classes = np.arange(len(cube.classes))
+    return (cube.student_class[None, :] == classes[:, None]).astype(np.int64)
+
+
+def held_columns(cube):
+    """A class held a TL/GL column if any of its students has a mark in it"""
+    marked = (cube.codes != BLANK).reshape(len(cube.students), -1).astype(np.int64)
+    per_class = class_onehot(cube) @ marked
+    return (per_class > 0).reshape(len(cube.classes), len(cube.dates), 2)
+
+
+def run_lengths(hit, breaks):
+    """
+    Length of the run of `hit` ending at each session (along axis 1).
+
+    Sessions where neither `hit` nor `breaks` is set leave the run unchanged, so
+    Sundays a class did not meet are skipped instead of ending a streak.
+    """
+    counts = np.cumsum(hit, axis=1, dtype=np.int32)
+    reset = np.maximum.accumulate(np.where(breaks, counts, 0), axis=1)
+    return counts - reset
+
+
+def analyze(cube):
+    """Compute all metrics; returns a dict of arrays keyed by metric name"""
+    codes = cube.codes
+    held = cube.held[cube.student_class]  # (students, sessions, 2)
+    attended = (codes == PRESENT) | (codes == LATE)
+    late = codes == LATE
+    missed = held & ~attended & (codes != EXCUSED)
+
+    # excused Sundays are left out of the rate altogether
+    held_count = (held & (codes != EXCUSED)).sum(axis=1)
+    attended_count = attended.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        student_rate = np.where(held_count > 0, attended_count / held_count, np.nan)
+
+    # class totals over students via one matrix product per metric
+    onehot = class_onehot(cube)
+    class_attended = onehot @ attended_count
+    class_possible = onehot @ held_count
+    n_students = len(cube.students)
+    late_per_session = onehot @ late.reshape(n_students, -1).astype(np.int64)
+    seen_per_session = onehot @ attended.reshape(n_students, -1).astype(np.int64)
+    late_per_session = late_per_session.reshape(len(cube.classes), -1, 2)
+    seen_per_session = seen_per_session.reshape(len(cube.classes), -1, 2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        class_rate = class_attended / class_possible
+        late_share = late_per_session.sum(axis=1) / seen_per_session.sum(axis=1)
+        late_fraction = late_per_session / seen_per_session
+
+    attend_runs = run_lengths(attended, missed)
+    absent_runs = run_lengths(missed, attended)
+
+    return {
+        "student_rate": student_rate,  # (students, 2)
+        "held_count": held_count,
+        "attended_count": attended_count,
+        "late_count": late.sum(axis=1),
+        "excused_count": (codes == EXCUSED).sum(axis=1),
+        "longest_streak": attend_runs.max(axis=1, initial=0),
+        "current_streak": attend_runs[:, -1] if cube.dates else held_count * 0,
+        "current_absence": absent_runs[:, -1] if cube.dates else held_count * 0,
+        "longest_absence": absent_runs.max(axis=1, initial=0),
+        "class_rate": class_rate,  # (classes, 2)
+        "late_share": late_share,
+        "late_trend": lateness_trend(late_fraction, cube.held & (seen_per_session > 0)),
+    }
+
+
+def lateness_trend(late_fraction, valid):
+    """Least-squares slope of the late share per Sunday, for each class and part"""
+    x = np.arange(late_fraction.shape[1], dtype=float)[None, :, None]
+    weight = valid.astype(float)
+    y = np.where(valid, late_fraction, 0.0)
+    n = weight.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_x = (weight * x).sum(axis=1) / n
+        mean_y = (weight * y).sum(axis=1) / n
+        dx = x - mean_x[:, None, :]
+        covariance = (weight * dx * (y - mean_y[:, None, :])).sum(axis=1)
+        variance = (weight * dx * dx).sum(axis=1)
+        return np.where(n >= 2, covariance / variance, np.nan)
+
+
+def write_student_csv(cube, stats, output_path):
+    with open(output_path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(
+            [
+                "class", "row", "name", "tl_rate", "gl_rate", "late_tl",
+                "excused_tl", "current_streak_tl", "longest_streak_tl",
+                "current_absence_tl", "longest_absence_tl",
+            ]
+        )  # fmt: skip
+        for index, entry in enumerate(cube.students):
+            tl_rate, gl_rate = stats["student_rate"][index]
+            writer.writerow(
+                [
+                    entry.class_code,
+                    entry.line,
+                    entry.name,
+                    "" if np.isnan(tl_rate) else f"{tl_rate:.3f}",
+                    "" if np.isnan(gl_rate) else f"{gl_rate:.3f}",
+                    stats["late_count"][index, 0],
+                    stats["excused_count"][index, 0],
+                    stats["current_streak"][index, 0],
+                    stats["longest_streak"][index, 0],
+                    stats["current_absence"][index, 0],
+                    stats["longest_absence"][index, 0],
+                ]
+            )
+
+
+def percent(value):
+    return "  -  " if np.isnan(value) else f"{value * 100:4.0f}%"
+
+
+def print_report(cube, stats, top):
+    print(f"\n{'class':<20} {'students':>8} {'TL':>6} {'GL':>6} {'late':>6}  trend")
+    for index, class_code in enumerate(cube.classes):
+        count = int((cube.student_class == index).sum())
+        tl_rate, gl_rate = stats["class_rate"][index]
+        trend = stats["late_trend"][index, 0]
+        trend_text = "" if np.isnan(trend) else f"{trend * 100:+.1f} pts/Sunday"
+        print(
+            f"{class_code:<20} {count:>8} {percent(tl_rate):>6} {percent(gl_rate):>6} "
+            f"{percent(stats['late_share'][index, 0]):>6}  {trend_text}"
+        )
+
+    absences = stats["current_absence"][:, 0]
+    order = np.argsort(-absences, kind="stable")[:top]
+    order = order[absences[order] > 0]
+    if len(order):
+        print(f"\n🚨 Longest current Mass absence streaks (top {top}):")
+        for index in order:
+            entry = cube.students[index]
+            print(
+                f"   {absences[index]:>2} Sundays  {entry.class_code:<6} {entry.name}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Attendance rates, lateness and streaks from Điểm danh exports"
+    )
+    parser.add_argument("exports", nargs="+", help="CSV exports of 'Điểm danh' sheets")
+    parser.add_argument("--csv", help="write per-student metrics to this CSV file")
+    parser.add_argument("--top", type=int, default=10, help="students to list")
+    args = parser.parse_args()
+
+    missing = [path for path in args.exports if not Path(path).exists()]
+    if missing:
+        print(f"❌ Error: export not found: {missing[0]}")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    cube = load_exports(args.exports)
+    loaded = time.perf_counter()
+    stats = analyze(cube)
+    analyzed = time.perf_counter()
+
+    print(
+        f"📊 {len(cube.students)} students, {len(cube.classes)} classes, "
+        f"{len(cube.dates)} Sundays (load {(loaded - started) * 1000:.0f} ms, "
+        f"analysis {(analyzed - loaded) * 1000:.1f} ms)"
+    )
+    print_report(cube, stats, args.top)
+
+    if args.csv:
+        write_student_csv(cube, stats, args.csv)
+        print(f"\n💾 Per-student metrics written to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
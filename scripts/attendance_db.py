@@ -0,0 +1,462 @@
+"""
+Local SQLite attendance store, an alternate backend to the "Điểm danh" grid.
+
+attendance is keyed on (student_key, session_date, part), where student_key is
+the master map key (normalize(name + birthday)), so a scan is one indexed upsert
+and reports are SQL queries instead of whole-sheet reads. The scan engine runs
+unchanged on top of it: its master map and Sunday columns come from the store,
+and the "already checked in" check is a primary-key lookup.
+
+import:  students, Sunday columns and marks from class exports (marks already
+         recorded by a scan are kept), plus the scan log with --log-dir
+record:  route payloads with scan_engine.log_scan() and write them to the store
+export:  one CSV per class in the "Điểm danh" layout: dates in row 8, each
+         Sunday's TL/GL pair in the column it has in the sheet (the summary
+         columns between the terms stay empty), students on their sheet rows
+report:  students who came, were late or excused, per class and Sunday
+
+Usage:   python3 scripts/attendance_db.py [--db output/attendance.sqlite] import <exports dir> [--log-dir output/scan_log]
+         python3 scripts/attendance_db.py record [--at "dd/mm/yyyy HH:MM:SS"] [payload ...]
+         python3 scripts/attendance_db.py export [--output output/db_export] | report [--class c1]
+Example: python3 scripts/attendance_db.py import exports && python3 scripts/attendance_db.py report --class c1
+"""
+
+import argparse
+import csv
+import sqlite3
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from roster import CODE_JS_PATH, load_class_aliases, load_transfer_students
+from scan_engine import ScanEngine, log_scan
+from scan_log import export_files, read_events
+from session_schedule import compile_schedules, load_config
+from sheet_export import (
+    FIRST_MONTH_OF_YEAR,
+    ExportHeader,
+    load_status_codes,
+    stream_export,
+)
+
+DEFAULT_DB_PATH = "output/attendance.sqlite"
+DEFAULT_EXPORT_DIR = "output/db_export"
+FIRST_SESSION_COLUMN = 5  # column F, 0-based; for sessions with no stored column
+HEADER_ROWS = 9  # title rows, month labels (7), dates (8), TL/GL (9)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    student_key TEXT PRIMARY KEY,   -- master map key
+    class_code  TEXT NOT NULL,
+    sheet_row   INTEGER NOT NULL,   -- row in the class's Điểm danh sheet
+    saint_name  TEXT NOT NULL,
+    last_name   TEXT NOT NULL,
+    first_name  TEXT NOT NULL,
+    note        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS students_by_row ON students (class_code, sheet_row);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    class_code     TEXT NOT NULL,
+    session_date   TEXT NOT NULL,   -- yyyy-mm-dd of the Sunday column
+    session_column INTEGER,         -- 0-based TL column in the sheet; GL is +1
+    PRIMARY KEY (class_code, session_date)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS attendance (
+    student_key  TEXT NOT NULL REFERENCES students (student_key),
+    session_date TEXT NOT NULL,
+    part         INTEGER NOT NULL,  -- 0 = TL column, 1 = GL column
+    status       TEXT NOT NULL,
+    scanned_at   TEXT,              -- ISO scan time; NULL for marks from a sheet
+    PRIMARY KEY (student_key, session_date, part)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS attendance_by_session ON attendance (session_date);
+"""
+
+# a scan replaces an older scan or a sheet mark; a sheet mark only replaces a
+# sheet mark, so re-importing exports never undoes a local scan
+UPSERT_SCAN = """
+INSERT INTO attendance VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (student_key, session_date, part) DO UPDATE
+SET status = excluded.status, scanned_at = excluded.scanned_at
+WHERE attendance.scanned_at IS NULL OR attendance.scanned_at <= excluded.scanned_at
+"""
+UPSERT_MARK = """
+INSERT INTO attendance VALUES (?, ?, ?, ?, NULL)
+ON CONFLICT (student_key, session_date, part) DO UPDATE
+SET status = excluded.status
+WHERE attendance.scanned_at IS NULL
+"""
+UPSERT_SESSION = """
+INSERT INTO sessions VALUES (?, ?, ?)
+ON CONFLICT (class_code, session_date) DO UPDATE
+SET session_column = excluded.session_column
+"""
+
+
+def connect(db_path=DEFAULT_DB_PATH):
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(db_path)
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = NORMAL")
+    connection.executescript(SCHEMA)
+    # stores created before sessions kept their sheet column
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(sessions)")]
+    if "session_column" not in columns:
+        connection.execute("ALTER TABLE sessions ADD COLUMN session_column INTEGER")
+    return connection
+
+
+def import_export(connection, path):
+    """Load one class export; returns (students, marks) imported"""
+    students = marks = 0
+    for header, entry, row_marks in stream_export(path):
+        if students == 0:
+            connection.executemany(
+                UPSERT_SESSION,
+                [
+                    (header.class_code, session.isoformat(), column)
+                    for session, column in zip(
+                        header.sessions, header.session_columns, strict=True
+                    )
+                    if session
+                ],
+            )
+        key = entry.master_key
+        connection.execute(
+            "INSERT OR REPLACE INTO students VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                header.class_code,
+                entry.line,
+                entry.saint_name,
+                entry.last_name,
+                entry.first_name,
+                entry.note,
+            ),
+        )
+        students += 1
+        rows = [
+            (key, session.isoformat(), part, value)
+            for session, pair in zip(header.sessions, row_marks, strict=True)
+            if session
+            for part, value in enumerate(pair)
+            if value
+        ]
+        connection.executemany(UPSERT_MARK, rows)
+        marks += len(rows)
+    return students, marks
+
+
+def record_event(connection, event):
+    """Write a ScanEvent that sets a cell; returns False for errors and skips"""
+    if event.status is None:
+        return False
+    found = connection.execute(
+        "SELECT student_key FROM students WHERE class_code = ? AND sheet_row = ?",
+        (event.class_code, event.row),
+    ).fetchone()
+    if found is None:
+        return False
+    connection.execute(
+        UPSERT_SCAN,
+        (
+            found[0],
+            event.session.isoformat(),
+            event.part,
+            event.status,
+            event.at.isoformat(timespec="seconds"),
+        ),
+    )
+    return True
+
+
+def import_log(connection, log_dir):
+    """Replay the scan log's cell writes; returns the number applied"""
+    keys = {
+        (code, row): key
+        for key, code, row in connection.execute(
+            "SELECT student_key, class_code, sheet_row FROM students"
+        )
+    }
+    rows = [
+        (
+            keys[(event["class"], event["row"])],
+            event["session"],
+            event["part"],
+            event["status"],
+            event["at"],
+        )
+        for event in read_events(log_dir)
+        if "status" in event and (event["class"], event["row"]) in keys
+    ]
+    connection.executemany(UPSERT_SCAN, rows)
+    return len(rows)
+
+
+class StoredCells:
+    """engine.cells backed by the attendance table: one key lookup per scan"""
+
+    def __init__(self, connection, keys, headers):
+        self.connection = connection
+        self.keys = keys  # (class code, sheet row) -> student key
+        self.headers = headers
+        self.written = {}  # cells set by log_scan() in this run
+
+    def get(self, cell, default=None):
+        if cell in self.written:
+            return self.written[cell]
+        class_code, row, index, part = cell
+        found = self.connection.execute(
+            "SELECT status FROM attendance"
+            " WHERE student_key = ? AND session_date = ? AND part = ?",
+            (
+                self.keys.get((class_code, row)),
+                self.headers[class_code].sessions[index].isoformat(),
+                part,
+            ),
+        ).fetchone()
+        return found[0] if found else default
+
+    def __setitem__(self, cell, status):
+        self.written[cell] = status
+
+
+def load_store_engine(connection, code_js_path=None, config=None):
+    """ScanEngine whose master map, columns and cells come from the store"""
+    master_map = {}
+    keys = {}
+    for key, class_code, row in connection.execute(
+        "SELECT student_key, class_code, sheet_row FROM students"
+    ):
+        master_map[key] = (class_code, row)
+        keys[(class_code, row)] = key
+
+    headers = {
+        class_code: ExportHeader("sqlite", class_code, [], [])
+        for class_code, _ in master_map.values()
+    }
+    for class_code, session_date, column in connection.execute(
+        "SELECT class_code, session_date, session_column FROM sessions"
+        " ORDER BY class_code, session_date"
+    ):
+        header = headers.setdefault(
+            class_code, ExportHeader("sqlite", class_code, [], [])
+        )
+        header.session_columns.append(
+            FIRST_SESSION_COLUMN + 2 * len(header.sessions)
+            if column is None
+            else column
+        )
+        header.sessions.append(date.fromisoformat(session_date))
+
+    return ScanEngine(
+        master_map,
+        headers,
+        load_transfer_students(code_js_path or CODE_JS_PATH),
+        load_class_aliases(),
+        compile_schedules(config or load_config()),
+        StoredCells(connection, keys, headers),
+        {},
+    )
+
+
+def render_class(connection, class_code):
+    """Rows of the class's "Điểm danh" sheet as the store has it"""
+    sessions = []
+    column_of = {}
+    for index, (session_date, column) in enumerate(
+        connection.execute(
+            "SELECT session_date, session_column FROM sessions"
+            " WHERE class_code = ? ORDER BY session_date",
+            (class_code,),
+        )
+    ):
+        sessions.append(date.fromisoformat(session_date))
+        column_of[session_date] = (
+            FIRST_SESSION_COLUMN + 2 * index if column is None else column
+        )
+    width = max(
+        (column + 2 for column in column_of.values()), default=FIRST_SESSION_COLUMN
+    )
+
+    rows = [[""] * width for _ in range(HEADER_ROWS)]
+    if sessions:
+        first = sessions[0]
+        year = first.year if first.month >= FIRST_MONTH_OF_YEAR else first.year - 1
+        rows[3][1] = f"Phân đoàn {class_code.upper()} (Năm học {year}-{year + 1})"
+    rows[6][1:5] = ["X = Có Mặt", "T = Trễ", "P = Phép", "O = Vắng"]
+    rows[7][1:5] = ["STT", "TÊN THÁNH", "HỌ", "TÊN"]
+    month = None
+    for session in sessions:
+        column = column_of[session.isoformat()]
+        if session.month != month:
+            rows[6][column] = f"Tháng {session.month}"
+            month = session.month
+        rows[7][column] = str(session.day)
+        rows[8][column : column + 2] = ["TL", "GL"]
+
+    line_of = {}
+    students = connection.execute(
+        "SELECT student_key, sheet_row, saint_name, last_name, first_name, note"
+        " FROM students WHERE class_code = ? ORDER BY sheet_row",
+        (class_code,),
+    )
+    for number, (key, row, saint, last, first, note) in enumerate(students, start=1):
+        while len(rows) < row - 1:
+            rows.append([""] * width)
+        rows.append([note, str(number), saint, last, first] + [""] * (width - 5))
+        line_of[key] = len(rows) - 1
+
+    marks = connection.execute(
+        "SELECT a.student_key, a.session_date, a.part, a.status"
+        " FROM attendance AS a JOIN students AS s USING (student_key)"
+        " WHERE s.class_code = ?",
+        (class_code,),
+    )
+    for key, session_date, part, status in marks:
+        if session_date in column_of:
+            rows[line_of[key]][column_of[session_date] + part] = status
+    return rows
+
+
+def class_report(connection, class_code=None, codes=None):
+    """
+    (class, Sunday, attended, late, excused, enrolled) per recorded Sunday.
+
+    A student attended if either column is present or late, like
+    absence_alerts.py.
+    """
+    codes = codes or load_status_codes()
+    return connection.execute(
+        """
+        SELECT s.class_code, a.session_date,
+               COUNT(DISTINCT CASE WHEN a.status IN (:present, :late)
+                                   THEN a.student_key END),
+               COUNT(DISTINCT CASE WHEN a.status = :late THEN a.student_key END),
+               COUNT(DISTINCT CASE WHEN a.status = :excused THEN a.student_key END),
+               (SELECT COUNT(*) FROM students AS c WHERE c.class_code = s.class_code)
+        FROM attendance AS a JOIN students AS s USING (student_key)
+        WHERE :class_code IS NULL OR s.class_code = :class_code
+        GROUP BY s.class_code, a.session_date
+        ORDER BY s.class_code, a.session_date
+        """,
+        {
+            "present": codes["present"],
+            "late": codes["late"],
+            "excused": codes["excused"],
+            "class_code": class_code,
+        },
+    ).fetchall()
+
+
+def import_command(connection, args):
+    exports = [path for path in export_files(args.exports) if path.is_file()]
+    if not exports:
+        print(f"❌ Error: no exports found in {args.exports}")
+        sys.exit(1)
+    started = time.perf_counter()
+    with connection:
+        for path in exports:
+            students, marks = import_export(connection, path)
+            print(f"📁 {path.name}: {students} students, {marks} marks")
+        if args.log_dir:
+            print(
+                f"🔁 {import_log(connection, args.log_dir)} scans from {args.log_dir}"
+            )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"\n🎉 Imported into {args.db} ({elapsed_ms:.0f} ms)")
+
+
+def record_command(connection, args):
+    try:
+        scanned_at = (
+            datetime.strptime(args.at, "%d/%m/%Y %H:%M:%S") if args.at else None
+        )
+    except ValueError:
+        print(f"❌ Error: --at must be dd/mm/yyyy HH:MM:SS, got '{args.at}'")
+        sys.exit(1)
+
+    engine = load_store_engine(connection)
+    if not engine.master_map:
+        print(f"❌ Error: {args.db} has no students, run import first")
+        sys.exit(1)
+    payloads = args.payloads or [line.strip() for line in sys.stdin if line.strip()]
+    for payload in payloads:
+        event = log_scan(engine, payload, scanned_at, now=scanned_at)
+        with connection:
+            record_event(connection, event)
+        print(event.result)
+
+
+def export_command(connection, args):
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    classes = [
+        code
+        for (code,) in connection.execute(
+            "SELECT DISTINCT class_code FROM students ORDER BY class_code"
+        )
+    ]
+    for class_code in classes:
+        path = output_dir / f"({class_code.upper()}) Điểm danh.csv"
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            csv.writer(file).writerows(render_class(connection, class_code))
+        print(f"📁 {path}")
+    print(f"\n🎉 Exported {len(classes)} classes to {output_dir}")
+
+
+def report_command(connection, args):
+    rows = class_report(connection, args.class_code)
+    if not rows:
+        print("⚠️  No attendance recorded")
+        return
+    print(
+        f"{'class':<6} {'Sunday':<10} {'came':>5} {'late':>5} {'excused':>8} {'of':>4}"
+    )
+    for class_code, session_date, attended, late, excused, enrolled in rows:
+        print(
+            f"{class_code:<6} {session_date:<10} {attended:>5} {late:>5} "
+            f"{excused:>8} {enrolled:>4}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SQLite attendance store")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="load class exports")
+    import_parser.add_argument("exports", help="Điểm danh export or folder of exports")
+    import_parser.add_argument("--log-dir", help="also replay this scan log")
+
+    record_parser = commands.add_parser("record", help="route payloads into the store")
+    record_parser.add_argument(
+        "payloads", nargs="*", help="QR payloads (default: stdin)"
+    )
+    record_parser.add_argument("--at", help="scan time, dd/mm/yyyy HH:MM:SS")
+
+    export_parser = commands.add_parser("export", help="render Điểm danh CSVs")
+    export_parser.add_argument("--output", default=DEFAULT_EXPORT_DIR)
+
+    report_parser = commands.add_parser("report", help="counts per class and Sunday")
+    report_parser.add_argument("--class", dest="class_code", help="only this class")
+
+    args = parser.parse_args()
+    connection = connect(args.db)
+    try:
+        {
+            "import": import_command,
+            "record": record_command,
+            "export": export_command,
+            "report": report_command,
+        }[args.command](connection, args)
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Compact on-disk attendance matrix for whole-history queries.
+
+build writes the exports' status cube (attendance_analytics.py codes) as one
+fixed-width uint8 file: students x Sundays x TL/GL, C order, followed by the
+per-class "held" columns. A JSON sidecar next to it indexes the rows by master
+map key (one row per student per class export, so several seasons sit side by
+side) and the columns by date. Everything else opens the file with
+numpy.memmap, so a query touches only the pages of the rows and Sundays it asks
+for instead of re-parsing every CSV; a class's students are one contiguous block.
+
+Usage:   python3 scripts/attendance_matrix.py build <export.csv or directory ...> [--output output/attendance.u8]
+         python3 scripts/attendance_matrix.py history "<name or payload>" [--from yyyy-mm-dd] [--to yyyy-mm-dd]
+         python3 scripts/attendance_matrix.py stats [--class c1] [--from yyyy-mm-dd] [--to yyyy-mm-dd]
+Example: python3 scripts/attendance_matrix.py build exports/2024_25 exports/2025_26
+"""
+
+import argparse
+import bisect
+import json
+import os
+import sys
+import time
+from datetime import date
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+from absence_alerts import collect_exports
+from attendance_analytics import (
+    BLANK,
+    AttendanceCube,
+    analyze,
+    letter_codes_from_config,
+    load_exports,
+    print_report,
+)
+from roster import RosterEntry, normalize, parse_payload
+
+DEFAULT_MATRIX_PATH = "output/attendance.u8"
+FORMAT_VERSION = 1
+
+
+class AttendanceMatrix(NamedTuple):
+    codes: np.memmap  # uint8 (students, sessions, 2), read-only
+    held: np.memmap  # bool-valued uint8 (classes, sessions, 2)
+    index: dict  # the sidecar
+    rows: dict  # master map key -> [row, ...] in build order
+    dates: list  # datetime.date per column, sorted
+
+
+def sidecar_path(path):
+    return Path(path).with_suffix(".json")
+
+
+def write_matrix(cube, path=DEFAULT_MATRIX_PATH, sources=()):
+    """Write the cube and its sidecar; each file is replaced atomically"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    codes = np.ascontiguousarray(cube.codes, dtype=np.uint8)
+    held = np.ascontiguousarray(cube.held, dtype=np.uint8)
+
+    temporary = path.with_name(path.name + ".tmp")
+    with open(temporary, "wb") as file:
+        file.write(codes.tobytes())
+        file.write(held.tobytes())
+    os.replace(temporary, path)
+
+    letters = {code: letter for letter, code in letter_codes_from_config().items()}
+    index = {
+        "version": FORMAT_VERSION,
+        "shape": list(codes.shape),
+        "held_offset": codes.nbytes,
+        "letters": {str(code): letter for code, letter in sorted(letters.items())},
+        "dates": [day.isoformat() for day in cube.dates],
+        "classes": cube.classes,
+        "sources": [str(source) for source in sources],
+        "student_fields": ["key", "class", "row", "saint", "last", "first", "note"],
+        "students": [
+            [
+                entry.master_key,
+                int(class_index),
+                entry.line,
+                entry.saint_name,
+                entry.last_name,
+                entry.first_name,
+                entry.note,
+            ]
+            for entry, class_index in zip(
+                cube.students, cube.student_class, strict=True
+            )
+        ],
+    }
+    temporary = path.with_name(path.name + ".json.tmp")
+    temporary.write_text(
+        json.dumps(index, ensure_ascii=False, separators=(",", ":")), encoding="utf-8"
+    )
+    os.replace(temporary, sidecar_path(path))
+    return path
+
+
+def open_matrix(path=DEFAULT_MATRIX_PATH):
+    """Map the matrix read-only; nothing is read until it is indexed"""
+    index = json.loads(sidecar_path(path).read_text(encoding="utf-8"))
+    if index.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported format version {index.get('version')}")
+    students, sessions, parts = index["shape"]
+    # np.memmap cannot map an empty file
+    if students * sessions:
+        codes = np.memmap(path, np.uint8, "r", shape=(students, sessions, parts))
+    else:
+        codes = np.zeros((students, sessions, parts), np.uint8)
+    held_shape = (len(index["classes"]), sessions, parts)
+    if held_shape[0] * sessions:
+        held = np.memmap(
+            path, np.uint8, "r", offset=index["held_offset"], shape=held_shape
+        )
+    else:
+        held = np.zeros(held_shape, np.uint8)
+
+    rows = {}
+    for row, student in enumerate(index["students"]):
+        rows.setdefault(student[0], []).append(row)
+    dates = [date.fromisoformat(day) for day in index["dates"]]
+    return AttendanceMatrix(codes, held, index, rows, dates)
+
+
+def date_columns(matrix, start=None, end=None):
+    """Slice of the columns from start to end (inclusive)"""
+    first = bisect.bisect_left(matrix.dates, start) if start else 0
+    last = bisect.bisect_right(matrix.dates, end) if end else len(matrix.dates)
+    return slice(first, last)
+
+
+def find_rows(matrix, text):
+    """Rows of a student given a name, a QR payload or a master map key"""
+    for key in (text, normalize(text), parse_payload(text).normalized):
+        if key in matrix.rows:
+            return matrix.rows[key]
+    return []
+
+
+def student_entry(matrix, row):
+    key, class_index, line, saint, last, first, note = matrix.index["students"][row]
+    class_code = matrix.index["classes"][class_index]
+    return RosterEntry("", line, class_code, saint, last, first, note)
+
+
+def sub_cube(matrix, rows=None, columns=None):
+    """AttendanceCube of some rows and Sundays, for attendance_analytics.analyze()"""
+    rows = range(len(matrix.index["students"])) if rows is None else rows
+    columns = columns or slice(None)
+    rows = np.asarray(rows, dtype=np.intp)
+    class_of = np.asarray(
+        [matrix.index["students"][row][1] for row in rows], dtype=np.intp
+    )
+    # a contiguous block (one class) stays a plain slice of the mapping
+    if len(rows) and rows[-1] - rows[0] + 1 == len(rows):
+        codes = np.array(matrix.codes[rows[0] : rows[-1] + 1, columns])
+    else:
+        codes = np.array(matrix.codes[rows][:, columns])
+
+    used = sorted(set(class_of.tolist()))
+    renumber = {class_index: new for new, class_index in enumerate(used)}
+    return AttendanceCube(
+        codes=codes,
+        held=np.array(matrix.held[used][:, columns]).astype(bool),
+        student_class=np.asarray([renumber[c] for c in class_of], dtype=np.intp),
+        classes=[matrix.index["classes"][class_index] for class_index in used],
+        students=[student_entry(matrix, row) for row in rows],
+        dates=matrix.dates[columns],
+    )
+
+
+def parse_day(text):
+    try:
+        return date.fromisoformat(text) if text else None
+    except ValueError:
+        print(f"❌ Error: dates must be yyyy-mm-dd, got '{text}'")
+        sys.exit(1)
+
+
+def build_command(args):
+    paths = collect_exports(args.exports)
+    if not paths:
+        print("❌ Error: no CSV exports found")
+        sys.exit(1)
+    started = time.perf_counter()
+    cube = load_exports(paths)
+    path = write_matrix(cube, args.output, paths)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(
+        f"✅ {path}: {len(cube.students)} students x {len(cube.dates)} Sundays "
+        f"from {len(cube.classes)} exports, {path.stat().st_size:,} bytes "
+        f"({elapsed_ms:.0f} ms)"
+    )
+
+
+def history_command(matrix, args):
+    rows = find_rows(matrix, args.student)
+    if not rows:
+        print(f"❌ Error: '{args.student}' is not in {args.matrix}")
+        sys.exit(1)
+    columns = date_columns(matrix, parse_day(args.start), parse_day(args.end))
+    letters = matrix.index["letters"]
+    for row in rows:
+        entry = student_entry(matrix, row)
+        class_index = matrix.index["students"][row][1]
+        held = matrix.held[class_index, columns]
+        print(f"\n{entry.name} ({entry.class_code}, row {entry.line})")
+        for day, pair, held_pair in zip(
+            matrix.dates[columns], matrix.codes[row, columns], held, strict=True
+        ):
+            if not held_pair.any():
+                continue
+            marks = [
+                letters.get(str(code), "?") if code != BLANK else "·" for code in pair
+            ]
+            print(f"   {day:%d/%m/%Y}  TL {marks[0]}  GL {marks[1]}")
+
+
+def stats_command(matrix, args):
+    rows = None
+    if args.class_code:
+        classes = matrix.index["classes"]
+        rows = [
+            row
+            for row, student in enumerate(matrix.index["students"])
+            if classes[student[1]] == args.class_code
+        ]
+        if not rows:
+            print(f"❌ Error: no class '{args.class_code}' in {args.matrix}")
+            sys.exit(1)
+    columns = date_columns(matrix, parse_day(args.start), parse_day(args.end))
+    started = time.perf_counter()
+    cube = sub_cube(matrix, rows, columns)
+    stats = analyze(cube)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(
+        f"📊 {len(cube.students)} students, {len(cube.dates)} Sundays "
+        f"({elapsed_ms:.1f} ms from {args.matrix})"
+    )
+    print_report(cube, stats, args.top)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory-mapped attendance matrix")
+    parser.add_argument("--matrix", default=DEFAULT_MATRIX_PATH, help="matrix file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="write the matrix from exports")
+    build_parser.add_argument("exports", nargs="+", help="exports or folders")
+    build_parser.add_argument("--output", help="matrix file (default: --matrix)")
+
+    history_parser = commands.add_parser("history", help="one student over time")
+    history_parser.add_argument("student", help="name, QR payload or master map key")
+
+    stats_parser = commands.add_parser("stats", help="attendance_analytics report")
+    stats_parser.add_argument("--class", dest="class_code", help="only this class")
+    stats_parser.add_argument("--top", type=int, default=10, help="students to list")
+
+    for subparser in (history_parser, stats_parser):
+        subparser.add_argument("--from", dest="start", help="first Sunday, yyyy-mm-dd")
+        subparser.add_argument("--to", dest="end", help="last Sunday, yyyy-mm-dd")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        args.output = args.output or args.matrix
+        build_command(args)
+        return
+
+    try:
+        matrix = open_matrix(args.matrix)
+    except (OSError, ValueError, KeyError) as error:
+        print(f"❌ Error: cannot open {args.matrix} (run build first): {error}")
+        sys.exit(1)
+    if args.command == "history":
+        history_command(matrix, args)
+    else:
+        stats_command(matrix, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,541 @@
+"""
+Shared card rendering for the create_qrcode_card_name*.py scripts.
+
+A card is the class background with the student's QR code on the left and the
+name block on the right. In deterministic mode the QR mask is fixed and the PNG
+is written without metadata at a fixed compression level, so rendering the same
+roster twice gives byte-identical files (on the same font and Pillow version).
+Layout and backgrounds come from compiled templates (card_template.py), one per
+class, so a card only costs the QR encode, the paste and the name text.
+
+With --pipeline a reader thread, render threads and writer threads connected by
+bounded queues overlap the QR encode and compositing of one card with the PNG
+compression and write of another (zlib and most of Pillow's C code run without
+the GIL), with only a few cards in memory at a time. --processes renders in a
+process pool instead; each background is decoded once into shared memory and
+every worker wraps the same pages in a PIL image, so memory does not grow with
+the number of workers.
+
+--proof renders from templates compiled at a fraction of full size (background,
+QR box, font and spacing all scaled) and tiles the cards onto contact sheets,
+each card captioned with its roster row, for checking names before printing.
+
+verify_cards() checks rendered cards against the roster before printing: it
+samples the module grid out of the QR area of every card and compares it with
+the grid the roster payload encodes to, in a process pool.
+"""
+
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import qrcode
+from card_template import (
+    background_path,
+    card_layout,
+    compile_template,
+    load_card_settings,
+    qr_box,
+)
+from PIL import Image, ImageDraw
+
+# QR encoder settings shared by render and verify
+QR_BOX_SIZE = 8
+QR_BORDER = 1
+# Deterministic mode: fixed mask instead of the encoder's best-mask search
+# (which can change between qrcode releases) and a fixed zlib level
+DETERMINISTIC_MASK = 0
+PNG_COMPRESS_LEVEL = 6
+
+# Pipeline mode: cards waiting between two stages (per queue)
+QUEUE_SIZE = 4
+_DONE = object()
+# Proof mode: template scale and cards per contact sheet
+PROOF_SCALE = 0.25
+SHEET_COLUMNS = 4
+SHEET_ROWS = 6
+SHEET_GAP = 8
+CAPTION_SIZE = 12
+# Modes Image.frombuffer can wrap without copying (RGB is stored as RGBX)
+SHARED_MODES = {"RGB": "RGBX", "RGBA": "RGBA", "L": "L"}
+
+
+def sanitize_filename(filename):
+    """Remove or replace invalid filename characters"""
+    # Replace invalid characters with underscores
+    invalid_chars = '<>:"/\\|?*'
+    for char in invalid_chars:
+        filename = filename.replace(char, "_")
+    return filename
+
+
+def wrap_text_to_lines(text, max_chars=12):
+    """Wrap text to lines with maximum character limit"""
+    if not text or len(text) <= max_chars:
+        return [text] if text else []
+
+    words = text.split()
+    lines = []
+    current = ""
+
+    for word in words:
+        test = f"{current} {word}".strip()
+        if len(test) <= max_chars:
+            current = test
+        else:
+            if current:
+                lines.append(current)
+            current = word
+
+    if current:
+        lines.append(current)
+
+    return lines
+
+
+def card_path(output_dir, entry):
+    """Cards are named after their QR payload"""
+    return Path(output_dir) / f"{sanitize_filename(entry.payload)}.png"
+
+
+def make_qr(payload, deterministic=False):
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.ERROR_CORRECT_L,
+        box_size=QR_BOX_SIZE,
+        border=QR_BORDER,
+        mask_pattern=DETERMINISTIC_MASK if deterministic else None,
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+    return qr
+
+
+def draw_name_text(draw, template, entry):
+    """Draw name text: saint name and the rest, each wrapped at wrap_chars"""
+    text_x, text_y = template.text_anchor
+
+    lines = wrap_text_to_lines(entry.saint_name, template.wrap_chars)
+    remaining = f"{entry.last_name} {entry.first_name} {entry.card_note}".strip()
+    lines.extend(wrap_text_to_lines(remaining, template.wrap_chars))
+
+    # Draw centered text block
+    start_y = text_y - ((len(lines) - 1) * template.line_spacing // 2)
+    for i, line in enumerate(lines):
+        draw.text(
+            (text_x, start_y + i * template.line_spacing),
+            line,
+            font=template.font,
+            fill=template.fill,
+            anchor="ma",
+        )
+
+
+def render_card(template, entry, deterministic=False):
+    """Composite one student's card onto a copy of the template's static layer"""
+    card = template.static.copy()
+    x, y, size = template.qr_box
+    qr_img = make_qr(entry.payload, deterministic).make_image(
+        fill_color="black", back_color="white"
+    )
+    card.paste(qr_img.resize((size, size), Image.Resampling.LANCZOS), (x, y))
+    draw_name_text(ImageDraw.Draw(card), template, entry)
+    return card
+
+
+def save_card(card, path, deterministic=False):
+    if not deterministic:
+        card.save(path)
+        return
+    # a fresh image carries no dpi/XMP/ICC chunks over from the background
+    bare = Image.frombytes(card.mode, card.size, card.tobytes())
+    bare.save(path, format="PNG", optimize=False, compress_level=PNG_COMPRESS_LEVEL)
+
+
+def sample_modules(card, layout, modules):
+    """Read the dark/light module grid out of the QR area of a rendered card"""
+    x, y, size = qr_box(layout, card.size)
+    gray = card.convert("L")
+    cell = size / modules
+    return [
+        [
+            gray.getpixel((x + int((col + 0.5) * cell), y + int((row + 0.5) * cell)))
+            < 128
+            for col in range(modules)
+        ]
+        for row in range(modules)
+    ]
+
+
+def verify_card(path, payload, layout):
+    """None if the card at path carries payload's QR code, else what is wrong"""
+    if not Path(path).exists():
+        return "card not rendered"
+    with Image.open(path) as card:
+        # either mask is fine: cards may come from a deterministic or normal run
+        expected = [make_qr(payload).get_matrix(), make_qr(payload, True).get_matrix()]
+        found = sample_modules(card, layout, len(expected[0]))
+    if found in expected:
+        return None
+    wrong = min(
+        sum(
+            a != b
+            for row_a, row_b in zip(found, grid, strict=True)
+            for a, b in zip(row_a, row_b, strict=True)
+        )
+        for grid in expected
+    )
+    return f"QR does not match the roster payload ({wrong} modules differ)"
+
+
+def _verify_job(job):
+    path, payload, layout = job
+    return path, payload, verify_card(path, payload, layout)
+
+
+def verify_cards(jobs, workers=None):
+    """Verify (path, payload, layout) jobs in parallel; returns the failures"""
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_verify_job, jobs, chunksize=16)
+        return [result for result in results if result[2]]
+
+
+def _put(channel, item, failed):
+    """Queue.put that gives up once another stage has failed"""
+    while not failed.is_set():
+        try:
+            channel.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(channel, failed):
+    while not failed.is_set():
+        try:
+            return channel.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def render_pipeline(
+    entries,
+    templates,
+    output_path,
+    deterministic=False,
+    render_threads=2,
+    writer_threads=2,
+):
+    """Render and save the cards of entries; returns how many were written"""
+    todo = queue.Queue(maxsize=QUEUE_SIZE)
+    rendered = queue.Queue(maxsize=QUEUE_SIZE)
+    failed = threading.Event()
+    errors = []
+    written = []
+    lock = threading.Lock()
+
+    def stage(work):
+        def run():
+            try:
+                work()
+            except Exception as error:
+                errors.append(error)
+                failed.set()
+
+        return threading.Thread(target=run, daemon=True)
+
+    def read():
+        for entry in entries:
+            if not _put(todo, entry, failed):
+                return
+        for _ in range(render_threads):
+            _put(todo, _DONE, failed)
+
+    def render():
+        # FreeType faces are not shared between threads
+        fonts = {}
+        while (entry := _get(todo, failed)) is not _DONE:
+            template = templates[entry.class_code]
+            if entry.class_code not in fonts:
+                fonts[entry.class_code] = template.font.font_variant()
+            template = template._replace(font=fonts[entry.class_code])
+            card = render_card(template, entry, deterministic)
+            if not _put(rendered, (entry, card), failed):
+                return
+
+    def write():
+        while (item := _get(rendered, failed)) is not _DONE:
+            entry, card = item
+            save_card(card, card_path(output_path, entry), deterministic)
+            print(f"✅ Generated card with QR for: {entry.name}")
+            with lock:
+                written.append(entry)
+
+    reader = stage(read)
+    renderers = [stage(render) for _ in range(render_threads)]
+    writers = [stage(write) for _ in range(writer_threads)]
+    for thread in [reader, *renderers, *writers]:
+        thread.start()
+
+    reader.join()
+    for thread in renderers:
+        thread.join()
+    for _ in writers:
+        _put(rendered, _DONE, failed)
+    for thread in writers:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    return len(written)
+
+
+def contact_sheet(cards, columns, card_size, font):
+    """Tile (caption, card) pairs row by row onto one white sheet"""
+    width, height = card_size
+    cell_height = height + CAPTION_SIZE + SHEET_GAP
+    rows = -(-len(cards) // columns)
+    sheet = Image.new(
+        "RGB",
+        (
+            columns * (width + SHEET_GAP) + SHEET_GAP,
+            rows * cell_height + SHEET_GAP,
+        ),
+        "white",
+    )
+    draw = ImageDraw.Draw(sheet)
+    for i, (caption, card) in enumerate(cards):
+        x = SHEET_GAP + (i % columns) * (width + SHEET_GAP)
+        y = SHEET_GAP + (i // columns) * cell_height
+        sheet.paste(card.convert("RGB"), (x, y))
+        draw.text((x, y + height + 1), caption, font=font, fill="black")
+    return sheet
+
+
+def render_proofs(entries, templates, output_path, columns, rows):
+    """Render reduced cards onto proof-001.png, ...; returns (cards, sheets)"""
+    per_sheet = columns * rows
+    # captions in the card font (ImageFont.load_default(size) needs Pillow 10.1)
+    font = next(iter(templates.values())).font.font_variant(size=CAPTION_SIZE)
+    count = 0
+    sheets = 0
+    for start in range(0, len(entries), per_sheet):
+        cards = []
+        for entry in entries[start : start + per_sheet]:
+            card = render_card(templates[entry.class_code], entry)
+            cards.append((f"{entry.class_code} row {entry.line}", card))
+        card_size = max(card.size for _, card in cards)
+        sheets += 1
+        path = Path(output_path) / f"proof-{sheets:03d}.png"
+        contact_sheet(cards, columns, card_size, font).save(path)
+        count += len(cards)
+        print(f"✅ {path.name}: {start + 1}-{count}")
+    return count, sheets
+
+
+def share_backgrounds(templates):
+    """
+    Copy each template's static layer into a shared memory block.
+
+    Returns (blocks, specs): the caller closes and unlinks the blocks when the
+    pool is done; specs ({class: (block name, buffer mode, card mode, size)})
+    go to the workers.
+    """
+    blocks = []
+    specs = {}
+    for class_code, template in templates.items():
+        static = template.static
+        if static.mode not in SHARED_MODES:
+            static = static.convert("RGBA")
+        buffer_mode = SHARED_MODES[static.mode]
+        pixels = static.convert(buffer_mode).tobytes()
+
+        block = shared_memory.SharedMemory(create=True, size=len(pixels))
+        block.buf[: len(pixels)] = pixels
+        blocks.append(block)
+        specs[class_code] = (block.name, buffer_mode, static.mode, static.size)
+    return blocks, specs
+
+
+# per worker process: class code -> (shared block, template, card mode)
+_WORKER = {}
+
+
+def _init_worker(settings, specs, output_path, deterministic):
+    _WORKER["output_path"] = output_path
+    _WORKER["deterministic"] = deterministic
+    for class_code, (name, buffer_mode, mode, size) in specs.items():
+        block = shared_memory.SharedMemory(name=name)
+        # zero-copy: the image reads the shared pages; keep the block open
+        static = Image.frombuffer(
+            buffer_mode, size, block.buf, "raw", buffer_mode, 0, 1
+        )
+        template = compile_template(settings, class_code, static)
+        _WORKER[class_code] = (block, template, mode)
+
+
+def _render_job(entry):
+    _, template, mode = _WORKER[entry.class_code]
+    deterministic = _WORKER["deterministic"]
+    card = render_card(template, entry, deterministic)
+    if card.mode != mode:
+        card = card.convert(mode)
+    save_card(card, card_path(_WORKER["output_path"], entry), deterministic)
+    return entry.name
+
+
+def render_processes(
+    entries, templates, settings, output_path, deterministic, processes
+):
+    """Render and save the cards of entries in a process pool; returns the count"""
+    blocks, specs = share_backgrounds(templates)
+    count = 0
+    try:
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_worker,
+            initargs=(settings, specs, output_path, deterministic),
+        ) as pool:
+            for name in pool.map(_render_job, entries, chunksize=8):
+                print(f"✅ Generated card with QR for: {name}")
+                count += 1
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return count
+
+
+def add_card_arguments(parser):
+    """Command line shared by the card scripts"""
+    parser.add_argument("csv", help="roster CSV")
+    parser.add_argument("output", nargs="?", help="output directory")
+    parser.add_argument(
+        "--deterministic",
+        action="store_true",
+        help="fixed QR mask and metadata-free PNGs (byte-identical re-renders)",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="check the rendered cards against the roster instead of rendering",
+    )
+    parser.add_argument("--workers", type=int, help="verify processes (default: CPUs)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="render and write on separate threads with bounded queues",
+    )
+    mode.add_argument(
+        "--processes",
+        type=int,
+        help="render in this many processes sharing the decoded backgrounds",
+    )
+    mode.add_argument(
+        "--proof",
+        type=float,
+        nargs="?",
+        const=PROOF_SCALE,
+        metavar="SCALE",
+        help=f"contact sheets of cards rendered at SCALE (default {PROOF_SCALE})",
+    )
+    parser.add_argument("--render-threads", type=int, default=2)
+    parser.add_argument("--writer-threads", type=int, default=2)
+    parser.add_argument("--sheet-columns", type=int, default=SHEET_COLUMNS)
+    parser.add_argument("--sheet-rows", type=int, default=SHEET_ROWS)
+
+
+def run_cards(args, entries, output_path):
+    """Render (or with --verify, check) the cards of the roster entries"""
+    settings = load_card_settings()
+
+    if args.verify:
+        failures = verify_cards(
+            [
+                (
+                    str(card_path(output_path, entry)),
+                    entry.payload,
+                    card_layout(settings, entry.class_code),
+                )
+                for entry in entries
+            ],
+            args.workers,
+        )
+        for path, payload, problem in failures:
+            print(f"❌ {Path(path).name}: {problem} ('{payload}')")
+        if failures:
+            print(f"\n🚨 {len(failures)} of {len(entries)} cards failed verification")
+            sys.exit(1)
+        print(f"✅ All {len(entries)} cards in '{output_path}/' match the roster")
+        return
+
+    scale = 1
+    if args.proof is not None:
+        if not 0 < args.proof <= 1:
+            print(f"❌ Error: --proof scale must be in (0, 1], got {args.proof}")
+            sys.exit(1)
+        if args.sheet_columns < 1 or args.sheet_rows < 1:
+            print("❌ Error: --sheet-columns and --sheet-rows must be at least 1")
+            sys.exit(1)
+        scale = args.proof
+        output_path = Path(output_path) / "proof"
+
+    os.makedirs(output_path, exist_ok=True)
+    print(f"📁 Creating QR codes in directory: {output_path}/")
+
+    templates = {}
+    for class_code in dict.fromkeys(entry.class_code for entry in entries):
+        template = compile_template(settings, class_code, scale=scale)
+        if template is None:
+            print(f"❌ Error: Background image not found for class {class_code}")
+            sys.exit(1)
+        print(f"🖼️  Using background: {background_path(settings, class_code)}")
+        templates[class_code] = template
+
+    if args.proof is not None:
+        qr_count, sheets = render_proofs(
+            entries, templates, output_path, args.sheet_columns, args.sheet_rows
+        )
+        print(
+            f"\n🎉 {qr_count} proof cards at {scale:g}x on {sheets} contact sheets "
+            f"in '{output_path}/'"
+        )
+        return
+
+    if args.processes:
+        qr_count = render_processes(
+            entries,
+            templates,
+            settings,
+            output_path,
+            args.deterministic,
+            args.processes,
+        )
+    elif args.pipeline:
+        qr_count = render_pipeline(
+            entries,
+            templates,
+            output_path,
+            args.deterministic,
+            args.render_threads,
+            args.writer_threads,
+        )
+    else:
+        qr_count = 0
+        for entry in entries:
+            card = render_card(templates[entry.class_code], entry, args.deterministic)
+            save_card(card, card_path(output_path, entry), args.deterministic)
+            print(f"✅ Generated card with QR for: {entry.name}")
+            qr_count += 1
+
+    print(
+        f"\n🎉 Successfully generated {qr_count} ID cards with QR codes in '{output_path}/' directory!"
+    )
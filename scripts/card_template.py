@@ -0,0 +1,154 @@
+"""
+Compile card backgrounds and the layout in config/settings.json into templates.
+
+"image_processing" in the settings gives the QR box and name block as percent of
+the background size, plus the font. compile_template() resolves all of that once
+per background: the decoded static layer, the QR paste box in pixels, the text
+anchor and the font handle, so rendering a card only pastes a QR code and draws
+the name. "backgrounds" holds per-class overrides of any of these keys, e.g.
+
+    "backgrounds": {"du_truong": {"qr_position": {"x_percent": 30}}}
+
+With scale < 1 (proof mode) the background is reduced once and the pixel sizes
+of the layout (QR size, font sizes, line spacing) shrink with it, so a proof
+card is drawn small from the start instead of rendered full size and resized.
+"""
+
+import json
+import os
+from functools import cache
+from typing import NamedTuple
+
+from PIL import Image, ImageFont
+from roster import PROJECT_ROOT
+
+SETTINGS_PATH = PROJECT_ROOT / "config" / "settings.json"
+
+
+class CardTemplate(NamedTuple):
+    """A background compiled with its layout"""
+
+    class_code: str
+    static: Image.Image  # decoded background, copied for every card
+    qr_box: tuple  # (x, y, size) in pixels
+    text_anchor: tuple  # (x, y): top center of the name block's middle line
+    line_spacing: int
+    wrap_chars: int
+    font: ImageFont.FreeTypeFont
+    fill: tuple
+
+
+def _merge(base, override):
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_card_settings(settings_path=SETTINGS_PATH):
+    """The "image_processing" section of config/settings.json"""
+    with open(settings_path, encoding="utf-8") as file:
+        return json.load(file)["image_processing"]
+
+
+def card_layout(settings, class_code):
+    """Default layout with the class's "backgrounds" overrides applied"""
+    defaults = {key: value for key, value in settings.items() if key != "backgrounds"}
+    return _merge(defaults, settings.get("backgrounds", {}).get(class_code, {}))
+
+
+def qr_box(layout, size):
+    """(x, y, size) of the QR code on a background of this size"""
+    qr = layout["qr_position"]
+    return (
+        int(size[0] * qr["x_percent"] / 100) - qr["size"] // 2,
+        int(size[1] * qr["y_percent"] / 100) - qr["size"] // 2,
+        qr["size"],
+    )
+
+
+@cache
+def _truetype(path, size):
+    return ImageFont.truetype(path, size)
+
+
+def load_font(font):
+    """The configured font, or the fallback where it is not installed (Linux)"""
+    if os.path.exists(font["path"]) or "fallback_path" not in font:
+        return _truetype(font["path"], font["size"])
+    return _truetype(font["fallback_path"], font.get("fallback_size", font["size"]))
+
+
+def scale_layout(layout, scale):
+    """The layout with its pixel sizes multiplied by scale (percents stay put)"""
+    if scale == 1:
+        return layout
+
+    def scaled(value):
+        return max(1, round(value * scale))
+
+    font = dict(layout["font"], size=scaled(layout["font"]["size"]))
+    if "fallback_size" in font:
+        font["fallback_size"] = scaled(font["fallback_size"])
+    name = layout["text_positions"]["name"]
+    return _merge(
+        layout,
+        {
+            "qr_position": {"size": scaled(layout["qr_position"]["size"])},
+            "text_positions": {"name": {"line_spacing": scaled(name["line_spacing"])}},
+            "font": font,
+        },
+    )
+
+
+def background_path(settings, class_code):
+    """<background_dir>/<class>.png (or <class>_background.png), None if missing"""
+    directory = PROJECT_ROOT / card_layout(settings, class_code)["background_dir"]
+    for name in (f"{class_code}.png", f"{class_code}_background.png"):
+        path = directory / name
+        if path.exists():
+            return path
+    return None
+
+
+def compile_template(settings, class_code, static=None, scale=1):
+    """
+    CardTemplate for a class, or None if it has no background.
+
+    static is an already decoded background (e.g. over shared memory); by
+    default the background file is decoded here. scale < 1 compiles a reduced
+    proof template.
+    """
+    if static is None:
+        path = background_path(settings, class_code)
+        if path is None:
+            return None
+        with Image.open(path) as image:
+            static = image.copy()
+
+    if scale != 1:
+        size = (
+            max(1, round(static.width * scale)),
+            max(1, round(static.height * scale)),
+        )
+        static = static.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+    layout = scale_layout(card_layout(settings, class_code), scale)
+
+    text = layout["text_positions"]["name"]
+    return CardTemplate(
+        class_code=class_code,
+        static=static,
+        qr_box=qr_box(layout, static.size),
+        text_anchor=(
+            int(static.size[0] * text["x_percent"] / 100),
+            int(static.size[1] * text["y_percent"] / 100),
+        ),
+        line_spacing=text["line_spacing"],
+        wrap_chars=text["wrap_chars"],
+        font=load_font(layout["font"]),
+        fill=tuple(layout["font"]["color"]),
+    )
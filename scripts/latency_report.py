@@ -0,0 +1,168 @@
+"""
+Per-phase latency histograms from the web app's timing lines.
+
+logScan() logs one {"evt":"scan","ms":{...}} line per scan and the flush trigger
+one {"evt":"flush",...} line per run. Export the logs (Cloud Logging JSON/JSON
+lines download, or text copied from the Executions page) and point this at them
+to see which phase (masterMap, openById, column, write, buffer) is slow.
+
+Usage:   python3 scripts/latency_report.py <log file ...> [--evt scan] [--class c1]
+Example: python3 scripts/latency_report.py downloaded-logs.json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Histogram bucket upper bounds in ms (last bucket is open-ended)
+BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+BAR_WIDTH = 40
+_DECODER = json.JSONDecoder()
+
+
+def _timing_from_text(text):
+    """Find a timing object inside a log message"""
+    start = text.find('{"evt"')
+    if start < 0:
+        return None
+    try:
+        record, _ = _DECODER.raw_decode(text, start)
+    except json.JSONDecodeError:
+        return None
+    return record
+
+
+def _timing_from_entry(entry):
+    """Cloud Logging entry: the message is textPayload or jsonPayload(.message)"""
+    if not isinstance(entry, dict):
+        return None
+    if "evt" in entry and "ms" in entry:
+        return entry
+    payload = entry.get("jsonPayload")
+    if isinstance(payload, dict):
+        if "evt" in payload:
+            return payload
+        if isinstance(payload.get("message"), str):
+            return _timing_from_text(payload["message"])
+    if isinstance(entry.get("textPayload"), str):
+        return _timing_from_text(entry["textPayload"])
+    return None
+
+
+def read_timings(path):
+    """Yield timing records from a JSON array, JSON lines or plain text log"""
+    text = Path(path).read_text(encoding="utf-8")
+    try:
+        document = json.loads(text)
+    except json.JSONDecodeError:
+        document = None
+
+    if isinstance(document, list):
+        for entry in document:
+            record = _timing_from_entry(entry)
+            if record:
+                yield record
+        return
+
+    for line in text.splitlines():
+        line = line.strip()
+        record = None
+        if line.startswith("{"):
+            try:
+                record = _timing_from_entry(json.loads(line))
+            except json.JSONDecodeError:
+                record = None
+        record = record or _timing_from_text(line)
+        if record:
+            yield record
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(
+        0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1)
+    )
+    return sorted_values[index]
+
+
+def histogram(values):
+    counts = [0] * (len(BUCKETS_MS) + 1)
+    for value in values:
+        for index, bound in enumerate(BUCKETS_MS):
+            if value < bound:
+                counts[index] += 1
+                break
+        else:
+            counts[-1] += 1
+    return counts
+
+
+def bucket_label(index):
+    if index == len(BUCKETS_MS):
+        return f">={BUCKETS_MS[-1]}"
+    low = BUCKETS_MS[index - 1] if index else 0
+    return f"{low}-{BUCKETS_MS[index]}"
+
+
+def print_phase(phase, values):
+    values = sorted(values)
+    print(
+        f"\n⏱️  {phase}: n={len(values)}  p50={percentile(values, 0.5)} ms  "
+        f"p90={percentile(values, 0.9)} ms  p99={percentile(values, 0.99)} ms  "
+        f"max={values[-1]} ms"
+    )
+    counts = histogram(values)
+    peak = max(counts)
+    for index, count in enumerate(counts):
+        if count:
+            bar = "█" * max(1, round(count / peak * BAR_WIDTH))
+            print(f"   {bucket_label(index):>11} ms {bar} {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency histograms per logScan phase")
+    parser.add_argument("logs", nargs="+", help="exported log files")
+    parser.add_argument("--evt", default="scan", help="scan (default) or flush")
+    parser.add_argument("--class", dest="class_code", help="only scans of this class")
+    args = parser.parse_args()
+
+    records = []
+    for path in args.logs:
+        if not Path(path).exists():
+            print(f"❌ Error: log file not found: {path}")
+            sys.exit(1)
+        records.extend(
+            record
+            for record in read_timings(path)
+            if record.get("evt") == args.evt
+            and (not args.class_code or record.get("class") == args.class_code)
+        )
+
+    if not records:
+        print(f"⚠️  No {args.evt} timing lines found")
+        sys.exit(1)
+
+    outcomes = {}
+    for record in records:
+        outcome = (
+            "/".join(str(record[key]) for key in ("outcome", "path") if key in record)
+            or args.evt
+        )
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    summary = ", ".join(f"{name} {count}" for name, count in sorted(outcomes.items()))
+    print(f"📊 {len(records)} {args.evt} lines ({summary})")
+
+    phases = {}
+    for record in records:
+        for phase, value in record.get("ms", {}).items():
+            phases.setdefault(phase, []).append(value)
+
+    # total first, then the phases in order of their share of the time
+    order = sorted(phases, key=lambda phase: (phase != "total", -sum(phases[phase])))
+    for phase in order:
+        print_phase(phase, phases[phase])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Python twin of normalize() in Code.js, checked against a conformance corpus.
+
+The master map key of a student is Code.js normalize(name): trim, lowercase,
+NFD, đ→d, then drop combining marks (U+0300–U+036F) and whitespace, where trim
+and whitespace are JavaScript's definitions, not Python's. normalize() here
+gives the same key and is memoized, so bulk tools that key the same names over
+and over (master map builds, diffs, validation) pay for each name once.
+
+data/templates/normalize_conformance.csv holds inputs and the keys Code.js
+computes for them: every name, payload and class label in data/csv_files plus
+edge cases. --build-corpus regenerates it by running the real Code.js function
+under node; --check compares this module against it (no node needed).
+
+Usage:   python3 scripts/normalize.py --check | --build-corpus | <text ...>
+Example: python3 scripts/normalize.py "Giuse Đỗ  Phúc Đông Ân"
+"""
+
+import argparse
+import csv
+import json
+import re
+import subprocess
+import sys
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CODE_JS_PATH = PROJECT_ROOT / "src" / "google_apps_script" / "Code.js"
+CORPUS_PATH = PROJECT_ROOT / "data" / "templates" / "normalize_conformance.csv"
+CSV_ROOT = PROJECT_ROOT / "data" / "csv_files"
+
+# JavaScript's \s and String.prototype.trim() use this set, which is not the same
+# as Python's str.isspace() (e.g. U+FEFF is whitespace in JS, U+001C is not)
+JS_WHITESPACE = (
+    "\t\n\v\f\r \u00a0\u1680"
+    + "".join(chr(code) for code in range(0x2000, 0x200B))
+    + "\u2028\u2029\u202f\u205f\u3000\ufeff"
+)
+_JS_COMBINING_OR_SPACE = re.compile("[\u0300-\u036f" + re.escape(JS_WHITESPACE) + "]")
+
+# Strings where a naive port goes wrong: whitespace JS and Python disagree on,
+# đ/Đ (no decomposition), precomposed vs combining marks, marks outside
+# U+0300–U+036F, and case mappings that change length or depend on context
+EDGE_CASES = [
+    "",
+    "   ",
+    "\u00a0Anna\u3000Tr\u1ea7n Di An\ufeff",
+    "Giuse\u001cMaria\u0085Phaol\u00f4",
+    "Ph\u00earo\u200bL\u00ea",
+    "\u0110\u1ed7 \u0110\u00ecnh \u0110\u1ee9c",
+    "\u0111\u0110",
+    "Nguy\u1ec5n",
+    "Nguye\u0302\u0303n",
+    "MARIA GORETTI",
+    "\u0130stanbul",
+    "\u03a3\u039f\u03a6\u0399\u0391\u03a3",
+    "Stra\u00dfe \u1e9e",
+    "\u01c5",
+    "\uff2d\uff41\uff52\uff49\uff41",
+    "Anh\u0483\u1dc0",
+    "Giuse c1 06/08/2019",
+    "NGH\u0128A 3",
+    "\u1ea4U 1",
+]
+
+
+def js_trim(text):
+    """String.prototype.trim()"""
+    return text.strip(JS_WHITESPACE)
+
+
+@lru_cache(maxsize=1 << 16)
+def normalize(text):
+    """Python port of Code.js normalize(): lowercase, NFD, đ→d, drop marks/spaces"""
+    text = unicodedata.normalize("NFD", js_trim(text).lower())
+    return _JS_COMBINING_OR_SPACE.sub("", text.replace("đ", "d"))
+
+
+def corpus_inputs():
+    """Every name, payload and class label in data/csv_files, plus EDGE_CASES"""
+    from roster import read_roster  # roster imports this module
+
+    inputs = dict.fromkeys(EDGE_CASES)
+    for csv_path in sorted(CSV_ROOT.rglob("*.csv")):
+        with open(csv_path, encoding="utf-8") as file:
+            for row in csv.reader(file):
+                inputs.update(dict.fromkeys(cell for cell in row if cell.strip()))
+        for entry in read_roster(csv_path):
+            inputs.update(dict.fromkeys([entry.name, entry.payload]))
+    return list(inputs)
+
+
+def js_normalize_all(texts, code_js_path=CODE_JS_PATH):
+    """Run the normalize() function of Code.js over texts with node"""
+    source = Path(code_js_path).read_text(encoding="utf-8")
+    function = re.search(r"^function normalize\(text\) \{.*?^\}", source, re.S | re.M)
+    if not function:
+        raise ValueError(f"normalize() not found in {code_js_path}")
+    script = (
+        function.group(0)
+        + "\nconst input = JSON.parse(require('fs').readFileSync(0, 'utf8'));"
+        + "\nprocess.stdout.write(JSON.stringify(input.map(normalize)));"
+    )
+    result = subprocess.run(
+        ["node", "-e", script],
+        input=json.dumps(texts),
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def build_corpus(corpus_path=CORPUS_PATH):
+    texts = corpus_inputs()
+    with open(corpus_path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["input", "expected"])
+        writer.writerows(zip(texts, js_normalize_all(texts), strict=True))
+    return len(texts)
+
+
+def check_corpus(corpus_path=CORPUS_PATH):
+    """Return the (input, expected, got) rows where normalize() disagrees"""
+    with open(corpus_path, encoding="utf-8", newline="") as file:
+        rows = list(csv.DictReader(file))
+    mismatches = [
+        (row["input"], row["expected"], normalize(row["input"]))
+        for row in rows
+        if normalize(row["input"]) != row["expected"]
+    ]
+    return len(rows), mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Code.js-compatible name normalization"
+    )
+    parser.add_argument("text", nargs="*", help="text to normalize")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument(
+        "--check", action="store_true", help="compare against the corpus"
+    )
+    action.add_argument(
+        "--build-corpus", action="store_true", help="regenerate the corpus with node"
+    )
+    args = parser.parse_args()
+
+    if args.build_corpus:
+        try:
+            count = build_corpus()
+        except (OSError, ValueError, subprocess.CalledProcessError) as error:
+            print(f"❌ Error: could not run Code.js normalize() under node: {error}")
+            sys.exit(1)
+        print(f"✅ Wrote {count} cases to {CORPUS_PATH.relative_to(PROJECT_ROOT)}")
+        return
+
+    if args.check:
+        count, mismatches = check_corpus()
+        for text, expected, got in mismatches:
+            print(f"❌ {text!r}: Code.js {expected!r}, Python {got!r}")
+        if mismatches:
+            print(f"\n🚨 {len(mismatches)} of {count} cases differ from Code.js")
+            sys.exit(1)
+        print(f"✅ All {count} cases match Code.js normalize()")
+        return
+
+    if not args.text:
+        parser.print_usage()
+        sys.exit(1)
+    for text in args.text:
+        print(normalize(text))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Shared roster helpers: read class CSVs and key students the same way Code.js does
+"""
+
+import csv
+import json
+import re
+from datetime import date
+from pathlib import Path
+from typing import NamedTuple
+
+from normalize import JS_WHITESPACE, js_trim, normalize
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CODE_JS_PATH = PROJECT_ROOT / "src" / "google_apps_script" / "Code.js"
+SEASONS_PATH = PROJECT_ROOT / "config" / "seasons.json"
+SEASONS_JS_PATH = PROJECT_ROOT / "src" / "google_apps_script" / "Seasons.js"
+
+_JS_SPACE_RUN = re.compile("[" + re.escape(JS_WHITESPACE) + "]+")
+
+# Card scripts accept d/m/yyyy in the note column (re.match, so prefix only) ...
+CARD_NOTE_DATE = re.compile(r"\d{1,2}/\d{1,2}/\d{4}")
+# ... while logScan only recognises a trailing dd/mm/yyyy token as a birthday
+LOGSCAN_BIRTHDAY = re.compile(r"\d{2}/\d{2}/\d{4}")
+
+
+class RosterEntry(NamedTuple):
+    """One student row of a roster CSV (line is the 1-based CSV row)"""
+
+    path: str
+    line: int
+    class_code: str
+    saint_name: str
+    last_name: str
+    first_name: str
+    note: str
+
+    @property
+    def name(self):
+        # "Têrêsa Calcutta Trần Di An" (same cleanup as the card scripts)
+        return f"{self.saint_name} {self.last_name} {self.first_name}".replace(
+            "\xa0", ""
+        ).strip()
+
+    @property
+    def card_note(self):
+        """Note as the card scripts put it into the QR payload"""
+        return self.note if CARD_NOTE_DATE.match(self.note) else ""
+
+    @property
+    def payload(self):
+        """QR payload: "Têrêsa Calcutta Trần Di An c1" or "... c1 06/08/2019" """
+        return f"{self.name} {self.class_code} {self.card_note}".rstrip()
+
+    @property
+    def master_key(self):
+        """Key buildMasterMap() stores for this row (date notes become dd/mm/yyyy)"""
+        return normalize(
+            f"{self.saint_name} {self.last_name} {self.first_name} "
+            f"{canonical_date(self.note)}"
+        )
+
+
+class ParsedScan(NamedTuple):
+    """Result of splitting a scanned payload exactly like logScan()"""
+
+    name_only: str
+    class_name: str
+    birthday: str
+    normalized: str
+
+
+def canonical_date(note):
+    """Return a d/m/yyyy note as dd/mm/yyyy (the sheet's Date format), else "" """
+    match = re.fullmatch(r"(\d{1,2})/(\d{1,2})/(\d{4})", note.strip())
+    if not match:
+        return ""
+    day, month, year = match.groups()
+    return f"{int(day):02d}/{int(month):02d}/{year}"
+
+
+def parse_payload(data):
+    """Split a scanned payload the way logScan() does (before transfers)"""
+    # data.trim().split(/\s+/) - an empty payload still yields [""]
+    parts = _JS_SPACE_RUN.split(js_trim(data))
+
+    class_name = parts.pop()
+    birthday = ""
+    if LOGSCAN_BIRTHDAY.fullmatch(class_name):
+        birthday = class_name
+        class_name = parts.pop() if parts else ""
+
+    name_only = " ".join(parts)
+    return ParsedScan(name_only, class_name, birthday, normalize(name_only + birthday))
+
+
+def class_code_from_label(label):
+    """Turn a class label into its code: "NGHĨA 3" -> "n3", "ẤU 1" -> "a1" """
+    label = label.strip()
+    return f"{normalize(label[0])}{label[-1]}".lower() if label else ""
+
+
+class RosterLayout(NamedTuple):
+    """Where the roster columns are: [note] [STT] TÊN THÁNH HỌ TÊN [... LỚP]"""
+
+    header: int
+    saint_col: int
+    stt_col: int
+    note_col: int
+    class_col: int
+
+
+def header_layout(index, row):
+    """Return the RosterLayout if row is the roster header row, else None"""
+    keys = [normalize(cell) for cell in row]
+    if "tenthanh" not in keys:
+        return None
+    saint_col = keys.index("tenthanh")
+    return RosterLayout(
+        header=index,
+        saint_col=saint_col,
+        stt_col=saint_col - 1 if saint_col >= 1 else None,
+        note_col=saint_col - 2 if saint_col >= 2 else None,
+        class_col=keys.index("lop") if "lop" in keys else None,
+    )
+
+
+def find_layout(rows):
+    for index, row in enumerate(rows):
+        layout = header_layout(index, row)
+        if layout:
+            return layout
+    return None
+
+
+def _cell(row, col):
+    return row[col].strip() if col is not None and col < len(row) else ""
+
+
+def roster_entry(row, line, csv_path, layout, class_code):
+    """Build the RosterEntry for a CSV row, or None if it is not a student record"""
+    # only student records: a numbered STT (when the layout has one) and a name
+    if layout.stt_col is not None and not _cell(row, layout.stt_col).isdigit():
+        return None
+
+    entry = RosterEntry(
+        path=str(csv_path),
+        line=line,
+        class_code=(
+            class_code_from_label(_cell(row, layout.class_col))
+            if layout.class_col is not None
+            else class_code
+        ),
+        saint_name=_cell(row, layout.saint_col),
+        last_name=_cell(row, layout.saint_col + 1),
+        first_name=_cell(row, layout.saint_col + 2),
+        note=_cell(row, layout.note_col),
+    )
+    return entry if entry.name else None
+
+
+def read_roster(csv_path, class_code=None):
+    """
+    Read every student row of a roster CSV.
+
+    Handles all layouts in data/csv_files: plain "Tên thánh,Họ,Tên" lists, sheet
+    exports with STT (and an optional note column before it), and bổ sung lists
+    with a LỚP column. The class code defaults to the file name (c1.csv -> c1).
+    """
+    with open(csv_path, encoding="utf-8") as file:
+        rows = list(csv.reader(file))
+
+    layout = find_layout(rows)
+    if layout is None:
+        return []
+
+    class_code = class_code or Path(csv_path).stem
+    entries = []
+    for index in range(layout.header + 1, len(rows)):
+        entry = roster_entry(rows[index], index + 1, csv_path, layout, class_code)
+        if entry:
+            entries.append(entry)
+    return entries
+
+
+def load_seasons(seasons_path=SEASONS_PATH):
+    """Read config/seasons.json: season -> {"start": yyyy-mm-dd, "spreadsheets": {...}}"""
+    with open(seasons_path, encoding="utf-8") as file:
+        return json.load(file)["seasons"]
+
+
+def active_season(seasons, today=None):
+    """Latest season that has started by today (same rule as activeSeason() in Code.js)"""
+    today = (today or date.today()).isoformat()
+    order = sorted(seasons, key=lambda season: seasons[season]["start"])
+    started = [season for season in order if seasons[season]["start"] <= today]
+    return started[-1] if started else order[0]
+
+
+def load_spreadsheet_map(season=None, seasons_path=SEASONS_PATH):
+    """Class code -> spreadsheet ID of a season (default: the active one)"""
+    seasons = load_seasons(seasons_path)
+    return dict(seasons[season or active_season(seasons)]["spreadsheets"])
+
+
+def load_class_aliases(season=None, seasons_js_path=SEASONS_JS_PATH):
+    """Read CLASS_ALIASES of a season (default: the active one) from Seasons.js"""
+    path = Path(seasons_js_path)
+    if not path.exists():
+        return {}
+    block = re.search(
+        r"const CLASS_ALIASES = \{(.*?)\};", path.read_text("utf-8"), re.S
+    )
+    if not block:
+        return {}
+    tables = json.loads("{" + block.group(1).rstrip().rstrip(",") + "}")
+    return tables.get(season or active_season(load_seasons()), {})
+
+
+def load_transfer_students(code_js_path=CODE_JS_PATH):
+    """Read TRANSFER_STUDENTS (old key -> [old class, new class or new key]) from Code.js"""
+    source = Path(code_js_path).read_text(encoding="utf-8")
+    block = re.search(r"const TRANSFER_STUDENTS = \{(.*?)\};", source, re.S)
+    if not block:
+        return {}
+    entries = re.findall(r'"(\w+)":\s*\["(\w+)",\s*"(\w+)"\]', block.group(1))
+    return {key: (old_class, target) for key, old_class, target in entries}
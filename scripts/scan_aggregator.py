@@ -0,0 +1,463 @@
+"""
+Scan aggregator for the church LAN: phones scan through this machine, which
+answers at once and forwards the check-ins to the web app in batches.
+
+Phones open http(s)://<this machine>:<port>/ and get Scanner.html with a small
+shim in place of google.script.run, so the scanner page itself is unchanged.
+Every scan is de-duplicated (same card within 30 s), stamped with the time it
+arrived if the phone sent none, routed by scan_engine.py against the local
+exports (run warmup.py before the session) and appended to the scan log; the
+phone gets that result straight away. Scans that set a new cell are queued, and
+a single forwarder task sends them in coalesced batches to the web app's doGet
+(?batch=[{id, data, scannedAt}], answered like logScanBatch) over one kept-alive
+connection, re-queuing any scan the web app answers with retry. Without
+--upstream the scan log is the record and scan_log.py compact --every stands in
+for the web app. Scans still queued at shutdown are kept in <log dir>/unsent.json
+and sent on the next start.
+
+Browsers only open the camera on a secure page, so outside localhost give it a
+certificate (self-signed is fine, accept it once per phone).
+
+Usage:   python3 scripts/scan_aggregator.py <exports dir> [--upstream <web app /exec URL>] [--port 8080] [--certfile cert.pem --keyfile key.pem]
+Example: python3 scripts/scan_aggregator.py exports --upstream https://script.google.com/macros/s/<deployment id>/exec
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import ssl
+import sys
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode, urljoin, urlsplit
+
+from roster import PROJECT_ROOT, load_spreadsheet_map
+from scan_engine import log_scan
+from scan_log import DEFAULT_LOG_DIR, SegmentWriter, export_files, load_logged_engine
+
+SCANNER_HTML_PATH = PROJECT_ROOT / "src" / "google_apps_script" / "Scanner.html"
+DEDUP_WINDOW_S = 30  # same as DEDUP_WINDOW_MS in Scanner.html
+BATCH_MAX = 25  # scans per upstream request
+BATCH_MAX_QUERY = 6000  # characters of ?batch=..., well under URL length limits
+LINGER_S = 0.5  # wait this long for more scans before sending a batch
+MAX_ATTEMPTS = 5  # same as MAX_ATTEMPTS in Scanner.html, for retry answers
+MAX_BACKOFF_S = 60
+MAX_REDIRECTS = 3
+MAX_BODY = 256 * 1024
+UNSENT_FILE = "unsent.json"
+
+# google.script for Scanner.html served from here: run calls become POST /run/<name>
+RUN_SHIM = """<script>
+    // Served by scan_aggregator.py: google.script.run calls go to this server
+    function aggregatorRun(handlers) {
+        return new Proxy({}, { get: (_, name) => {
+            if (name === "withSuccessHandler") return fn => aggregatorRun({ ...handlers, ok: fn });
+            if (name === "withFailureHandler") return fn => aggregatorRun({ ...handlers, fail: fn });
+            return (...args) => fetch("/run/" + name, {
+                method: "POST",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify(args)
+            })
+                .then(r => r.ok ? r.json() : r.text().then(text => Promise.reject(new Error(text))))
+                .then(handlers.ok || (() => {}), handlers.fail || console.error);
+        } });
+    }
+    window.google = { script: {
+        get run() { return aggregatorRun({}); },
+        url: { getLocation: cb => cb({ parameter: Object.fromEntries(new URLSearchParams(location.search)) }) }
+    } };
+</script>
+"""
+
+
+class UpstreamError(Exception):
+    pass
+
+
+class Upstream:
+    """The web app's doGet, over one kept-alive connection per host"""
+
+    def __init__(self, url, timeout=30):
+        self.url = url
+        self.timeout = timeout
+        # /exec answers with a redirect to script.googleusercontent.com, so
+        # there are two hosts; each keeps its own connection open
+        self.connections = {}
+
+    def _connection(self, parts):
+        key = (parts.scheme, parts.netloc)
+        if key not in self.connections:
+            if parts.scheme == "https":
+                connection = http.client.HTTPSConnection(
+                    parts.netloc, timeout=self.timeout
+                )
+            else:
+                connection = http.client.HTTPConnection(
+                    parts.netloc, timeout=self.timeout
+                )
+            self.connections[key] = connection
+        return self.connections[key]
+
+    def get(self, url):
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            connection = self._connection(parts)
+            target = parts.path + (f"?{parts.query}" if parts.query else "")
+            try:
+                connection.request("GET", target)
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException) as error:
+                connection.close()  # reopened by the next request
+                raise UpstreamError(f"{parts.netloc}: {error}") from error
+            if response.status in (301, 302, 303, 307, 308):
+                url = urljoin(url, response.getheader("Location"))
+                continue
+            if response.status != 200:
+                raise UpstreamError(f"{parts.netloc}: HTTP {response.status}")
+            return body.decode("utf-8")
+        raise UpstreamError(f"more than {MAX_REDIRECTS} redirects")
+
+    def batch_url(self, batch):
+        separator = "&" if "?" in self.url else "?"
+        query = urlencode({"batch": json.dumps(batch, ensure_ascii=False)})
+        return f"{self.url}{separator}{query}"
+
+    def send(self, batch):
+        """logScanBatch(batch) on the web app: [{id, result, retry}]"""
+        text = self.get(self.batch_url(batch))
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as error:
+            # e.g. a sign-in page: the deployment must run as "Anyone"
+            raise UpstreamError(f"not a batch answer: {text[:80]!r}") from error
+
+    def close(self):
+        for connection in self.connections.values():
+            connection.close()
+
+
+class Aggregator:
+    def __init__(self, engine, writer, upstream=None, unsent_path=None):
+        self.engine = engine
+        self.writer = writer
+        self.upstream = upstream
+        self.unsent_path = unsent_path
+        self.recent = {}  # payload -> (monotonic time, result)
+        self.pending = deque()  # {id, data, scannedAt, attempts}
+        self.ready = asyncio.Event()
+        self.counts = {"scans": 0, "repeats": 0, "forwarded": 0, "dropped": 0}
+        self.page = None
+
+    # --- scans -------------------------------------------------------------
+
+    def scan(self, data, scanned_at=None):
+        """Result for one scan, answered locally; new check-ins are queued"""
+        started = time.monotonic()
+        seen = self.recent.get(data)
+        if seen and started - seen[0] < DEDUP_WINDOW_S:
+            self.counts["repeats"] += 1
+            return seen[1]
+
+        now = datetime.now()
+        try:
+            at = datetime.fromtimestamp(int(scanned_at) / 1000) if scanned_at else now
+        except (TypeError, ValueError, OverflowError, OSError):
+            at = now
+        event = log_scan(self.engine, data, at, now=now)
+        self.writer.append(event)
+        self.counts["scans"] += 1
+
+        if len(self.recent) > 1000:
+            self.recent = {
+                payload: seen
+                for payload, seen in self.recent.items()
+                if started - seen[0] < DEDUP_WINDOW_S
+            }
+        self.recent[data] = (started, event.result)
+
+        if event.status is not None and not event.result.endswith(
+            "already checked in."
+        ):
+            self.enqueue(
+                {
+                    "id": uuid.uuid4().hex,
+                    "data": data,
+                    "scannedAt": int(event.at.timestamp() * 1000),
+                }
+            )
+        return event.result
+
+    def enqueue(self, scan):
+        if self.upstream:
+            self.pending.append({"attempts": 0, **scan})
+            self.ready.set()
+
+    # --- forwarding --------------------------------------------------------
+
+    def take_batch(self):
+        batch = []
+        size = 0
+        while self.pending and len(batch) < BATCH_MAX:
+            scan = self.pending[0]
+            item = {key: scan[key] for key in ("id", "data", "scannedAt")}
+            length = len(urlencode({"b": json.dumps(item, ensure_ascii=False)}))
+            if batch and size + length > BATCH_MAX_QUERY:
+                break
+            batch.append(self.pending.popleft())
+            size += length
+        return batch
+
+    def settle(self, batch, results):
+        """Drop answered scans; put the ones to retry back at the front"""
+        by_id = {scan["id"]: scan for scan in batch}
+        answered = set()
+        retry = []
+        for answer in results:
+            scan = by_id.get(answer.get("id"))
+            if scan is None:
+                continue
+            answered.add(scan["id"])
+            if answer.get("retry"):
+                scan["attempts"] += 1
+                if scan["attempts"] < MAX_ATTEMPTS:
+                    retry.append(scan)
+                    continue
+                self.counts["dropped"] += 1
+                print(f"⚠️  Gave up on {scan['data']}: {answer.get('result')}")
+            else:
+                self.counts["forwarded"] += 1
+        # scans the answer left out are sent again too
+        retry += [scan for scan in batch if scan["id"] not in answered]
+        self.pending.extendleft(reversed(retry))
+        return len(retry)
+
+    async def forward(self):
+        """The one task that talks to the web app"""
+        backoff = 0
+        while True:
+            await self.ready.wait()
+            await asyncio.sleep(backoff or LINGER_S)  # let a batch build up
+            batch = self.take_batch()
+            if not self.pending:
+                self.ready.clear()
+            if not batch:
+                continue
+            payload = [
+                {key: scan[key] for key in ("id", "data", "scannedAt")}
+                for scan in batch
+            ]
+            try:
+                results = await asyncio.to_thread(self.upstream.send, payload)
+            except UpstreamError as error:
+                self.pending.extendleft(reversed(batch))
+                self.ready.set()
+                backoff = min(max(1, backoff * 2), MAX_BACKOFF_S)
+                print(
+                    f"⚠️  Upstream: {error} ({len(self.pending)} queued, retry in {backoff} s)"
+                )
+                continue
+            except asyncio.CancelledError:
+                self.pending.extendleft(reversed(batch))
+                raise
+            retried = self.settle(batch, results)
+            if retried:
+                self.ready.set()
+                backoff = min(max(1, backoff * 2), MAX_BACKOFF_S)
+            else:
+                backoff = 0
+
+    def load_unsent(self):
+        # kept for a run with --upstream; the scan log already has them
+        if self.upstream and self.unsent_path and self.unsent_path.exists():
+            scans = json.loads(self.unsent_path.read_text(encoding="utf-8"))
+            self.unsent_path.unlink()
+            for scan in scans:
+                self.enqueue(scan)
+            print(f"📤 {len(scans)} scans from the last run queued for upload")
+
+    def save_unsent(self):
+        if not self.pending:
+            return
+        scans = [
+            {key: scan[key] for key in ("id", "data", "scannedAt")}
+            for scan in self.pending
+        ]
+        self.unsent_path.write_text(
+            json.dumps(scans, ensure_ascii=False), encoding="utf-8"
+        )
+        print(f"💾 {len(scans)} scans not yet uploaded, saved to {self.unsent_path}")
+
+    # --- HTTP --------------------------------------------------------------
+
+    def scanner_page(self):
+        if self.page is None:
+            html = SCANNER_HTML_PATH.read_text(encoding="utf-8")
+            self.page = html.replace("<head>", "<head>\n    " + RUN_SHIM, 1)
+        return self.page
+
+    def status(self):
+        return {
+            **self.counts,
+            "queued": len(self.pending),
+            "upstream": self.upstream.url if self.upstream else None,
+        }
+
+    def run(self, name, args):
+        """google.script.run.<name>(*args) for the served Scanner.html"""
+        if name == "logScanBatch":
+            return [
+                {
+                    "id": scan["id"],
+                    "result": self.scan(scan["data"], scan.get("scannedAt")),
+                    "retry": False,
+                }
+                for scan in args[0]
+            ]
+        if name == "logScan":
+            return self.scan(*args[:2])
+        if name == "getClassList":
+            return [
+                {
+                    "code": code,
+                    "url": f"https://docs.google.com/spreadsheets/d/{id_}/edit",
+                }
+                for code, id_ in load_spreadsheet_map().items()
+            ]
+        raise KeyError(name)
+
+    def route(self, method, target, body):
+        """(status, content type, body) for one request"""
+        parts = urlsplit(target)
+        query = parse_qs(parts.query)
+        if method == "GET" and parts.path == "/":
+            if "name" in query:
+                # same as the web app's doGet(?name=...&t=...)
+                result = self.scan(query["name"][0], query.get("t", [None])[0])
+                return 200, "text/plain", result
+            return 200, "text/html", self.scanner_page()
+        if method == "GET" and parts.path == "/status":
+            return 200, "application/json", json.dumps(self.status())
+        if method == "POST" and parts.path.startswith("/run/"):
+            try:
+                args = json.loads(body or b"[]")
+                result = self.run(parts.path[len("/run/") :], args)
+            except KeyError:
+                return 404, "text/plain", f"Unknown function {parts.path[5:]}"
+            except (ValueError, TypeError, IndexError) as error:
+                return 400, "text/plain", f"Bad request: {error}"
+            return 200, "application/json", json.dumps(result, ensure_ascii=False)
+        return 404, "text/plain", "Not found"
+
+    async def handle(self, reader, writer):
+        """One phone's connection; serves requests until it closes"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                headers = {}
+                for line in lines[1:]:
+                    key, _, value = line.partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                try:
+                    method, target, _ = lines[0].split(" ", 2)
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    await self.respond(writer, 400, "text/plain", "Bad request", False)
+                    break
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, "text/plain", "Too large", False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self.respond(
+                    writer, *self.route(method, target, body), keep_alive
+                )
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def respond(writer, status, content_type, text, keep_alive):
+        body = text.encode("utf-8")
+        reason = http.client.responses.get(status, "")
+        writer.write(
+            (
+                f"HTTP/1.1 {status} {reason}\r\n"
+                f"Content-Type: {content_type}; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Cache-Control: no-store\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            ).encode("latin-1")
+            + body
+        )
+        await writer.drain()
+
+
+async def serve(aggregator, args):
+    context = None
+    if args.certfile:
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(args.certfile, args.keyfile)
+    server = await asyncio.start_server(
+        aggregator.handle, args.host, args.port, ssl=context
+    )
+    forwarder = (
+        asyncio.create_task(aggregator.forward()) if aggregator.upstream else None
+    )
+    scheme = "https" if context else "http"
+    print(f"📡 Scanner page on {scheme}://{args.host}:{args.port}/ (Ctrl+C to stop)")
+    print(f"   Forwarding to {args.upstream or 'the scan log only'}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if forwarder:
+            forwarder.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LAN scan aggregator")
+    parser.add_argument("exports", help="Điểm danh export or folder of exports")
+    parser.add_argument("--upstream", help="web app /exec URL to forward check-ins to")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--certfile", help="TLS certificate (PEM)")
+    parser.add_argument("--keyfile", help="TLS private key (PEM)")
+    parser.add_argument("--log-dir", default=DEFAULT_LOG_DIR, help="segment folder")
+    args = parser.parse_args()
+
+    exports = export_files(args.exports)
+    if not exports or not all(path.exists() for path in exports):
+        print(f"❌ Error: no exports found at {args.exports}")
+        sys.exit(1)
+
+    engine = load_logged_engine(exports, args.log_dir)
+    upstream = Upstream(args.upstream) if args.upstream else None
+    with SegmentWriter(args.log_dir) as writer:
+        aggregator = Aggregator(
+            engine, writer, upstream, Path(args.log_dir) / UNSENT_FILE
+        )
+        aggregator.load_unsent()
+        try:
+            asyncio.run(serve(aggregator, args))
+        except KeyboardInterrupt:
+            print("\n👋 Stopped")
+        finally:
+            aggregator.save_unsent()
+            if upstream:
+                upstream.close()
+
+
+if __name__ == "__main__":
+    main()
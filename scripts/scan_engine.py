@@ -0,0 +1,228 @@
+"""
+Python port of logScan() in Code.js, run against exported "Điểm danh" sheets.
+
+The master map is built from the exports (same keys as buildMasterMap()), the
+transfer table is read from TRANSFER_STUDENTS in Code.js, last season's class
+codes from CLASS_ALIASES in Seasons.js and status/column come
+from the compiled schedule in config/gas_config.json, so a payload gets the same
+answer here as from the web app. Instead of writing a cell, log_scan() returns
+the ScanEvent to append to the scan log (see scan_log.py).
+
+Usage:   python3 scripts/scan_engine.py <exports dir> "<payload>" ["dd/mm/yyyy HH:MM:SS"]
+Example: python3 scripts/scan_engine.py exports "Giuse Trần Hoàng Nguyên Khôi c1"
+"""
+
+import pickle
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple
+
+from roster import (
+    CODE_JS_PATH,
+    PROJECT_ROOT,
+    SEASONS_JS_PATH,
+    load_class_aliases,
+    load_transfer_students,
+    parse_payload,
+)
+from session_schedule import GAS_CONFIG_PATH, compile_schedules, load_config, lookup
+from sheet_export import stream_export
+
+# Same limits as MAX_REPLAY_AGE_MS / MAX_CLOCK_SKEW_MS in Code.js
+MAX_REPLAY_AGE = timedelta(days=7)
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+# Like the 6h CacheService TTL of the web app's master map
+ENGINE_CACHE_PATH = PROJECT_ROOT / "output" / "scan_cache.pickle"
+ENGINE_CACHE_TTL_S = 6 * 60 * 60
+
+
+class ScanEngine(NamedTuple):
+    master_map: dict  # normalized key -> (class code, sheet row)
+    headers: dict  # class code -> ExportHeader
+    transfers: dict  # TRANSFER_STUDENTS
+    aliases: dict  # active season's CLASS_ALIASES
+    schedules: dict  # compile_schedules() tables
+    cells: dict  # (class, row, session index, part) -> status already in the grid
+    columns: dict  # (class, date) -> session index, like the per-day column cache
+
+
+class ScanEvent(NamedTuple):
+    """One scan as it goes into the log; cell fields are None if nothing is written"""
+
+    at: datetime
+    payload: str
+    result: str
+    class_code: str = None
+    row: int = None
+    session: object = None  # datetime.date of the Sunday column
+    part: int = None  # 0 = TL column, 1 = GL column
+    status: str = None
+
+
+def load_engine(export_paths, code_js_path=None, config=None):
+    """Build the master map and grid state from class exports"""
+    master_map = {}
+    headers = {}
+    cells = {}
+    for path in export_paths:
+        # absolute, so a cached engine matches whatever directory asks for it
+        for header, entry, marks in stream_export(Path(path).resolve()):
+            headers[header.class_code] = header
+            master_map[entry.master_key] = (header.class_code, entry.line)
+            for index, pair in enumerate(marks):
+                for part, value in enumerate(pair):
+                    if value:
+                        cells[(header.class_code, entry.line, index, part)] = value
+
+    transfers = load_transfer_students(code_js_path or CODE_JS_PATH)
+    aliases = load_class_aliases()
+    schedules = compile_schedules(config or load_config())
+    return ScanEngine(master_map, headers, transfers, aliases, schedules, cells, {})
+
+
+def save_engine(engine, cache_path=ENGINE_CACHE_PATH):
+    cache_path = Path(cache_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(cache_path, "wb") as file:
+        pickle.dump(engine, file)
+
+
+def load_cached_engine(export_paths, cache_path=ENGINE_CACHE_PATH):
+    """Reuse the engine warmup.py saved, unless it expired or an input changed"""
+    cache_path = Path(cache_path)
+    if not cache_path.exists():
+        return None
+    built = cache_path.stat().st_mtime
+    inputs = [*export_paths, CODE_JS_PATH, SEASONS_JS_PATH, GAS_CONFIG_PATH]
+    if time.time() - built > ENGINE_CACHE_TTL_S or any(
+        Path(path).stat().st_mtime > built for path in inputs
+    ):
+        return None
+    with open(cache_path, "rb") as file:
+        engine = pickle.load(file)
+    # a different set of exports needs its own master map
+    wanted = {Path(path).resolve() for path in export_paths}
+    cached = {Path(header.path).resolve() for header in engine.headers.values()}
+    return engine if wanted == cached else None
+
+
+def session_index(engine, class_code, day):
+    """find_session() with the (class, day) answer kept in engine.columns"""
+    key = (class_code, day)
+    if key not in engine.columns:
+        engine.columns[key] = find_session(engine.headers[class_code], day)
+    return engine.columns[key]
+
+
+def resolve_scan_time(scanned_at, now):
+    """Port of resolveScanTime(): None if the scan is too old to replay"""
+    if scanned_at is None:
+        return now
+    if scanned_at > now + MAX_CLOCK_SKEW:
+        return now
+    if now - scanned_at > MAX_REPLAY_AGE:
+        return None
+    return scanned_at
+
+
+def find_session(header, day):
+    """Port of findTodayColumn(): index of the first Sunday on or after day"""
+    for index, session in enumerate(header.sessions):
+        if session and day <= session:
+            return index
+    return None
+
+
+def _format_second(second):
+    return f"{second // 3600:02d}:{second // 60 % 60:02d}"
+
+
+def log_scan(engine, data, scanned_at=None, now=None):
+    """Route one payload like logScan(); returns the ScanEvent (result = message)"""
+    now = now or datetime.now()
+    name_only, class_name, _, normalized = parse_payload(data)
+
+    transfer = engine.transfers.get(normalized)
+    if transfer and transfer[0] == class_name:
+        if len(transfer[1]) == 2:
+            class_name = transfer[1]
+        else:
+            normalized = transfer[1]
+
+    # routed scans are logged at the resolved time (a phone clock far ahead
+    # counts as now); scans that are never routed keep the phone's time
+    at = resolve_scan_time(scanned_at, now)
+
+    def event(result, **cell):
+        return ScanEvent(at, data, result, **cell)
+
+    if normalized not in engine.master_map:
+        message = f'Error: "{name_only}" not found in master map.'
+        return ScanEvent(scanned_at or now, data, message)
+    class_code, row = engine.master_map[normalized]
+
+    if at is None:
+        message = f'Error: Scan of "{name_only}" is too old to record.'
+        return ScanEvent(scanned_at, data, message)
+
+    if class_name != class_code:
+        # last season's card: fine if the student moved into one of its classes
+        if class_code not in engine.aliases.get(class_name, ()):
+            return event(f'Error: "{name_only}" not found in class {class_name}.')
+        class_name = class_code
+
+    second = at.hour * 3600 + at.minute * 60 + at.second
+    status, offset, start, end = lookup(engine.schedules, class_name, second)
+    if status is None:
+        return event(
+            f"Skipped: No attendance marked between {_format_second(start)} "
+            f"and {_format_second(end)} for {name_only}"
+        )
+
+    header = engine.headers[class_code]
+    index = session_index(engine, class_code, at.date())
+    if index is None:
+        return event("Error: No matching column for today's date.")
+
+    cell = {
+        "class_code": class_code,
+        "row": row,
+        "session": header.sessions[index],
+        "part": offset,
+        "status": status,
+    }
+    key = (class_code, row, index, offset)
+    if engine.cells.get(key) == status:
+        return event(f"Success: {name_only} ({class_name}) already checked in.", **cell)
+
+    engine.cells[key] = status
+    return event(
+        f"Success: {name_only} ({class_name}) checked in at {at:%H:%M:%S}.", **cell
+    )
+
+
+def main():
+    if len(sys.argv) not in (3, 4):
+        print(__doc__.strip().splitlines()[-2])
+        sys.exit(1)
+
+    export_dir = Path(sys.argv[1])
+    exports = sorted(export_dir.glob("*.csv")) if export_dir.is_dir() else [export_dir]
+    scanned_at = None
+    if len(sys.argv) == 4:
+        try:
+            scanned_at = datetime.strptime(sys.argv[3], "%d/%m/%Y %H:%M:%S")
+        except ValueError:
+            print(
+                f"❌ Error: scan time must be dd/mm/yyyy HH:MM:SS, got '{sys.argv[3]}'"
+            )
+            sys.exit(1)
+
+    engine = load_engine(exports)
+    print(log_scan(engine, sys.argv[2], scanned_at, now=scanned_at).result)
+
+
+if __name__ == "__main__":
+    main()
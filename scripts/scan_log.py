@@ -0,0 +1,279 @@
+"""
+Append-only scan log and compaction into the "Điểm danh" grid.
+
+record:  every scan (including errors and skips) is routed by scan_engine.py and
+         appended as one JSON line to the current segment file; nothing is ever
+         overwritten, so repeated scans and column switches stay in the history.
+compact: all segments are read in order, folded to the latest status per cell
+         (by scan time, so replayed scans land correctly) and written into copies
+         of the class exports in one sequential pass per file. With --every it
+         keeps running as the local stand-in for the flushPendingWrites() trigger.
+
+Usage:   python3 scripts/scan_log.py record [--at "dd/mm/yyyy HH:MM:SS"] <exports dir> [payload ...]
+         python3 scripts/scan_log.py compact <exports dir> [--output output/compacted] [--every 60]
+Example: python3 scripts/scan_log.py record exports "Giuse Trần Hoàng Nguyên Khôi c1"
+"""
+
+import argparse
+import csv
+import json
+import sched
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from scan_engine import load_cached_engine, load_engine, log_scan
+from sheet_export import class_code_from_export, read_header
+
+DEFAULT_LOG_DIR = "output/scan_log"
+DEFAULT_COMPACT_DIR = "output/compacted"
+SEGMENT_MAX_EVENTS = 5000
+SEGMENT_GLOB = "segment-*.jsonl"
+
+
+def segment_paths(log_dir):
+    return sorted(Path(log_dir).glob(SEGMENT_GLOB))
+
+
+class SegmentWriter:
+    """Appends events to the newest segment, starting a new one every N events"""
+
+    def __init__(self, log_dir, max_events=SEGMENT_MAX_EVENTS):
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.max_events = max_events
+        segments = segment_paths(self.log_dir)
+        self.number = int(segments[-1].stem.split("-")[1]) if segments else 1
+        path = self._path()
+        self.count = 0
+        if path.exists():
+            with open(path, encoding="utf-8") as file:
+                self.count = sum(1 for _ in file)
+        # kept open for the writer's lifetime; closed by close() / __exit__
+        self.file = open(path, "a", encoding="utf-8")  # noqa: SIM115
+
+    def _path(self):
+        return self.log_dir / f"segment-{self.number:06d}.jsonl"
+
+    def append(self, event):
+        if self.count >= self.max_events:
+            self.file.close()
+            self.number += 1
+            self.count = 0
+            self.file = open(self._path(), "a", encoding="utf-8")  # noqa: SIM115
+        self.file.write(json.dumps(event_to_json(event), ensure_ascii=False) + "\n")
+        self.file.flush()
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def event_to_json(event):
+    record = {"at": event.at.isoformat(timespec="seconds"), "payload": event.payload}
+    record["result"] = event.result
+    if event.status is not None:
+        record.update(
+            {
+                "class": event.class_code,
+                "row": event.row,
+                "session": event.session.isoformat(),
+                "part": event.part,
+                "status": event.status,
+            }
+        )
+    return record
+
+
+def read_events(log_dir):
+    """Yield logged events (dicts) in the order they were appended"""
+    for path in segment_paths(log_dir):
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def fold_events(events):
+    """Latest status per cell: {(class, row, session date, part): status}"""
+    latest = {}
+    for event in events:
+        if "status" not in event:
+            continue
+        key = (event["class"], event["row"], event["session"], event["part"])
+        # ISO timestamps compare in time order; ties go to the later append
+        if key not in latest or latest[key][0] <= event["at"]:
+            latest[key] = (event["at"], event["status"])
+    return {key: status for key, (_, status) in latest.items()}
+
+
+def compact_export(export_path, updates, output_path):
+    """
+    Rewrite one export with its folded updates; returns the number of cells set
+    (None if it is not a Điểm danh export)
+    """
+    header = read_header(export_path)
+    if header is None:
+        return None
+    columns = {
+        session.isoformat(): column
+        for session, column in zip(header.sessions, header.session_columns, strict=True)
+        if session
+    }
+    # {row: [(column, status)]} for this class only
+    by_row = {}
+    for (_, row, session, part), status in updates.items():
+        if session in columns:
+            by_row.setdefault(row, []).append((columns[session] + part, status))
+
+    changed = 0
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(export_path, encoding="utf-8") as source, open(
+        output_path, "w", encoding="utf-8", newline=""
+    ) as target:
+        writer = csv.writer(target)
+        for line, row in enumerate(csv.reader(source), start=1):
+            for column, status in by_row.get(line, ()):
+                if column >= len(row):
+                    row.extend([""] * (column + 1 - len(row)))
+                if row[column] != status:
+                    row[column] = status
+                    changed += 1
+            writer.writerow(row)
+    return changed
+
+
+def export_files(path):
+    path = Path(path)
+    return sorted(path.glob("*.csv")) if path.is_dir() else [path]
+
+
+def load_logged_engine(exports, log_dir):
+    """Scan engine for the exports, with the cells the log already decided"""
+    # warmup.py keeps a ready engine so a scan doesn't re-read every export
+    engine = load_cached_engine(exports) or load_engine(exports)
+    # cells already decided by earlier log entries count as written
+    index_of = {
+        (code, session.isoformat()): index
+        for code, header in engine.headers.items()
+        for index, session in enumerate(header.sessions)
+        if session
+    }
+    for (code, row, session, part), status in fold_events(read_events(log_dir)).items():
+        if (code, session) in index_of:
+            engine.cells[(code, row, index_of[(code, session)], part)] = status
+    return engine
+
+
+def record(args):
+    exports = export_files(args.exports)
+    try:
+        scanned_at = (
+            datetime.strptime(args.at, "%d/%m/%Y %H:%M:%S") if args.at else None
+        )
+    except ValueError:
+        print(f"❌ Error: --at must be dd/mm/yyyy HH:MM:SS, got '{args.at}'")
+        sys.exit(1)
+
+    engine = load_logged_engine(exports, args.log_dir)
+
+    payloads = args.payloads or [line.strip() for line in sys.stdin if line.strip()]
+    with SegmentWriter(args.log_dir) as writer:
+        for payload in payloads:
+            event = log_scan(engine, payload, scanned_at, now=scanned_at)
+            writer.append(event)
+            print(event.result)
+
+
+def compact(args):
+    started = time.perf_counter()
+    updates = fold_events(read_events(args.log_dir))
+    if not updates:
+        print(f"⚠️  No check-ins in {args.log_dir}")
+        return
+
+    by_class = {}
+    for key, status in updates.items():
+        by_class.setdefault(key[0], {})[key] = status
+
+    total = 0
+    output_dir = Path(args.output)
+    for export_path in export_files(args.exports):
+        class_code = class_code_from_export(export_path)
+        changed = compact_export(
+            export_path, by_class.get(class_code, {}), output_dir / export_path.name
+        )
+        if changed is None:
+            print(f"⚠️  Skipping {export_path.name}: no 'Điểm danh' header found")
+            continue
+        total += changed
+        print(f"📁 {export_path.name}: {changed} cells updated")
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(
+        f"\n🎉 Folded {len(updates)} cells into {output_dir} "
+        f"({total} changed, {elapsed_ms:.0f} ms)"
+    )
+
+
+def compact_every(args):
+    """Local stand-in for the flushPendingWrites() trigger: compact on a timer"""
+    scheduler = sched.scheduler(time.monotonic, time.sleep)
+    last_state = None
+
+    def flush():
+        nonlocal last_state
+        # only re-fold when a segment was appended to since the last flush
+        state = [
+            (path.name, path.stat().st_size) for path in segment_paths(args.log_dir)
+        ]
+        if state != last_state:
+            compact(args)
+            last_state = state
+        scheduler.enter(args.every, 1, flush)
+
+    print(f"🕐 Flushing {args.log_dir} every {args.every} s (Ctrl+C to stop)")
+    scheduler.enter(0, 1, flush)
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append-only scan log")
+    parser.add_argument("--log-dir", default=DEFAULT_LOG_DIR, help="segment folder")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="route payloads into the log")
+    record_parser.add_argument("exports", help="Điểm danh export or folder of exports")
+    record_parser.add_argument(
+        "payloads", nargs="*", help="QR payloads (default: stdin)"
+    )
+    record_parser.add_argument("--at", help="scan time, dd/mm/yyyy HH:MM:SS")
+
+    compact_parser = commands.add_parser("compact", help="fold the log into the grid")
+    compact_parser.add_argument("exports", help="Điểm danh export or folder of exports")
+    compact_parser.add_argument("--output", default=DEFAULT_COMPACT_DIR)
+    compact_parser.add_argument(
+        "--every", type=float, help="keep running and flush every N seconds"
+    )
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args)
+    elif args.every:
+        compact_every(args)
+    else:
+        compact(args)
+
+
+if __name__ == "__main__":
+    main()
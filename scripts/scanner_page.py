@@ -0,0 +1,118 @@
+"""
+Build ScannerPage.html: Scanner.html with the active season's class list baked in.
+
+doGet() serves ScannerPage.html (cached in CacheService) when its class list is
+what getClassList() would return, so the page fills the class dropdown without
+a server round trip; otherwise it serves Scanner.html, which asks for the list.
+It also writes ScannerPage.js with SCANNER_PAGE_VERSION, a hash of the page
+that is part of doGet()'s cache key, so the first request after a push serves
+the new page instead of the cached one.
+Re-run after changing Scanner.html or config/seasons.json, before clasp push;
+--check exits with an error if the committed page is out of date.
+
+Usage:   python3 scripts/scanner_page.py [--season 2025_26] [--check]
+Example: python3 scripts/season_registry.py && python3 scripts/scanner_page.py && clasp push
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+
+from roster import PROJECT_ROOT, active_season, load_seasons
+
+GAS_DIR = PROJECT_ROOT / "src" / "google_apps_script"
+SCANNER_HTML_PATH = GAS_DIR / "Scanner.html"
+SCANNER_PAGE_PATH = GAS_DIR / "ScannerPage.html"
+SCANNER_VERSION_PATH = GAS_DIR / "ScannerPage.js"
+BAKED_MARKER = "const BAKED_CLASS_LIST = null;"
+GENERATED_NOTE = (
+    "<!-- Generated by scripts/scanner_page.py from Scanner.html and "
+    "config/seasons.json; do not edit by hand. -->\n"
+)
+
+
+def class_list(spreadsheets):
+    """Same list and order as getClassList() in Code.js"""
+    return [
+        {"code": code, "url": f"https://docs.google.com/spreadsheets/d/{id_}/edit"}
+        for code, id_ in spreadsheets.items()
+    ]
+
+
+def render_page(html, season, spreadsheets):
+    if BAKED_MARKER not in html:
+        raise ValueError(f"'{BAKED_MARKER}' not found in Scanner.html")
+    baked = json.dumps(
+        {"season": season, "classes": class_list(spreadsheets)}, ensure_ascii=False
+    )
+    page = html.replace(BAKED_MARKER, f"const BAKED_CLASS_LIST = {baked};", 1)
+    # after the doctype: a comment before it would put browsers in quirks mode
+    doctype, _, rest = page.partition("\n")
+    return f"{doctype}\n{GENERATED_NOTE}{rest}"
+
+
+def render_version(page):
+    """ScannerPage.js: the page's content stamp for the CacheService key"""
+    version = hashlib.sha256(page.encode("utf-8")).hexdigest()[:12]
+    return (
+        "// === Generated by scripts/scanner_page.py with ScannerPage.html ===\n"
+        "// Do not edit by hand: part of the scanner page's cache key in doGet().\n"
+        f'const SCANNER_PAGE_VERSION = "{version}";\n'
+    )
+
+
+def read_text(path):
+    return path.read_text(encoding="utf-8") if path.exists() else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bake the class list into the scanner")
+    parser.add_argument("--season", help="season id (default: the active one)")
+    parser.add_argument(
+        "--check", action="store_true", help="fail if ScannerPage.html is out of date"
+    )
+    args = parser.parse_args()
+
+    seasons = load_seasons()
+    season = args.season or active_season(seasons)
+    if season not in seasons:
+        print(f"❌ Error: unknown season '{season}' (seasons: {', '.join(seasons)})")
+        sys.exit(1)
+
+    try:
+        page = render_page(
+            SCANNER_HTML_PATH.read_text(encoding="utf-8"),
+            season,
+            seasons[season]["spreadsheets"],
+        )
+    except ValueError as error:
+        print(f"❌ Error: {error}")
+        sys.exit(1)
+
+    version = render_version(page)
+    relative = SCANNER_PAGE_PATH.relative_to(PROJECT_ROOT)
+    if args.check:
+        for path, expected in (
+            (SCANNER_PAGE_PATH, page),
+            (SCANNER_VERSION_PATH, version),
+        ):
+            if read_text(path) != expected:
+                print(
+                    f"🚨 {path.relative_to(PROJECT_ROOT)} is out of date: "
+                    "run python3 scripts/scanner_page.py"
+                )
+                sys.exit(1)
+        print(f"✅ {relative} is up to date ({season})")
+        return
+
+    SCANNER_PAGE_PATH.write_text(page, encoding="utf-8")
+    SCANNER_VERSION_PATH.write_text(version, encoding="utf-8")
+    print(
+        f"✅ Wrote {relative}: {len(seasons[season]['spreadsheets'])} classes "
+        f"of {season} baked in"
+    )
+
+
+if __name__ == "__main__":
+    main()
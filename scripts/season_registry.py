@@ -0,0 +1,184 @@
+"""
+Build the season registry the web app routes scans with (Seasons.js).
+
+config/seasons.json lists each school year's start date and class spreadsheets.
+This adds the class aliases for cards printed in an earlier season: students move
+up a class every year (most of chien1 is c2 now), so for every class code of the
+previous season it matches the rosters in data/csv_files/<season>/ by master
+map key (name + birthday) and records the classes at least MIN_ALIAS_SHARE of
+those students are in now. logScan() accepts an old card if the student's
+current class is one of them; the few students who moved elsewhere are listed
+on stderr (give them a TRANSFER_STUDENTS entry in Code.js or a new card).
+
+With --property it prints the registry as JSON instead (warnings go to stderr);
+paste it into the SEASON_REGISTRY script property to switch seasons without
+deploying.
+
+Usage:   python3 scripts/season_registry.py [--property]
+Example: python3 scripts/season_registry.py && clasp push
+"""
+
+import argparse
+import json
+import re
+import sys
+from collections import Counter, defaultdict
+
+from roster import (
+    PROJECT_ROOT,
+    SEASONS_JS_PATH,
+    SEASONS_PATH,
+    class_code_from_label,
+    load_seasons,
+    read_roster,
+)
+
+CSV_ROOT = PROJECT_ROOT / "data" / "csv_files"
+CLASS_CODE = re.compile(r"^[a-z0-9_]+$")
+# Share of an old class that must have moved into a class before its cards are
+# accepted there; a student or two is more likely a name collision (students
+# kept back a year are covered by the renamed class, thieu3 -> t3)
+MIN_ALIAS_SHARE = 0.1
+
+
+def season_rosters(season):
+    """Class code -> roster entries from data/csv_files/<season> and <season>_*"""
+    classes = defaultdict(list)
+    for directory in sorted(CSV_ROOT.glob(f"{season}*")):
+        if directory.name != season and not directory.name.startswith(f"{season}_"):
+            continue
+        for csv_path in sorted(directory.glob("*.csv")):
+            if directory.name == season and not CLASS_CODE.match(csv_path.stem):
+                print(
+                    f"⚠️  Skipping {csv_path.relative_to(PROJECT_ROOT)}: not a class code",
+                    file=sys.stderr,
+                )
+                continue
+            for entry in read_roster(csv_path):
+                if CLASS_CODE.match(entry.class_code):
+                    classes[entry.class_code].append(entry)
+    return classes
+
+
+def class_aliases(previous, current, current_codes, min_share=MIN_ALIAS_SHARE):
+    """
+    Old class code -> classes its students are in now, most common first.
+
+    Students are matched by master map key; a class is accepted once at least
+    min_share of the old class moved into it. A code that no longer exists also
+    accepts its renamed class (chien1 -> c1).
+    """
+    now_in = defaultdict(set)
+    for class_code, entries in current.items():
+        for entry in entries:
+            now_in[entry.master_key].add(class_code)
+
+    aliases = {}
+    for old_code, entries in sorted(previous.items()):
+        moves = Counter(
+            new_code
+            for entry in entries
+            for new_code in now_in.get(entry.master_key, ())
+            if new_code != old_code
+        )
+        accepted = []
+        for code, count in moves.most_common():
+            if count >= min_share * len(entries):
+                accepted.append(code)
+            else:
+                print(
+                    f"⚠️  {old_code} -> {code}: only {count} of {len(entries)} "
+                    "students, not an alias",
+                    file=sys.stderr,
+                )
+        renamed = class_code_from_label(old_code)
+        if (
+            old_code not in current_codes
+            and renamed in current_codes
+            and renamed not in accepted
+        ):
+            accepted.append(renamed)
+        if accepted:
+            aliases[old_code] = accepted
+    return aliases
+
+
+def build_registry(seasons):
+    """{"seasons": config seasons, "aliases": {season: class aliases}}"""
+    order = sorted(seasons, key=lambda season: seasons[season]["start"])
+    rosters = {season: season_rosters(season) for season in order}
+
+    for season in order:
+        ids = seasons[season]["spreadsheets"]
+        if not ids:
+            continue
+        for class_code in sorted(set(rosters[season]) - set(ids)):
+            print(
+                f"⚠️  {season}: class '{class_code}' has a roster but no spreadsheet",
+                file=sys.stderr,
+            )
+
+    aliases = {}
+    for previous, season in zip(order, order[1:], strict=False):
+        known = set(seasons[season]["spreadsheets"]) or set(rosters[season])
+        aliases[season] = class_aliases(rosters[previous], rosters[season], known)
+    return {
+        "seasons": {season: seasons[season] for season in order},
+        "aliases": aliases,
+    }
+
+
+def _js_object(table, indent="  "):
+    lines = [
+        f"{indent}{json.dumps(key)}: {json.dumps(value)},"
+        for key, value in table.items()
+    ]
+    return "{\n" + "\n".join(lines) + "\n}"
+
+
+def render_js(registry):
+    return (
+        "// === Generated by scripts/season_registry.py from config/seasons.json ===\n"
+        "// Do not edit by hand: change the config and re-run the script.\n"
+        "\n"
+        "// Season id -> first day (yyyy-mm-dd) and class code -> spreadsheet ID.\n"
+        "// activeSeason() picks the latest season that has started.\n"
+        f"const SEASONS = {_js_object(registry['seasons'])};\n"
+        "\n"
+        "// Season id -> {class code on last season's cards: classes those students\n"
+        "// are in this season}.\n"
+        f"const CLASS_ALIASES = {_js_object(registry['aliases'])};\n"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate Seasons.js from config/seasons.json"
+    )
+    parser.add_argument(
+        "--property",
+        action="store_true",
+        help="print JSON for the SEASON_REGISTRY script property instead",
+    )
+    args = parser.parse_args()
+
+    try:
+        seasons = load_seasons()
+    except (OSError, KeyError, json.JSONDecodeError) as error:
+        print(f"❌ Error: cannot read {SEASONS_PATH}: {error}")
+        sys.exit(1)
+
+    registry = build_registry(seasons)
+    if args.property:
+        print(json.dumps(registry, ensure_ascii=False, separators=(",", ":")))
+        return
+
+    SEASONS_JS_PATH.write_text(render_js(registry), encoding="utf-8")
+    print(f"✅ Wrote {SEASONS_JS_PATH.relative_to(PROJECT_ROOT)}")
+    for season, table in registry["aliases"].items():
+        for old_code, accepted in table.items():
+            print(f"   {season}: {old_code} → {', '.join(accepted)}")
+
+
+if __name__ == "__main__":
+    main()
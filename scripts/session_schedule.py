@@ -0,0 +1,218 @@
+"""
+Compile the attendance schedule in config/gas_config.json into a lookup table.
+
+The default table comes from "time_settings"; "class_schedules" adds per-class
+sessions (e.g. the du_truong evening session) from their first start time on.
+Each table is a sorted list of [start_second, status, column_offset] rows, so a
+scan time is resolved with one binary search. status None means "skip".
+"warmup" adds WARMUP_SCHEDULE: when to rebuild the master map before each session.
+
+Usage:   python3 scripts/session_schedule.py [--output Schedule.js] [--check]
+Example: python3 scripts/session_schedule.py --check
+"""
+
+import argparse
+import json
+import sys
+from bisect import bisect_right
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+GAS_CONFIG_PATH = PROJECT_ROOT / "config" / "gas_config.json"
+SCHEDULE_JS_PATH = PROJECT_ROOT / "src" / "google_apps_script" / "Schedule.js"
+
+DAY_SECONDS = 24 * 60 * 60
+SKIP = "skip"
+
+
+def to_seconds(hhmmss):
+    """ "09:10:00" -> 33000"""
+    hours, minutes, seconds = (int(part) for part in hhmmss.split(":"))
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def to_hhmmss(seconds):
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def load_config(config_path=GAS_CONFIG_PATH):
+    with open(config_path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def default_rows(time_settings, codes):
+    """Rows for the Sunday morning rules that logScan() used to hard-code"""
+    early = to_seconds(time_settings["early_cutoff"])
+    late = to_seconds(time_settings["late_cutoff"])
+    skip_start = to_seconds(time_settings["skip_window_start"])
+    skip_end = to_seconds(time_settings["skip_window_end"])
+    afternoon = to_seconds(time_settings["afternoon_cutoff"])
+
+    def rule(second):
+        if skip_start <= second < skip_end:
+            return None, None
+        # after the skip window scans go to the second (GL) column of the day
+        offset = 1 if second >= skip_end else 0
+        if second < early:
+            return codes["present"], offset
+        if second < late:
+            return codes["late"], offset
+        if second < afternoon:
+            return codes["present"], offset
+        return codes["absent"], offset
+
+    # the rules only change at a cutoff, so evaluating each segment start is exact
+    starts = sorted({0, early, late, skip_start, skip_end, afternoon})
+    return [[start, *rule(start)] for start in starts if start < DAY_SECONDS]
+
+
+def class_rows(base_rows, sessions, codes):
+    """Overlay a class's sessions on the default rows from its first start on"""
+    overlay = []
+    for session in sessions:
+        status = session["status"]
+        overlay.append(
+            [
+                to_seconds(session["start"]),
+                None if status == SKIP else codes[status],
+                None if status == SKIP else session.get("column_offset", 0),
+            ]
+        )
+    overlay.sort()
+    first = overlay[0][0]
+    return [row for row in base_rows if row[0] < first] + overlay
+
+
+def merge_rows(rows):
+    """Drop rows that don't change status or column"""
+    merged = []
+    for row in rows:
+        if not merged or merged[-1][1:] != row[1:]:
+            merged.append(row)
+    return merged
+
+
+def compile_schedules(config):
+    """Return {"default": rows, "<class code>": rows, ...}"""
+    codes = config["status_codes"]
+    base = merge_rows(default_rows(config["time_settings"], codes))
+
+    tables = {"default": base}
+    for class_code, sessions in config.get("class_schedules", {}).items():
+        tables[class_code] = merge_rows(class_rows(base, sessions, codes))
+    return tables
+
+
+def lookup(tables, class_code, second):
+    """Return (status, column_offset, start, end) for a second of the day"""
+    rows = tables.get(class_code, tables["default"])
+    index = bisect_right([row[0] for row in rows], second) - 1
+    end = rows[index + 1][0] if index + 1 < len(rows) else DAY_SECONDS
+    status, offset = rows[index][1], rows[index][2]
+    return status, offset, rows[index][0], end
+
+
+def session_starts(config):
+    """Seconds of day when a session starts: Mass, catechism and class sessions"""
+    time_settings = config["time_settings"]
+    starts = {
+        to_seconds(time_settings["early_cutoff"]),
+        to_seconds(time_settings["skip_window_end"]),
+    }
+    for sessions in config.get("class_schedules", {}).values():
+        starts.add(min(to_seconds(session["start"]) for session in sessions))
+    return sorted(starts)
+
+
+def warmup_times(config):
+    """Seconds of day to warm the caches: lead_minutes before each session start"""
+    lead = config.get("warmup", {}).get("lead_minutes", 60) * 60
+    return sorted({max(start - lead, 0) for start in session_starts(config)})
+
+
+def render_js(tables, warmup=None):
+    """Render the tables as Schedule.js for the Apps Script project"""
+    lines = [
+        "// === Generated by scripts/session_schedule.py from config/gas_config.json ===",
+        "// Do not edit by hand: change the config and re-run the script.",
+        "",
+        "// Per-class schedule: [startSecondOfDay, status, columnOffset], sorted by start.",
+        "// status null = skip window (no attendance recorded).",
+        "const SCHEDULE_TABLE = {",
+    ]
+    for class_code, rows in tables.items():
+        cells = ", ".join(json.dumps(row) for row in rows)
+        lines.append(f"  {json.dumps(class_code)}: [{cells}],")
+    lines.append("};")
+    if warmup:
+        weekday, seconds = warmup
+        times = ", ".join(
+            f"[{second // 3600}, {second // 60 % 60}]" for second in seconds
+        )
+        lines.append("")
+        lines.append(
+            "// Warm-up triggers (installWarmupTriggers): [hour, minute] on weekDay."
+        )
+        lines.append(
+            f'const WARMUP_SCHEDULE = {{ weekDay: "{weekday}", times: [{times}] }};'
+        )
+    lines.append("")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compile the schedule into Schedule.js"
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=SCHEDULE_JS_PATH,
+        help="JS file to write (default: src/google_apps_script/Schedule.js)",
+    )
+    parser.add_argument(
+        "--check", action="store_true", help="fail if the output file is out of date"
+    )
+    args = parser.parse_args()
+    output_path = args.output
+
+    try:
+        config = load_config()
+        tables = compile_schedules(config)
+        warmup = (
+            config.get("warmup", {}).get("weekday", "SUNDAY"),
+            warmup_times(config),
+        )
+    except (KeyError, ValueError) as e:
+        print(f"❌ Error: invalid schedule in {GAS_CONFIG_PATH.name}: {e}")
+        sys.exit(1)
+
+    for class_code, rows in tables.items():
+        print(f"🕐 {class_code}:")
+        for start, status, offset in rows:
+            label = "skip" if status is None else f"{status} (column +{offset})"
+            print(f"   from {to_hhmmss(start)}: {label}")
+
+    print(
+        f"🔥 warm-up ({warmup[0]}): " + ", ".join(to_hhmmss(t)[:5] for t in warmup[1])
+    )
+
+    js = render_js(tables, warmup)
+    if args.check:
+        current = (
+            output_path.read_text(encoding="utf-8") if output_path.exists() else None
+        )
+        if current != js:
+            print(
+                f"\n🚨 {output_path} is out of date: run python3 scripts/session_schedule.py"
+            )
+            sys.exit(1)
+        print(f"\n✅ {output_path} is up to date")
+        return
+
+    output_path.write_text(js, encoding="utf-8")
+    print(f"\n🎉 Wrote {output_path}")
+
+
+if __name__ == "__main__":
+    main()
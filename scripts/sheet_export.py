@@ -0,0 +1,159 @@
+"""
+Read CSV exports of a class's "Điểm danh" sheet.
+
+Layout (see data/templates/(C1) Danh sách (2025-2026) - Điểm danh.csv):
+  row 7   month labels ("Tháng 9", ...) above the session columns
+  row 8   STT / TÊN THÁNH / HỌ / TÊN, then one date per Sunday from column F
+  row 9   "TL" / "GL" under each date: two columns per Sunday (Mass, catechism)
+  row 10+ one student per row
+Dates are either full (7/9/2025) or day numbers under a month label, in which
+case the year comes from the "Năm học 2025-2026" title.
+"""
+
+import csv
+import json
+import re
+from datetime import date
+from pathlib import Path
+from typing import NamedTuple
+
+from roster import PROJECT_ROOT, header_layout, normalize, roster_entry
+
+GAS_CONFIG_PATH = PROJECT_ROOT / "config" / "gas_config.json"
+
+MONTH_LABEL = re.compile(r"thang(\d{1,2})$")
+SCHOOL_YEAR = re.compile(r"(\d{4})\s*-\s*(\d{4})")
+FULL_DATE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})$")
+# School year starts in September: months from August on belong to the first year
+FIRST_MONTH_OF_YEAR = 8
+
+
+class ExportHeader(NamedTuple):
+    """Session layout of one export"""
+
+    path: str
+    class_code: str
+    sessions: list  # datetime.date (or None if unreadable), one per Sunday
+    session_columns: list  # 0-based column of each session's TL cell; GL is +1
+
+
+def load_status_codes(config_path=GAS_CONFIG_PATH):
+    """Read "status_codes" from gas_config.json: {"present": "X", "late": "T", ...}"""
+    with open(config_path, encoding="utf-8") as file:
+        codes = json.load(file)["status_codes"]
+    codes.setdefault("excused", "P")
+    return {kind: letter.upper() for kind, letter in codes.items()}
+
+
+def class_code_from_export(path):
+    """ "(C1) Danh sách (2025-2026) - Điểm danh.csv" -> "c1", "t2.csv" -> "t2" """
+    stem = Path(path).stem
+    match = re.match(r"\s*\((\w+)\)", stem)
+    return match.group(1).lower() if match else stem
+
+
+def _school_years(rows):
+    for row in rows:
+        for cell in row:
+            match = SCHOOL_YEAR.search(cell)
+            if match:
+                return int(match.group(1)), int(match.group(2))
+    return None
+
+
+def _session_date(label, month, years):
+    label = label.strip()
+    match = FULL_DATE.match(label)
+    if match:
+        day, month, year = (int(part) for part in match.groups())
+    elif label.isdigit() and month and years:
+        day, year = int(label), years[0] if month >= FIRST_MONTH_OF_YEAR else years[1]
+    else:
+        return None
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def parse_header(top_rows, layout, path, class_code):
+    """Work out session dates/columns from the rows up to and including TL/GL"""
+    header = top_rows[layout.header]
+    months = top_rows[layout.header - 1] if layout.header > 0 else []
+    markers = top_rows[layout.header + 1]
+    years = _school_years(top_rows[: layout.header])
+
+    sessions = []
+    columns = []
+    month = None
+    for col, marker in enumerate(markers):
+        label = normalize(months[col]) if col < len(months) else ""
+        found = MONTH_LABEL.match(label)
+        if found:
+            month = int(found.group(1))
+
+        next_marker = markers[col + 1] if col + 1 < len(markers) else ""
+        if marker.strip().upper() == "TL" and next_marker.strip().upper() == "GL":
+            cell = header[col] if col < len(header) else ""
+            sessions.append(_session_date(cell, month, years))
+            columns.append(col)
+
+    return ExportHeader(str(path), class_code, sessions, columns)
+
+
+def _read_top(reader):
+    """Consume rows up to the TL/GL marker row; returns (top rows, layout)"""
+    top_rows = []
+    for row in reader:
+        top_rows.append(row)
+        layout = header_layout(len(top_rows) - 1, row)
+        if layout:
+            top_rows.append(next(reader, []))
+            return top_rows, layout
+    return top_rows, None
+
+
+def stream_export(path, class_code=None):
+    """
+    Yield (header, entry, marks) for each student, reading the file once.
+
+    entry.line is the student's sheet row; marks is a list of (TL, GL) values
+    per session. Only the header rows are ever held in memory.
+    """
+    class_code = class_code or class_code_from_export(path)
+
+    with open(path, encoding="utf-8") as file:
+        reader = csv.reader(file)
+        top_rows, layout = _read_top(reader)
+        if layout is None:
+            return
+
+        header = parse_header(top_rows, layout, path, class_code)
+        for line, row in enumerate(reader, start=len(top_rows) + 1):
+            entry = roster_entry(row, line, path, layout, class_code)
+            if entry is None:
+                continue
+            marks = [
+                (
+                    row[col].strip() if col < len(row) else "",
+                    row[col + 1].strip() if col + 1 < len(row) else "",
+                )
+                for col in header.session_columns
+            ]
+            yield header, entry, marks
+
+
+def read_header(path, class_code=None):
+    """Parse only the session header of an export"""
+    class_code = class_code or class_code_from_export(path)
+    with open(path, encoding="utf-8") as file:
+        top_rows, layout = _read_top(csv.reader(file))
+    if layout is None:
+        return None
+    return parse_header(top_rows, layout, path, class_code)
+
+
+def read_export(path, class_code=None):
+    """Return (header, [(entry, marks), ...]) for a whole export"""
+    students = [(entry, marks) for _, entry, marks in stream_export(path, class_code)]
+    return read_header(path, class_code), students
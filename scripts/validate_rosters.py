@@ -0,0 +1,233 @@
+"""
+Pre-flight check for roster CSVs before printing cards or deploying Code.js.
+
+Each season directory (e.g. data/csv_files/2025_26) becomes one master map, so
+checks run per directory (class codes are checked against that season's
+spreadsheets in config/seasons.json):
+  - key collisions: two students normalize to the same buildMasterMap() key
+  - note dates: card scripts accept d/m/yyyy, logScan() only reads dd/mm/yyyy
+  - round trip: the QR payload parsed by logScan() must give back the same key
+    and class code
+
+Usage:   python3 scripts/validate_rosters.py [csv file or directory ...]
+Example: python3 scripts/validate_rosters.py data/csv_files/2025_26
+"""
+
+import re
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from roster import (
+    CARD_NOTE_DATE,
+    LOGSCAN_BIRTHDAY,
+    active_season,
+    canonical_date,
+    load_seasons,
+    parse_payload,
+    read_roster,
+)
+
+DEFAULT_ROOT = "data/csv_files"
+
+# Notes that look like someone tried to type a date (06-08-2019, 6/8/19, 6.8.2019)
+DATE_LIKE_NOTE = re.compile(r"\d{1,4}\s*[-/.]\s*\d{1,2}\s*[-/.]\s*\d{2,4}")
+
+# Issue kinds; an unknown class is reported once per file, not once per student
+NOTE, COLLISION, ROUND_TRIP, UNKNOWN_CLASS = "note", "collision", "round trip", "class"
+
+
+def collect_csv_files(paths):
+    """Expand arguments into {season directory: [csv files]}"""
+    groups = defaultdict(list)
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            for csv_path in sorted(path.rglob("*.csv")):
+                groups[csv_path.parent].append(csv_path)
+        elif path.suffix == ".csv" and path.exists():
+            groups[path.parent].append(path)
+        else:
+            print(f"⚠️  Skipping {raw}: not a CSV file or directory")
+    return groups
+
+
+def season_classes(seasons, directory):
+    """(season, class codes with a spreadsheet) for the season of a directory"""
+    if not seasons:
+        return None, set()
+    season = next(
+        (
+            season
+            for season in seasons
+            if directory == season or directory.startswith(f"{season}_")
+        ),
+        active_season(seasons),
+    )
+    return season, set(seasons[season]["spreadsheets"])
+
+
+def where(entry):
+    return f"{entry.path}:{entry.line}"
+
+
+def check_note(entry):
+    """Return (level, message) for a note the scripts will read differently"""
+    note = entry.note
+    if not note:
+        return None
+
+    if CARD_NOTE_DATE.match(note):
+        if not LOGSCAN_BIRTHDAY.fullmatch(note):
+            return (
+                "error",
+                f"note '{note}' goes on the card but logScan expects dd/mm/yyyy "
+                f"(use '{canonical_date(note) or '?'}')",
+            )
+        if not _is_calendar_date(note):
+            return ("error", f"note '{note}' is not a real date")
+        return None
+
+    if DATE_LIKE_NOTE.search(note):
+        return ("warning", f"note '{note}' looks like a date but is left off the card")
+    return None
+
+
+def _is_calendar_date(note):
+    try:
+        datetime.strptime(note, "%d/%m/%Y")
+    except ValueError:
+        return False
+    return True
+
+
+def check_round_trip(entry, known_classes, season=None):
+    """Return a list of (level, kind, message) for a payload that won't route back"""
+    issues = []
+    parsed = parse_payload(entry.payload)
+
+    if not entry.master_key:
+        issues.append(("error", ROUND_TRIP, "name normalizes to an empty key"))
+    elif parsed.normalized != entry.master_key:
+        issues.append(
+            (
+                "error",
+                ROUND_TRIP,
+                f"payload '{entry.payload}' scans as '{parsed.normalized}' "
+                f"but the master map key is '{entry.master_key}'",
+            )
+        )
+
+    if parsed.class_name != entry.class_code:
+        issues.append(
+            (
+                "error",
+                ROUND_TRIP,
+                f"payload '{entry.payload}' scans as class '{parsed.class_name}' "
+                f"instead of '{entry.class_code}'",
+            )
+        )
+    elif known_classes and entry.class_code not in known_classes:
+        issues.append(
+            (
+                "warning",
+                UNKNOWN_CLASS,
+                f"class '{entry.class_code}' is not in season {season}",
+            )
+        )
+
+    return issues
+
+
+def validate_group(csv_files, known_classes, season=None):
+    """
+    Validate one season directory; returns (entry count, issues), each issue
+    (level, kind, location, message)
+    """
+    issues = []
+    seen = {}
+    count = 0
+
+    for csv_path in csv_files:
+        for entry in read_roster(csv_path):
+            count += 1
+
+            note_issue = check_note(entry)
+            if note_issue:
+                issues.append((note_issue[0], NOTE, where(entry), note_issue[1]))
+
+            for level, kind, message in check_round_trip(entry, known_classes, season):
+                issues.append((level, kind, where(entry), message))
+
+            key = entry.master_key
+            if not key:
+                continue
+            if key in seen:
+                first = seen[key]
+                issues.append(
+                    (
+                        "error",
+                        COLLISION,
+                        where(entry),
+                        f"'{entry.name}' collides with '{first.name}' "
+                        f"({where(first)}) on key '{key}' - add a dd/mm/yyyy "
+                        f"birthday to the note column of one of them",
+                    )
+                )
+            else:
+                seen[key] = entry
+
+    return count, issues
+
+
+def main():
+    started = time.perf_counter()
+    paths = sys.argv[1:] or [DEFAULT_ROOT]
+    groups = collect_csv_files(paths)
+    if not groups:
+        print("❌ Error: no CSV files found")
+        sys.exit(1)
+
+    try:
+        seasons = load_seasons()
+    except (OSError, KeyError, ValueError):
+        seasons = {}
+
+    total_students = 0
+    errors = 0
+    warnings = 0
+
+    for directory, csv_files in sorted(groups.items()):
+        season, known_classes = season_classes(seasons, directory.name)
+        count, issues = validate_group(csv_files, known_classes, season)
+        total_students += count
+        print(f"📁 {directory}: {len(csv_files)} files, {count} students")
+
+        reported = set()
+        for level, kind, location, message in issues:
+            if kind == UNKNOWN_CLASS:
+                file_key = (location.rsplit(":", 1)[0], message)
+                if file_key in reported:
+                    continue
+                reported.add(file_key)
+                location = file_key[0]
+
+            if level == "error":
+                errors += 1
+                print(f"   ❌ {location}: {message}")
+            else:
+                warnings += 1
+                print(f"   ⚠️  {location}: {message}")
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(
+        f"\n🔎 Checked {total_students} students in {elapsed_ms:.0f} ms: "
+        f"{errors} errors, {warnings} warnings"
+    )
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
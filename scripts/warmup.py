@@ -0,0 +1,78 @@
+"""
+Warm the local scan engine before each session (stand-in for warmUp() in Code.js).
+
+Builds the master map from the class exports, resolves today's column for every
+class and saves it all to output/scan_cache.pickle, which scan_log.py record
+reuses instead of re-reading every export. --crontab prints the cron lines that
+run this at the same times as the web app's warm-up triggers.
+
+Usage:   python3 scripts/warmup.py <exports dir> [--crontab]
+Example: python3 scripts/warmup.py exports --crontab >> my-crontab
+"""
+
+import argparse
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+from scan_engine import ENGINE_CACHE_PATH, load_engine, save_engine, session_index
+from scan_log import export_files
+from session_schedule import PROJECT_ROOT, load_config, warmup_times
+
+# crontab day-of-week numbers
+CRON_WEEKDAYS = {
+    "SUNDAY": 0,
+    "MONDAY": 1,
+    "TUESDAY": 2,
+    "WEDNESDAY": 3,
+    "THURSDAY": 4,
+    "FRIDAY": 5,
+    "SATURDAY": 6,
+}
+
+
+def crontab_lines(config, exports):
+    weekday = config.get("warmup", {}).get("weekday", "SUNDAY")
+    command = (
+        f"cd {PROJECT_ROOT} && python3 scripts/warmup.py {Path(exports).resolve()}"
+    )
+    return [
+        f"{second // 60 % 60} {second // 3600} * * {CRON_WEEKDAYS[weekday]} {command}"
+        for second in warmup_times(config)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm the local scan engine cache")
+    parser.add_argument("exports", help="Điểm danh export or folder of exports")
+    parser.add_argument(
+        "--crontab", action="store_true", help="print cron lines instead of warming"
+    )
+    args = parser.parse_args()
+
+    if args.crontab:
+        print("\n".join(crontab_lines(load_config(), args.exports)))
+        return
+
+    exports = export_files(args.exports)
+    if not exports:
+        print(f"❌ Error: no exports found in {args.exports}")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    engine = load_engine(exports)
+    today = date.today()
+    for class_code in engine.headers:
+        session_index(engine, class_code, today)
+    save_engine(engine)
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(
+        f"🔥 Warmed {len(engine.master_map)} students in {len(engine.headers)} classes "
+        f"({elapsed_ms:.0f} ms) → {ENGINE_CACHE_PATH}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,31 +2,83 @@
 
 // Global in-memory cache for master map
 let _masterMap = null;  // Map: normalizedName → {spreadsheetId, row}
+let _dateColumns = {};  // "spreadsheetId:yyyy-mm-dd" → TL column, see getDateColumn
 
-// Spreadsheet ID mapping for each class
-const SPREADSHEET_MAP = {
-  // chien con
-  'c1': '1DdJbRdQ2gcf90_Ac1U7K9k2MlyNQZWF7fz1YLp9EzaM',
-  'c2': '1bSayPQafLXuOgM_gPdGP6LWQ7n-qwmB94cpujBnMqGE',
-  // au nhi
-  'a1': '1atwfmZsL2qco5akH4I84mFDnZyjzR8Q4mFVBrxWxbi4',
-  'a2': '1ydlXhW44ILghLTCtF_8jOD9e8J58kCJgULvMveQe6gw',
-  'a3': '1Y8XRPwqMSHlbEBDHEXLQYCEc5kCoV_dtuQIV-uo_lpw',
-  // thieu nhi
-  't1': '1FDtxlNLrSY30U7zAku2nYOFpHb-Fv8yWVucnXnNGCDQ',
-  't2': '1nJnfVL0umIN-AKEWFKy9UCp_mRei-PON8GSSDpM4wyc',
-  't3': '1prFTfu7Bu7Pb5siP0kHIyt6sMXGL2ITcu0OICAlu488',
-  // nghia si
-  'n1': '1OXVC22Lcg8_oBHXXhoJygVaogWcjXHSb28ZxRWjMgfQ',
-  'n2': '1g27jM5FgkWTzBBiIYtmsPoPkjvZ5zfNiPeFyTL97gAM',
-  'n3': '1L47gsgzYrbFU5_3QoqAAf6s8U1IHUUiwoPGlTs_d1s8',
-  // hiep si
-  'h1': '1Ba2z42eA3ptr6y3d6032mWWceZi4O4DzAld_2vIywvE',
-  'h2': '1wAhH1FpNCY7oFtqurRKhL1gIKvmmSBwUP1tVfXBvkfw',
-  // du bi bi tich
-  'boi_duong_bi_tich': '1DD7kvnhCcpk7i-bBVhfsh5IryrdHeRyb6n9zRDyX4T4',
-  // du truong
-  'du_truong': '1EcPKj3OEI-Iq_El7qyzWdLyRaiZXlcqWRWUIy6YvF3s'
+// Queued scans replayed by Scanner.html keep their original scan time.
+// Older replays are rejected; small phone clock drift is tolerated.
+const MAX_REPLAY_AGE_MS = 7 * 24 * 60 * 60 * 1000;
+const MAX_CLOCK_SKEW_MS = 5 * 60 * 1000;
+
+// Write-behind: logScan() only buffers the cell write and answers the phone;
+// flushPendingWrites() (time-driven trigger, see installFlushTrigger) applies
+// the buffer in bulk. Off by default; even when set to true, scans are only
+// buffered while the flush trigger exists and the day's column is cached, so
+// nothing is acknowledged that no flush would ever write.
+const WRITE_BEHIND = false;
+const PENDING_WRITES_KEY = 'pendingWrites';
+const PENDING_WRITES_TTL_S = 6 * 60 * 60;
+const PENDING_WRITES_MAX_CHARS = 90 * 1024; // CacheService values are capped at 100KB
+const FLUSH_TRIGGER_KEY = 'flushTrigger';
+const FLUSH_TRIGGER_CHECK_S = 10 * 60;
+const FLUSH_LEASE_TTL_S = 6 * 60; // an execution is killed after 6 minutes
+// Writes a flush cannot apply (sheet gone) are kept in script properties under
+// deadLetter:* keys until replayDeadLetters() puts them back in the buffer.
+const DEAD_LETTER_PREFIX = 'deadLetter:';
+const DEAD_LETTER_MAX_CHARS = 8 * 1024; // property values are capped at 9KB
+
+// Leases: named locks kept in CacheService (LockService only has one script-wide
+// lock), so writes to different spreadsheets don't wait on each other.
+const SHEET_LEASE_TTL_S = 30;
+const SHEET_LEASE_WAIT_MS = 10000;
+const REBUILD_LEASE_TTL_S = 120;
+const REBUILD_WAIT_MS = 30000;
+
+// The cached master map expires after 6h (CacheService maximum). After 5h the
+// first scan that notices rebuilds it while all other scans keep the old copy.
+const MASTER_MAP_TTL_S = 6 * 60 * 60;
+const MASTER_MAP_SOFT_TTL_MS = 5 * 60 * 60 * 1000;
+
+// Column of the session day per spreadsheet; filled by buildMasterMap() (and so
+// by the warmUp() triggers before each session), read by logScan and the flush.
+const DATE_COLUMN_TTL_S = 6 * 60 * 60;
+
+// buildMasterMap() only needs the roster columns (A: note, B: STT, C–E: name)
+// and the date row. BATCH_FETCH reads them for all classes at once through the
+// Sheets REST API (UrlFetchApp; its scopes are listed in appsscript.json); set it
+// to false to read each spreadsheet with SpreadsheetApp.
+const BATCH_FETCH = true;
+const ROSTER_COLUMNS = 5;
+const ROSTER_RANGE = "'Điểm danh'!A:E";
+const NOTE_RANGE = "'Điểm danh'!A:A";
+const DATE_ROW_RANGE = "'Điểm danh'!8:8";
+
+// doGet() serves ScannerPage.html: Scanner.html with the class list baked in by
+// scripts/scanner_page.py, so the page needs no getClassList() call. The page is
+// kept in CacheService under the season and SCANNER_PAGE_VERSION (ScannerPage.js,
+// a hash of the page), so a push with a new page is served at once; Scanner.html
+// is served if the baked list is stale.
+const SCANNER_PAGE_CACHE_KEY = 'scannerPage';
+const SCANNER_PAGE_TTL_S = 6 * 60 * 60;
+
+// Spreadsheets per school year live in Seasons.js (scripts/season_registry.py);
+// getSpreadsheetMap() returns the active season's class code → spreadsheet ID.
+let _season = null;
+
+// Special students: transfer or name change, keyed by the normalized name on
+// the old card. [oldClass, newClass] moves the scan to another class;
+// [oldClass, newNormalizedName] routes it to the renamed row.
+const TRANSFER_STUDENTS = {
+  // change class
+  "giusenguyengiabao": ["t1", "t2"],
+  "annabuingoctu": ["t1", "t2"],
+  "nguyenminhananthony": ["a2", "a3"],
+  // old name to new name
+  "phanxicoxduongquanghuy": ["c1", "phanxicoxduongquanguy"],
+  "nguyenvothienan": ["a1", "annanguyenvothienan"],
+  "mainhuy": ["a1", "mariamainhuy"],
+  "antonnguyenminhan": ["a2", "antonnguyenminhananthony"],
+  "teresatranphuongnghi": ["a3", "mariatranphuongnghi"],
+  "marianguyentukhue": ["c1", "mariagiusenguyentukhue"],
 };
 
 /**
@@ -35,7 +87,7 @@ const SPREADSHEET_MAP = {
  * - Format: [{code, url}]
  */
 function getClassList() {
-  return Object.entries(SPREADSHEET_MAP).map(([code, id]) => ({
+  return Object.entries(getSpreadsheetMap()).map(([code, id]) => ({
     code: code,
     url: `https://docs.google.com/spreadsheets/d/${id}/edit`
   }));
@@ -43,26 +95,83 @@ function getClassList() {
 
 /**
  * doGet(e)
- * - Serves Scanner.html UI if no 'name' param.
+ * - Serves the scanner page (scannerPageHtml) if no 'name' or 'batch' param.
+ * - ?batch=[{id, data, scannedAt}] records several scans and answers with the
+ *   logScanBatch JSON (sent by scripts/scan_aggregator.py on the church LAN).
  * - Always uses batch async mode for optimal performance
  */
 function doGet(e) {
+  if (e?.parameter?.batch) {
+    let scans;
+    try {
+      scans = JSON.parse(e.parameter.batch);
+    } catch (err) {
+      return ContentService
+        .createTextOutput("Error: batch is not valid JSON");
+    }
+    return ContentService
+      .createTextOutput(JSON.stringify(logScanBatch(scans)))
+      .setMimeType(ContentService.MimeType.JSON);
+  }
+
   if (!e?.parameter?.name) {
     return HtmlService
-      .createHtmlOutputFromFile("Scanner")
+      .createHtmlOutput(scannerPageHtml())
       .setTitle("QR Code Scanner");
   }
 
   try {
     // Direct synchronous processing - no more async triggers
     return ContentService
-      .createTextOutput(logScan(e.parameter.name));
+      .createTextOutput(logScan(e.parameter.name, e.parameter.t));
   } catch (err) {
     return ContentService
       .createTextOutput("Error: " + err.message);
   }
 }
 
+/**
+ * scannerPageHtml()
+ * - Returns the scanner page from CacheService, or builds and caches it.
+ */
+function scannerPageHtml() {
+  const cache = CacheService.getScriptCache();
+  const key = scannerPageCacheKey();
+  let html = cache.get(key);
+  if (!html) {
+    html = bakedScannerPage() || HtmlService.createHtmlOutputFromFile("Scanner").getContent();
+    try {
+      cache.put(key, html, SCANNER_PAGE_TTL_S);
+    } catch (err) {
+      console.log(`Scanner page not cached: ${err.message}`);
+    }
+  }
+  return html;
+}
+
+function scannerPageCacheKey() {
+  return `${SCANNER_PAGE_CACHE_KEY}:${activeSeason().id}:${SCANNER_PAGE_VERSION}`;
+}
+
+/**
+ * bakedScannerPage()
+ * - Returns ScannerPage.html if its baked class list is getClassList(), else null.
+ */
+function bakedScannerPage() {
+  let html;
+  try {
+    html = HtmlService.createHtmlOutputFromFile("ScannerPage").getContent();
+  } catch (err) {
+    return null; // not built or not pushed
+  }
+  const baked = html.match(/const BAKED_CLASS_LIST = (.*);/);
+  if (!baked || JSON.stringify(JSON.parse(baked[1]).classes) !== JSON.stringify(getClassList())) {
+    console.log("ScannerPage.html is not built for the active season; serving Scanner.html");
+    return null;
+  }
+  return html;
+}
+
 /**
  * getSpreadsheetUrl()
  * - Returns the URL of the current spreadsheet for the View button.
@@ -72,15 +181,99 @@ function getSpreadsheetUrl() {
 }
 
 /**
- * logScan(data)
+ * logScanBatch(scans)
+ * - Records several queued scans from Scanner.html in one round trip.
+ * - Format: [{id, data, scannedAt}] → [{id, result, retry}]
+ * - retry is true when the scan hit a service error and should be re-sent.
+ */
+function logScanBatch(scans) {
+  return (scans || []).map(scan => {
+    try {
+      return { id: scan.id, result: logScan(scan.data, scan.scannedAt), retry: false };
+    } catch (err) {
+      console.log(`Batch scan failed: ${scan.data}: ${err.message}`);
+      return { id: scan.id, result: "Error: " + err.message, retry: true };
+    }
+  });
+}
+
+/**
+ * resolveScanTime(scannedAt)
+ * - Returns the Date a scan happened (ms timestamp from the phone), or now.
+ * - Returns null if the scan is too old to be replayed.
+ */
+function resolveScanTime(scannedAt) {
+  const serverNow = new Date();
+  const scanTime = new Date(Number(scannedAt));
+  if (!scannedAt || isNaN(scanTime.getTime())) return serverNow;
+
+  // Phone clock ahead of the server: trust the server
+  if (scanTime.getTime() > serverNow.getTime() + MAX_CLOCK_SKEW_MS) return serverNow;
+  if (serverNow.getTime() - scanTime.getTime() > MAX_REPLAY_AGE_MS) return null;
+  return scanTime;
+}
+
+/**
+ * logScan(data, scannedAt)
  * - Main function to record attendance quickly.
  * - New format: "Name ClassName" e.g. "Giuse Trần Hoàng Nguyên Khôi c1"
  * - Uses master map to route to correct spreadsheet
+ * - scannedAt (optional, ms since epoch) is when the phone read the card;
+ *   status and column are computed from it, not from the upload time.
+ * - Emits one {"evt":"scan"} timing line per call (see newScanTimer).
+ */
+function logScan(data, scannedAt) {
+  const timer = newScanTimer("scan");
+  let result;
+  try {
+    result = recordScan(data, scannedAt, timer);
+    return result;
+  } catch (err) {
+    result = `Exception: ${err.message}`;
+    throw err;
+  } finally {
+    const outcome = result.split(":")[0].toLowerCase();
+    // Errors and skips keep their message; successes stay one short line
+    timer.emit(outcome === "success" ? { outcome: outcome } : { outcome: outcome, result: result });
+  }
+}
+
+/**
+ * newScanTimer(evt)
+ * - Collects per-phase durations; emit() logs them as one compact JSON line:
+ *   {"evt":"scan","ms":{"total":812,"masterMap":3,"openById":540,...},...}
+ * - scripts/latency_report.py turns exported logs into per-phase histograms.
+ */
+function newScanTimer(evt) {
+  const started = Date.now();
+  const spans = {};
+  const fields = {};
+  return {
+    time(phase, fn) {
+      const t = Date.now();
+      try {
+        return fn();
+      } finally {
+        spans[phase] = (spans[phase] || 0) + Date.now() - t;
+      }
+    },
+    tag(key, value) {
+      fields[key] = value;
+    },
+    emit(extra) {
+      const ms = Object.assign({ total: Date.now() - started }, spans);
+      console.log(JSON.stringify(Object.assign({ evt: evt, ms: ms }, fields, extra)));
+    }
+  };
+}
+
+/**
+ * recordScan(data, scannedAt, timer)
+ * - Body of logScan(); phases are timed through timer.
  */
-function logScan(data) {
+function recordScan(data, scannedAt, timer) {
   // data = "Giuse Trần Hoàng Nguyên Khôi c1" or
   // data = "Giuse Trần Hoàng Nguyên Khôi c1 06/08/2019"
-  console.log(`logScan start: ${data}`);
 
   // case1: parts = ["Giuse", "Trần", "Hoàng", "Nguyên", "Khôi", "c1"] 
   // case2: parts = ["Giuse", "Trần", "Hoàng", "Nguyên", "Khôi", "c1", "06/08/2019"]
@@ -99,133 +292,220 @@ function logScan(data) {
   const nameOnly = parts.join(" "); // "Giuse Trần Hoàng Nguyên Khôi"
   let normalized = normalize(nameOnly + birthday); // "giusetranhoangnguyenkhoi"
 
-  // handle special students: transfer, name change
-  // either you update name or class
-  transfer_students = {
-    // change class
-    "giusenguyengiabao": ["t1", "t2"],
-    "annabuingoctu": ["t1", "t2"],
-    "nguyenminhananthony": ["a2", "a3"],
-    // old name to new name
-    "phanxicoxduongquanghuy": ["c1", "phanxicoxduongquanguy"],
-    "nguyenvothienan": ["a1", "annanguyenvothienan"],
-    "mainhuy": ["a1", "mariamainhuy"],
-    "antonnguyenminhan": ["a2", "antonnguyenminhananthony"],
-    "teresatranphuongnghi": ["a3", "mariatranphuongnghi"],
-    "nguyenvothienan": ["a1", "annanguyenvothienan"],
-    "mainhuy": ["a1", "mariamainhuy"],
-    "teresatranphuongnghi": ["a3", "mariatranphuongnghi"],
-    "marianguyentukhue": ["c1", "mariagiusenguyentukhue"],
-  };
-
   // check if student is in transfer list and their student card shows the old class
-  if (normalized in transfer_students && transfer_students[normalized][0] == className) {
+  if (normalized in TRANSFER_STUDENTS && TRANSFER_STUDENTS[normalized][0] == className) {
     // if length == 2, it's a class transfer
-    if (transfer_students[normalized][1].length == 2) { 
-      className = transfer_students[normalized][1];
-      console.log(`Transfer detected: ${nameOnly} from ${transfer_students[normalized][0]} to ${className}`);
+    if (TRANSFER_STUDENTS[normalized][1].length == 2) { 
+      className = TRANSFER_STUDENTS[normalized][1];
+      console.log(`Transfer detected: ${nameOnly} from ${TRANSFER_STUDENTS[normalized][0]} to ${className}`);
     // else it's a name change
     } else {
-      normalized = transfer_students[normalized][1];
+      normalized = TRANSFER_STUDENTS[normalized][1];
       console.log(`Name change detected: ${nameOnly} to updated name ${normalized}`);
     }
   }
 
-  console.log(`Parsed: name="${nameOnly}", class="${className}", normalized="${normalized}"`);
+  timer.tag("class", className);
 
   // Use master map for multi-spreadsheet lookup
-  const masterMap = getMasterMap();
+  const masterMap = timer.time("masterMap", getMasterMap);
   if (!(normalized in masterMap)) {
-    console.log(`Return error: Name not in masterMap: ${normalized}`);
     return `Error: "${nameOnly}" not found in master map.`;
   }
 
   const { spreadsheetId, row } = masterMap[normalized];
 
-  // Validate that the requested class matches the spreadsheet
-  if (!SPREADSHEET_MAP[className] || SPREADSHEET_MAP[className] !== spreadsheetId) {
-    console.log(`Return error: Class mismatch. "${nameOnly}" not found in class ${className}`);
-    return `Error: "${nameOnly}" not found in class ${className}.`;
+  const now = resolveScanTime(scannedAt);
+  if (!now) {
+    return `Error: Scan of "${nameOnly}" is too old to record.`;
   }
 
-  // Open the target spreadsheet and get "Điểm danh" sheet
-  const targetSpreadsheet = SpreadsheetApp.openById(spreadsheetId);
-  const sheet = targetSpreadsheet.getSheetByName('Điểm danh');
-
-  if (!sheet) {
-    console.log(`Return error: "Điểm danh" sheet missing in ${className} spreadsheet`);
-    return `Error: "Điểm danh" sheet not found in ${className} spreadsheet.`;
+  // Validate that the requested class matches the spreadsheet. Cards from last
+  // season carry the old class code: accept it if the student is now in one of
+  // the classes that code moved to, and carry on with the current class.
+  const spreadsheetMap = getSpreadsheetMap();
+  if (spreadsheetMap[className] !== spreadsheetId) {
+    const current = (activeSeason().aliases[className] || [])
+      .find(code => spreadsheetMap[code] === spreadsheetId);
+    if (!current) {
+      return `Error: "${nameOnly}" not found in class ${className}.`;
+    }
+    timer.tag("alias", className);
+    className = current;
+    timer.tag("class", className);
   }
 
-  const now = new Date();
   const hh = String(now.getHours()).padStart(2, "0");
   const mm = String(now.getMinutes()).padStart(2, "0");
   const ss = String(now.getSeconds()).padStart(2, "0");
-  let currentTime = `${hh}:${mm}:${ss}`;
 
-  // Find today's column directly
-  const baseCol = findTodayColumn(sheet);
+  // Status and column come from the compiled schedule (Schedule.js)
+  const slot = lookupSchedule(className, now.getHours() * 3600 + now.getMinutes() * 60 + now.getSeconds());
+  if (slot.status === null) {
+    return `Skipped: No attendance marked between ${formatSecondOfDay(slot.start)} and ${formatSecondOfDay(slot.end)} for ${nameOnly}`;
+  }
+
+  const successMsg = `Success: ${nameOnly} (${className}) checked in at ${hh}:${mm}:${ss}.`;
+
+  // Write-behind: only with a cached column for the scan's day (it was read
+  // from the sheet, so the sheet and the column exist); otherwise the direct
+  // path reads it, caches it and reports a missing sheet or column
+  const cachedCol = WRITE_BEHIND ? cachedDateColumn(spreadsheetId, now) : null;
+  if (cachedCol) {
+    const buffered = timer.time("buffer", () => bufferPendingWrite({
+      id: spreadsheetId, row: row, col: cachedCol + slot.offset, status: slot.status, t: now.getTime()
+    }));
+    if (buffered) {
+      timer.tag("path", "buffered");
+      return successMsg;
+    }
+    // No flush trigger, buffer full or locked: fall back to a direct write
+  }
+
+  // Open the target spreadsheet and get "Điểm danh" sheet
+  timer.tag("path", "direct");
+  const sheet = timer.time("openById", () => SpreadsheetApp.openById(spreadsheetId).getSheetByName('Điểm danh'));
+
+  if (!sheet) {
+    return `Error: "Điểm danh" sheet not found in ${className} spreadsheet.`;
+  }
+
+  // Find the column for the day of the scan
+  const baseCol = timer.time("column", () => getDateColumn(spreadsheetId, sheet, now));
   if (!baseCol) {
-    console.log(`Return error: No date column for today`);
     return `Error: No matching column for today's date.`;
   }
 
-  if (currentTime >= "09:10:00" && currentTime < "10:00:00") {
-    console.log(`Return skipped: Time within skip window: ${currentTime}`);
-    return `Skipped: No attendance marked between 09:10 and 10:00 for ${nameOnly}`;
-  }
+  const col = baseCol + slot.offset;
+  const status = slot.status;
 
-  const col = (currentTime >= "10:00:00") ? baseCol + 1 : baseCol;
-  let status = (currentTime < "09:00:00") ? "X"
-    : (currentTime < "09:10:00") ? "T"
-      : (currentTime < "12:00:00") ? "X"
-        : "O";
+  // Idempotent write: a repeated scan with the same status costs a read, not a write.
+  const writeCell = () => {
+    const cell = sheet.getRange(row, col);
+    if (cell.getValue() === status) return true;
+    cell.setValue(status);
+    return false;
+  };
+  // Only a flush writes these cells behind a scan's back, so the lease (script
+  // lock + cache round trips) is only taken while write-behind is on.
+  const alreadyMarked = timer.time("write", () =>
+    WRITE_BEHIND ? withLease(spreadsheetId, SHEET_LEASE_TTL_S, SHEET_LEASE_WAIT_MS, writeCell) : writeCell()
+  );
 
-  // Special evening schedule for du_truong class
-  if (className === "du_truong" && currentTime >= "18:00:00") {
-    status = (currentTime >= "19:20:00") ? "O"
-      : (currentTime >= "19:00:00") ? "T"
-        : "X";
+  if (alreadyMarked) {
+    return `Success: ${nameOnly} (${className}) already checked in.`;
   }
 
-  sheet.getRange(row, col).setValue(status);
   console.log(`Checked in ${nameOnly} → spreadsheet:${spreadsheetId}, row:${row}, col:${col}, status:${status}`);
-
-  const successMsg = `Success: ${nameOnly} (${className}) checked in at ${hh}:${mm}:${ss}.`;
-  console.log(`Return success: ${successMsg}`);
   return successMsg;
 }
 
 /**
- * findTodayColumn(sheet)
- * - Simple function to find today's TL column
- * - Pattern: dates every 2 columns starting from column 6
+ * lookupSchedule(className, secondOfDay)
+ * - Binary search in the class's SCHEDULE_TABLE (falls back to "default").
+ * - Returns {status, offset, start, end}; status null means skip window.
  */
-function findTodayColumn(sheet) {
-  const today = new Date();
-  // Set today to start of day for fair comparison
-  today.setHours(0, 0, 0, 0);
+function lookupSchedule(className, secondOfDay) {
+  const table = SCHEDULE_TABLE[className] || SCHEDULE_TABLE["default"];
+
+  // Last row whose start <= secondOfDay (row 0 always starts at 0)
+  let lo = 0;
+  let hi = table.length - 1;
+  while (lo < hi) {
+    const mid = (lo + hi + 1) >> 1;
+    if (table[mid][0] <= secondOfDay) lo = mid;
+    else hi = mid - 1;
+  }
 
-  console.log(`Today object: ${today}`);
+  const end = lo + 1 < table.length ? table[lo + 1][0] : 24 * 3600;
+  return { status: table[lo][1], offset: table[lo][2], start: table[lo][0], end: end };
+}
+
+/**
+ * formatSecondOfDay(seconds)
+ * - 33000 → "09:10"
+ */
+function formatSecondOfDay(seconds) {
+  const hh = String(Math.floor(seconds / 3600)).padStart(2, "0");
+  const mm = String(Math.floor(seconds / 60) % 60).padStart(2, "0");
+  return `${hh}:${mm}`;
+}
 
+/**
+ * findTodayColumn(sheet, date)
+ * - Simple function to find today's TL column (or the one for date, if given)
+ */
+function findTodayColumn(sheet, date) {
   // Get header row with dates (Row 8: 7/9/2025, 14/9/2025, 21/9/2025, 28/9/2025)
   const headerRow = sheet.getRange(8, 1, 1, sheet.getLastColumn()).getValues()[0];
+  return findDateColumn(headerRow, date);
+}
+
+/**
+ * getDateColumn(spreadsheetId, sheet, date)
+ * - findTodayColumn() with a per-day cache, so a warm scan skips the header read.
+ */
+function getDateColumn(spreadsheetId, sheet, date) {
+  const cached = cachedDateColumn(spreadsheetId, date);
+  if (cached) return cached;
+
+  const col = findTodayColumn(sheet, date);
+  if (col) cacheDateColumn(spreadsheetId, date, col);
+  return col;
+}
+
+/**
+ * cachedDateColumn(spreadsheetId, date)
+ * - The day's TL column if it is cached, else null (no sheet read).
+ */
+function cachedDateColumn(spreadsheetId, date) {
+  const key = dateColumnKey(spreadsheetId, date);
+  if (_dateColumns[key]) return _dateColumns[key];
+
+  const cached = Number(CacheService.getScriptCache().get(key));
+  if (!cached) return null;
+  _dateColumns[key] = cached;
+  return cached;
+}
+
+function cacheDateColumn(spreadsheetId, date, col) {
+  const key = dateColumnKey(spreadsheetId, date);
+  _dateColumns[key] = col;
+  CacheService.getScriptCache().put(key, String(col), DATE_COLUMN_TTL_S);
+}
+
+function dateColumnKey(spreadsheetId, date) {
+  return `col:${spreadsheetId}:${isoDay(date)}`;
+}
+
+function isoDay(date) {
+  const day = new Date(date);
+  const mm = String(day.getMonth() + 1).padStart(2, "0");
+  const dd = String(day.getDate()).padStart(2, "0");
+  return `${day.getFullYear()}-${mm}-${dd}`;
+}
+
+/**
+ * findDateColumn(headerRow, date)
+ * - Returns the 1-based TL column of the first Sunday on or after date
+ * - Pattern: dates every 2 columns starting from column 6
+ */
+function findDateColumn(headerRow, date) {
+  const today = date ? new Date(date) : new Date();
+  // Set today to start of day for fair comparison
+  today.setHours(0, 0, 0, 0);
 
   // Check every 2 columns starting from column 6 (index 5)
   for (let idx = 5; idx < headerRow.length; idx += 2) {
     const cell = headerRow[idx];
-    console.log(`Column ${idx + 1}: ${cell}`);
 
     if (cell instanceof Date) {
       // Set cell date to start of day for fair comparison
       const cellDate = new Date(cell);
       cellDate.setHours(0, 0, 0, 0);
 
-      console.log(`Comparing dates: today=${today.getTime()} vs cell=${cellDate.getTime()}`);
-
       // If today is less than or equal to cell date (upcoming sunday), this is our column
       if (today.getTime() <= cellDate.getTime()) {
-        console.log(`Match found! Returning column ${idx + 1}`);
         return idx + 1;
       }
     }
@@ -234,6 +514,412 @@ function findTodayColumn(sheet) {
   return null; // No suitable date column found
 }
 
+/**
+ * bufferPendingWrite(write)
+ * - Appends {id, row, col, status, t} to the write-behind buffer.
+ * - Returns false if no flush trigger is installed or the buffer is locked or
+ *   full (caller writes directly).
+ */
+function bufferPendingWrite(write) {
+  if (!hasFlushTrigger()) return false;
+
+  const lock = LockService.getScriptLock();
+  if (!lock.tryLock(5000)) return false;
+
+  try {
+    const cache = CacheService.getScriptCache();
+    const pending = JSON.parse(cache.get(PENDING_WRITES_KEY) || "[]");
+    pending.push(write);
+
+    const raw = JSON.stringify(pending);
+    if (raw.length > PENDING_WRITES_MAX_CHARS) return false;
+
+    cache.put(PENDING_WRITES_KEY, raw, PENDING_WRITES_TTL_S);
+    return true;
+  } finally {
+    lock.releaseLock();
+  }
+}
+
+/**
+ * readPendingWrites() / removePendingWrites(writes) / requeuePendingWrites(writes)
+ * - A flush reads the buffer without emptying it and removes each
+ *   spreadsheet's writes once they are applied, so an execution that dies
+ *   mid-flush leaves them for the next run (re-applying a write is harmless).
+ * - requeuePendingWrites puts dead-lettered writes back in the buffer.
+ */
+function readPendingWrites() {
+  return JSON.parse(CacheService.getScriptCache().get(PENDING_WRITES_KEY) || "[]");
+}
+
+function removePendingWrites(writes) {
+  const applied = {};
+  for (const write of writes) {
+    const key = JSON.stringify(write);
+    applied[key] = (applied[key] || 0) + 1;
+  }
+
+  const lock = LockService.getScriptLock();
+  lock.waitLock(10000);
+  try {
+    const cache = CacheService.getScriptCache();
+    // Keep whatever was buffered since the flush read it
+    const pending = JSON.parse(cache.get(PENDING_WRITES_KEY) || "[]").filter(write => {
+      const key = JSON.stringify(write);
+      if (!applied[key]) return true;
+      applied[key]--;
+      return false;
+    });
+    if (pending.length) cache.put(PENDING_WRITES_KEY, JSON.stringify(pending), PENDING_WRITES_TTL_S);
+    else cache.remove(PENDING_WRITES_KEY);
+  } finally {
+    lock.releaseLock();
+  }
+}
+
+function requeuePendingWrites(writes) {
+  const lock = LockService.getScriptLock();
+  lock.waitLock(10000);
+  try {
+    const cache = CacheService.getScriptCache();
+    const pending = writes.concat(JSON.parse(cache.get(PENDING_WRITES_KEY) || "[]"));
+    cache.put(PENDING_WRITES_KEY, JSON.stringify(pending), PENDING_WRITES_TTL_S);
+  } finally {
+    lock.releaseLock();
+  }
+}
+
+/**
+ * hasFlushTrigger()
+ * - Whether flushPendingWrites() has a trigger; the answer is cached for
+ *   FLUSH_TRIGGER_CHECK_S so scans don't list the triggers every time.
+ */
+function hasFlushTrigger() {
+  const cache = CacheService.getScriptCache();
+  const cached = cache.get(FLUSH_TRIGGER_KEY);
+  if (cached !== null) return cached === "1";
+
+  const installed = ScriptApp.getProjectTriggers()
+    .some(trigger => trigger.getHandlerFunction() === 'flushPendingWrites');
+  cache.put(FLUSH_TRIGGER_KEY, installed ? "1" : "0", FLUSH_TRIGGER_CHECK_S);
+  return installed;
+}
+
+/**
+ * deadLetterWrites(writes, reason)
+ * - Keeps writes a flush had to drop in script properties (chunks of at most
+ *   DEAD_LETTER_MAX_CHARS) instead of losing them; see replayDeadLetters().
+ */
+function deadLetterWrites(writes, reason) {
+  console.log(`Dead-lettering ${writes.length} writes: ${reason}`);
+  const props = {};
+  let chunk = [];
+  const store = () => {
+    props[`${DEAD_LETTER_PREFIX}${Date.now()}:${Utilities.getUuid()}`] =
+      JSON.stringify({ reason: reason, writes: chunk });
+    chunk = [];
+  };
+  for (const write of writes) {
+    chunk.push(write);
+    if (JSON.stringify(chunk).length > DEAD_LETTER_MAX_CHARS) {
+      chunk.pop();
+      store();
+      chunk.push(write);
+    }
+  }
+  if (chunk.length) store();
+  PropertiesService.getScriptProperties().setProperties(props);
+}
+
+/**
+ * replayDeadLetters()
+ * - Run from the editor once the cause is fixed (e.g. the sheet or the date
+ *   column was added back): moves dead-lettered writes back into the buffer.
+ */
+function replayDeadLetters() {
+  const store = PropertiesService.getScriptProperties();
+  const keys = Object.keys(store.getProperties()).filter(key => key.startsWith(DEAD_LETTER_PREFIX));
+  let writes = [];
+  for (const key of keys) {
+    writes = writes.concat(JSON.parse(store.getProperty(key)).writes);
+  }
+  if (writes.length) requeuePendingWrites(writes);
+  keys.forEach(key => store.deleteProperty(key));
+  return `Re-queued ${writes.length} dead-lettered writes`;
+}
+
+/**
+ * flushPendingWrites()
+ * - Time-driven trigger: applies buffered scans, one spreadsheet at a time.
+ * - Writes for a spreadsheet that fails (e.g. Sheets timeout) stay buffered
+ *   for the next run.
+ * - Runs are serialized by a lease: an overlapping run could otherwise apply
+ *   an older snapshot over the newer scans of a run that started later.
+ */
+function flushPendingWrites() {
+  const lease = acquireLease('flushPendingWrites', FLUSH_LEASE_TTL_S, 0);
+  if (!lease.token) return "Flush skipped: another flush is running";
+  try {
+    return flushPendingWritesLeased();
+  } finally {
+    releaseLease('flushPendingWrites', lease.token);
+  }
+}
+
+function flushPendingWritesLeased() {
+  const timer = newScanTimer("flush");
+  const writes = timer.time("read", readPendingWrites);
+  if (!writes.length) return "No pending writes";
+
+  // Oldest first, so a later scan of the same cell wins
+  writes.sort((a, b) => a.t - b.t);
+
+  const bySpreadsheet = {};
+  for (const write of writes) {
+    (bySpreadsheet[write.id] = bySpreadsheet[write.id] || []).push(write);
+  }
+
+  const failed = [];
+  let deadLettered = 0;
+  for (const [spreadsheetId, list] of Object.entries(bySpreadsheet)) {
+    try {
+      deadLettered += timer.time("apply", () =>
+        withLease(spreadsheetId, SHEET_LEASE_TTL_S, SHEET_LEASE_WAIT_MS, () => applyPendingWrites(spreadsheetId, list))
+      );
+    } catch (err) {
+      console.log(`Flush failed for ${spreadsheetId}: ${err.message}`);
+      failed.push(...list);
+      continue;
+    }
+    timer.time("remove", () => removePendingWrites(list));
+  }
+
+  const result = `Flushed ${writes.length - failed.length - deadLettered} writes to ${Object.keys(bySpreadsheet).length} spreadsheets (${failed.length} kept for the next flush, ${deadLettered} dead-lettered)`;
+  timer.emit({ writes: writes.length, spreadsheets: Object.keys(bySpreadsheet).length, failed: failed.length, deadLettered: deadLettered });
+  return result;
+}
+
+/**
+ * applyPendingWrites(spreadsheetId, writes)
+ * - Writes every Sunday's TL/GL block with one getValues()/setValues() pair.
+ * - Writes buffered before columns were resolved at scan time ({offset}
+ *   instead of {col}) get theirs from the scan date here.
+ * - Returns how many writes were dead-lettered.
+ */
+function applyPendingWrites(spreadsheetId, writes) {
+  const sheet = SpreadsheetApp.openById(spreadsheetId).getSheetByName('Điểm danh');
+  if (!sheet) {
+    deadLetterWrites(writes, `"Điểm danh" sheet missing in ${spreadsheetId}`);
+    return writes.length;
+  }
+
+  // TL column → {"row:col" → {row, col, status}}; later writes overwrite earlier ones
+  const blocks = {};
+  const orphans = [];
+  for (const write of writes) {
+    let col = write.col;
+    if (!col) {
+      const baseCol = getDateColumn(spreadsheetId, sheet, new Date(write.t));
+      if (!baseCol) {
+        orphans.push(write);
+        continue;
+      }
+      col = baseCol + write.offset;
+    }
+    const baseCol = col - ((col - 6) % 2);
+    blocks[baseCol] = blocks[baseCol] || {};
+    blocks[baseCol][`${write.row}:${col}`] = { row: write.row, col: col, status: write.status };
+  }
+
+  for (const cells of Object.values(blocks)) {
+    const list = Object.values(cells);
+    const top = Math.min(...list.map(cell => cell.row));
+    const left = Math.min(...list.map(cell => cell.col));
+    const bottom = Math.max(...list.map(cell => cell.row));
+    const right = Math.max(...list.map(cell => cell.col));
+
+    const range = sheet.getRange(top, left, bottom - top + 1, right - left + 1);
+    const values = range.getValues();
+
+    let changed = 0;
+    for (const cell of list) {
+      if (values[cell.row - top][cell.col - left] !== cell.status) {
+        values[cell.row - top][cell.col - left] = cell.status;
+        changed++;
+      }
+    }
+
+    // Idempotent: a block with nothing new costs one read and no write
+    if (changed) range.setValues(values);
+    console.log(`Flushed ${list.length} cells (${changed} changed) in ${spreadsheetId} rows ${top}-${bottom}`);
+  }
+
+  if (orphans.length) deadLetterWrites(orphans, `no date column in ${spreadsheetId}`);
+  return orphans.length;
+}
+
+/**
+ * acquireLease(name, ttlSeconds, waitMs)
+ * - Takes the named lease, waiting up to waitMs. Returns {token, held}:
+ *   token is set if we got it; otherwise held says whether another execution
+ *   holds the lease (true) or we never got the script lock to look (false).
+ * - The script lock is only held for the check-and-set, never for the work.
+ * - ttlSeconds bounds how long a crashed holder can block everyone else.
+ */
+function acquireLease(name, ttlSeconds, waitMs) {
+  const key = `lease:${name}`;
+  const token = Utilities.getUuid();
+  const deadline = Date.now() + (waitMs || 0);
+  let delay = 50;
+  let held = false;
+
+  while (true) {
+    const lock = LockService.getScriptLock();
+    if (lock.tryLock(1000)) {
+      try {
+        const cache = CacheService.getScriptCache();
+        held = Boolean(cache.get(key));
+        if (!held) {
+          cache.put(key, token, ttlSeconds);
+          return { token: token, held: false };
+        }
+      } finally {
+        lock.releaseLock();
+      }
+    }
+
+    if (Date.now() + delay > deadline) return { token: null, held: held };
+    Utilities.sleep(delay);
+    delay = Math.min(delay * 2, 1000);
+  }
+}
+
+/**
+ * releaseLease(name, token)
+ * - Releases the lease if it is still ours (it may have expired and moved on).
+ */
+function releaseLease(name, token) {
+  const key = `lease:${name}`;
+  const lock = LockService.getScriptLock();
+  lock.waitLock(5000);
+  try {
+    const cache = CacheService.getScriptCache();
+    if (cache.get(key) === token) cache.remove(key);
+  } finally {
+    lock.releaseLock();
+  }
+}
+
+/**
+ * withLease(name, ttlSeconds, waitMs, fn)
+ * - Runs fn while holding the named lease; throws if it can't be taken, so
+ *   logScanBatch() reports the scan as retryable and a flush keeps the writes buffered.
+ */
+function withLease(name, ttlSeconds, waitMs, fn) {
+  const lease = acquireLease(name, ttlSeconds, waitMs);
+  if (!lease.token) {
+    throw new Error(lease.held ? `${name} is busy, try again` : 'Script lock is busy, try again');
+  }
+  try {
+    return fn();
+  } finally {
+    releaseLease(name, lease.token);
+  }
+}
+
+/**
+ * installFlushTrigger()
+ * - Run once from the editor: flushes the write-behind buffer every minute.
+ */
+function installFlushTrigger() {
+  ScriptApp.getProjectTriggers()
+    .filter(trigger => trigger.getHandlerFunction() === 'flushPendingWrites')
+    .forEach(trigger => ScriptApp.deleteTrigger(trigger));
+
+  ScriptApp.newTrigger('flushPendingWrites').timeBased().everyMinutes(1).create();
+  CacheService.getScriptCache().put(FLUSH_TRIGGER_KEY, "1", FLUSH_TRIGGER_CHECK_S);
+  return "Flush trigger installed: flushPendingWrites() runs every minute";
+}
+
+/**
+ * warmUp()
+ * - Time-driven trigger before each session: rebuilds the master map and
+ *   today's date columns so the first child in line never waits on a cold cache.
+ */
+function warmUp() {
+  const started = Date.now();
+  _masterMap = null;
+  _dateColumns = {};
+
+  const rebuild = refreshMasterMap(REBUILD_WAIT_MS);
+  const result = rebuild === "rebuilt"
+    ? `Warm-up done in ${Date.now() - started} ms`
+    : rebuild === "held"
+      ? "Warm-up skipped: a rebuild was already running"
+      : "Warm-up skipped: the script lock stayed busy";
+  console.log(result);
+  return result;
+}
+
+/**
+ * installWarmupTriggers()
+ * - Run once from the editor (and after changing the schedule): one weekly
+ *   trigger per WARMUP_SCHEDULE time (Schedule.js), replacing the old ones.
+ * - Apps Script runs "nearMinute" triggers within about 15 minutes of the time.
+ */
+function installWarmupTriggers() {
+  ScriptApp.getProjectTriggers()
+    .filter(trigger => trigger.getHandlerFunction() === 'warmUp')
+    .forEach(trigger => ScriptApp.deleteTrigger(trigger));
+
+  for (const [hour, minute] of WARMUP_SCHEDULE.times) {
+    ScriptApp.newTrigger('warmUp')
+      .timeBased()
+      .onWeekDay(ScriptApp.WeekDay[WARMUP_SCHEDULE.weekDay])
+      .atHour(hour)
+      .nearMinute(minute)
+      .create();
+  }
+
+  const times = WARMUP_SCHEDULE.times
+    .map(([hour, minute]) => `${String(hour).padStart(2, "0")}:${String(minute).padStart(2, "0")}`);
+  return `Warm-up triggers installed: ${WARMUP_SCHEDULE.weekDay} ${times.join(", ")}`;
+}
+
+/**
+ * activeSeason()
+ * - The latest season in Seasons.js whose start date has passed:
+ *   {id, spreadsheets, aliases}.
+ * - Script properties override it without a deploy: ACTIVE_SEASON pins a season
+ *   id, SEASON_REGISTRY replaces Seasons.js (season_registry.py --property).
+ */
+function activeSeason() {
+  if (_season) return _season;
+
+  const props = PropertiesService.getScriptProperties().getProperties();
+  const registry = props.SEASON_REGISTRY
+    ? JSON.parse(props.SEASON_REGISTRY)
+    : { seasons: SEASONS, aliases: CLASS_ALIASES };
+
+  const today = isoDay(new Date());
+  const started = Object.keys(registry.seasons)
+    .filter(id => registry.seasons[id].start <= today)
+    .sort((a, b) => registry.seasons[a].start.localeCompare(registry.seasons[b].start));
+  const id = props.ACTIVE_SEASON || started.pop();
+  if (!registry.seasons[id]) throw new Error(`Unknown season: ${id}`);
+
+  _season = {
+    id: id,
+    spreadsheets: registry.seasons[id].spreadsheets,
+    aliases: (registry.aliases || {})[id] || {}
+  };
+  return _season;
+}
+
+function getSpreadsheetMap() {
+  return activeSeason().spreadsheets;
+}
+
 /**
  * normalize(text)
  * - Removes accents, whitespace, and lowercases the input.
@@ -249,35 +935,35 @@ function normalize(text) {
  * buildMasterMap()
  * - Scans all spreadsheets and builds a global routing table
  * - Format: normalizedName → {spreadsheetId, row}
+ * - Only reads the roster columns (A–E) and the date row, so the build does
+ *   not grow with the number of Sundays recorded.
  */
 function buildMasterMap() {
   console.log('Building master map across all spreadsheets...');
 
   const masterMap = {};
+  const spreadsheetMap = getSpreadsheetMap();
+  const snapshots = fetchRosterSnapshots(spreadsheetMap);
+  const today = new Date();
   let totalStudents = 0;
 
   // Iterate through all class-to-spreadsheet mappings
-  for (const [classCode, spreadsheetId] of Object.entries(SPREADSHEET_MAP)) {
+  for (const [classCode, spreadsheetId] of Object.entries(spreadsheetMap)) {
     try {
-      console.log(`Processing class ${classCode} (${spreadsheetId})...`);
-
-      // Open the target spreadsheet
-      const targetSpreadsheet = SpreadsheetApp.openById(spreadsheetId);
+      // Classes the batched fetch missed are read through SpreadsheetApp
+      const snapshot = snapshots[classCode] || readRosterSnapshot(spreadsheetId);
 
-      // Look for the "Điểm danh" sheet specifically
-      const dataSheet = targetSpreadsheet.getSheetByName('Điểm danh');
-
-      if (!dataSheet) {
+      if (!snapshot) {
         console.log(`Warning: "Điểm danh" sheet not found in ${classCode} spreadsheet`);
         continue;
       }
 
-      console.log(`Found "Điểm danh" sheet in ${classCode}`);
-
-      // Get all data from the sheet
-      const data = dataSheet.getDataRange().getValues();
+      // Row 8 holds the dates: cache today's column while we have it
+      const todayCol = findDateColumn(snapshot.header, today);
+      if (todayCol) cacheDateColumn(spreadsheetId, today, todayCol);
 
       // Process each row to find students
+      const data = snapshot.roster;
       for (let i = 0; i < data.length; i++) {
         const row = data[i];
         const studentNumber = row[1];
@@ -325,44 +1011,191 @@ function buildMasterMap() {
     }
   }
 
-  // Cache the master map
-  CacheService.getScriptCache().put('masterMap', JSON.stringify(masterMap), 6 * 60 * 60);
+  // Cache the master map with its build time (for the soft expiry in getMasterMap)
+  // and season (a copy built for last season is a miss after the switch)
+  CacheService.getScriptCache().putAll({
+    masterMap: JSON.stringify(masterMap),
+    masterMapBuiltAt: String(Date.now()),
+    masterMapSeason: activeSeason().id
+  }, MASTER_MAP_TTL_S);
   _masterMap = masterMap;
 
-  console.log(`Master map built: ${totalStudents} total students across ${Object.keys(SPREADSHEET_MAP).length} spreadsheets`);
-  return `Master map built with ${totalStudents} students from ${Object.keys(SPREADSHEET_MAP).length} spreadsheets`;
+  const spreadsheetCount = Object.keys(spreadsheetMap).length;
+  console.log(`Master map built: ${totalStudents} total students across ${spreadsheetCount} spreadsheets`);
+  return `Master map built with ${totalStudents} students from ${spreadsheetCount} spreadsheets`;
+}
+
+/**
+ * fetchRosterSnapshots(spreadsheetMap)
+ * - Reads columns A–E and row 8 of every "Điểm danh" sheet with Sheets API
+ *   values:batchGet, all sent in parallel by UrlFetchApp.fetchAll.
+ * - Unformatted values give dates as serial numbers, like any other number, so
+ *   column A and row 8 are fetched a second time with dates as formatted
+ *   strings: a cell is a Date (as getValues() returns it) only where that read
+ *   shows a date format (isDateCell).
+ * - Format: classCode → {roster, header}; classes whose requests failed are left
+ *   out (buildMasterMap reads them with readRosterSnapshot).
+ */
+function fetchRosterSnapshots(spreadsheetMap) {
+  const snapshots = {};
+  if (!BATCH_FETCH) return snapshots;
+
+  const codes = Object.keys(spreadsheetMap);
+  const query = (ranges, dateTimeRender) => ranges
+    .map(range => `ranges=${encodeURIComponent(range)}`)
+    .concat(['valueRenderOption=UNFORMATTED_VALUE', `dateTimeRenderOption=${dateTimeRender}`])
+    .join('&');
+  const serialQuery = query([ROSTER_RANGE, DATE_ROW_RANGE], 'SERIAL_NUMBER');
+  const formattedQuery = query([NOTE_RANGE, DATE_ROW_RANGE], 'FORMATTED_STRING');
+
+  let responses;
+  try {
+    const headers = { Authorization: `Bearer ${ScriptApp.getOAuthToken()}` };
+    const request = (code, q) => ({
+      url: `https://sheets.googleapis.com/v4/spreadsheets/${spreadsheetMap[code]}/values:batchGet?${q}`,
+      headers: headers,
+      muteHttpExceptions: true
+    });
+    responses = UrlFetchApp.fetchAll(codes.flatMap(code => [request(code, serialQuery), request(code, formattedQuery)]));
+  } catch (error) {
+    console.log(`Batched roster fetch failed, reading each spreadsheet: ${error.message}`);
+    return snapshots;
+  }
+
+  codes.forEach((code, i) => {
+    const pair = [responses[2 * i], responses[2 * i + 1]];
+    const failed = pair.find(response => response.getResponseCode() !== 200);
+    if (failed) {
+      console.log(`Batched roster fetch of ${code} returned ${failed.getResponseCode()}`);
+      return;
+    }
+    const [roster, header] = JSON.parse(pair[0].getContentText()).valueRanges;
+    const [notes, formattedHeader] = JSON.parse(pair[1].getContentText()).valueRanges;
+    const noteText = notes.values || [];
+    const headerText = (formattedHeader.values || [])[0] || [];
+    snapshots[code] = {
+      roster: (roster.values || []).map((row, r) => {
+        const note = (noteText[r] || [])[0];
+        return [isDateCell(row[0], note) ? serialToDate(row[0]) : row[0]].concat(row.slice(1));
+      }),
+      header: ((header.values || [])[0] || []).map((value, c) =>
+        isDateCell(value, headerText[c]) ? serialToDate(value) : value)
+    };
+  });
+  return snapshots;
+}
+
+/**
+ * readRosterSnapshot(spreadsheetId)
+ * - SpreadsheetApp version of one fetchRosterSnapshots entry: {roster, header},
+ *   or null if the spreadsheet has no "Điểm danh" sheet.
+ */
+function readRosterSnapshot(spreadsheetId) {
+  const sheet = SpreadsheetApp.openById(spreadsheetId).getSheetByName('Điểm danh');
+  if (!sheet) return null;
+
+  const lastRow = sheet.getLastRow();
+  return {
+    roster: lastRow ? sheet.getRange(1, 1, lastRow, ROSTER_COLUMNS).getValues() : [],
+    header: lastRow >= 8 ? sheet.getRange(8, 1, 1, sheet.getLastColumn()).getValues()[0] : []
+  };
+}
+
+/**
+ * isDateCell(serial, formatted)
+ * - serial is a cell read as UNFORMATTED_VALUE/SERIAL_NUMBER, formatted the same
+ *   cell read with FORMATTED_STRING. Plain numbers come back as numbers both
+ *   times; date cells come back as text the second time (the row 8 dates show
+ *   only the day, so the text itself is not parsed). Serials below 1 are
+ *   times of day, not dates.
+ */
+function isDateCell(serial, formatted) {
+  return typeof serial === 'number' && serial >= 1 && typeof formatted === 'string';
+}
+
+/**
+ * serialToDate(value)
+ * - Sheets API serial number (days since 30/12/1899) → local Date at midnight;
+ *   other values are returned unchanged.
+ */
+function serialToDate(value) {
+  if (typeof value !== 'number') return value;
+  const utc = new Date(Date.UTC(1899, 11, 30) + Math.round(value * 86400000));
+  return new Date(utc.getUTCFullYear(), utc.getUTCMonth(), utc.getUTCDate());
 }
 
 /**
  * getMasterMap()
  * - Returns in-memory or cached master map, building if needed.
+ * - Single flight: only one execution rebuilds; the others wait for its result
+ *   (cache miss) or keep using the current copy (soft expiry).
  */
 function getMasterMap() {
   if (_masterMap) return _masterMap;
 
   const cache = CacheService.getScriptCache();
-  let raw = cache.get('masterMap');
+  const keys = ['masterMap', 'masterMapBuiltAt', 'masterMapSeason'];
+  const season = activeSeason().id;
+  const cached = cache.getAll(keys);
 
-  if (!raw) {
-    buildMasterMap();
-    raw = cache.get('masterMap');
+  if (cached.masterMap && cached.masterMapSeason === season) {
+    _masterMap = JSON.parse(cached.masterMap);
+    const age = Date.now() - Number(cached.masterMapBuiltAt || 0);
+    if (age > MASTER_MAP_SOFT_TTL_MS) refreshMasterMap(0);
+    return _masterMap;
   }
 
-  if (!raw) throw new Error('Master map could not be loaded.');
+  // Cache miss: build it, or wait for whoever is already building it. Losing
+  // the script-lock race says nothing about a rebuild, so then build it here.
+  const rebuild = refreshMasterMap(0);
+  if (rebuild === "busy") {
+    buildMasterMap();
+  } else if (rebuild === "held") {
+    const deadline = Date.now() + REBUILD_WAIT_MS;
+    while (!_masterMap && Date.now() < deadline) {
+      Utilities.sleep(500);
+      const fresh = cache.getAll(keys);
+      if (fresh.masterMap && fresh.masterMapSeason === season) _masterMap = JSON.parse(fresh.masterMap);
+    }
+  }
 
-  _masterMap = JSON.parse(raw);
+  if (!_masterMap) throw new Error('Master map could not be loaded.');
   return _masterMap;
 }
 
+/**
+ * refreshMasterMap(waitMs)
+ * - Rebuilds the master map unless another execution already is.
+ * - Returns "rebuilt", "held" (another execution is rebuilding) or "busy"
+ *   (the script lock could not be taken to check).
+ */
+function refreshMasterMap(waitMs) {
+  const lease = acquireLease('masterMapRebuild', REBUILD_LEASE_TTL_S, waitMs);
+  if (!lease.token) {
+    console.log(lease.held ? 'Master map rebuild already running elsewhere' : 'Master map rebuild skipped: script lock busy');
+    return lease.held ? "held" : "busy";
+  }
+
+  try {
+    buildMasterMap();
+    return "rebuilt";
+  } finally {
+    releaseLease('masterMapRebuild', lease.token);
+  }
+}
+
 /**
  * clearCache()
  * - Clears both in-memory and service caches for debugging.
  */
 function clearCache() {
   _masterMap = null;
+  _dateColumns = {};
+  _season = null;
 
   const cache = CacheService.getScriptCache();
-  cache.remove('masterMap');
+  cache.removeAll(['masterMap', 'masterMapBuiltAt', 'masterMapSeason',
+    scannerPageCacheKey()]);
 
   console.log("Master cache cleared");
 }
\ No newline at end of file
@@ -0,0 +1,3 @@
+// === Generated by scripts/scanner_page.py with ScannerPage.html ===
+// Do not edit by hand: part of the scanner page's cache key in doGet().
+const SCANNER_PAGE_VERSION = "75b7438b01d7";
@@ -0,0 +1,12 @@
+// === Generated by scripts/session_schedule.py from config/gas_config.json ===
+// Do not edit by hand: change the config and re-run the script.
+
+// Per-class schedule: [startSecondOfDay, status, columnOffset], sorted by start.
+// status null = skip window (no attendance recorded).
+const SCHEDULE_TABLE = {
+  "default": [[0, "X", 0], [32400, "T", 0], [33000, null, null], [36000, "X", 1], [43200, "O", 1]],
+  "du_truong": [[0, "X", 0], [32400, "T", 0], [33000, null, null], [36000, "X", 1], [43200, "O", 1], [64800, "X", 1], [68400, "T", 1], [69600, "O", 1]],
+};
+
+// Warm-up triggers (installWarmupTriggers): [hour, minute] on weekDay.
+const WARMUP_SCHEDULE = { weekDay: "SUNDAY", times: [[8, 0], [9, 0], [17, 0]] };
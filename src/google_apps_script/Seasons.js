@@ -0,0 +1,15 @@
+// === Generated by scripts/season_registry.py from config/seasons.json ===
+// Do not edit by hand: change the config and re-run the script.
+
+// Season id -> first day (yyyy-mm-dd) and class code -> spreadsheet ID.
+// activeSeason() picks the latest season that has started.
+const SEASONS = {
+  "2024_25": {"start": "2024-08-01", "spreadsheets": {}},
+  "2025_26": {"start": "2025-08-01", "spreadsheets": {"c1": "1DdJbRdQ2gcf90_Ac1U7K9k2MlyNQZWF7fz1YLp9EzaM", "c2": "1bSayPQafLXuOgM_gPdGP6LWQ7n-qwmB94cpujBnMqGE", "a1": "1atwfmZsL2qco5akH4I84mFDnZyjzR8Q4mFVBrxWxbi4", "a2": "1ydlXhW44ILghLTCtF_8jOD9e8J58kCJgULvMveQe6gw", "a3": "1Y8XRPwqMSHlbEBDHEXLQYCEc5kCoV_dtuQIV-uo_lpw", "t1": "1FDtxlNLrSY30U7zAku2nYOFpHb-Fv8yWVucnXnNGCDQ", "t2": "1nJnfVL0umIN-AKEWFKy9UCp_mRei-PON8GSSDpM4wyc", "t3": "1prFTfu7Bu7Pb5siP0kHIyt6sMXGL2ITcu0OICAlu488", "n1": "1OXVC22Lcg8_oBHXXhoJygVaogWcjXHSb28ZxRWjMgfQ", "n2": "1g27jM5FgkWTzBBiIYtmsPoPkjvZ5zfNiPeFyTL97gAM", "n3": "1L47gsgzYrbFU5_3QoqAAf6s8U1IHUUiwoPGlTs_d1s8", "h1": "1Ba2z42eA3ptr6y3d6032mWWceZi4O4DzAld_2vIywvE", "h2": "1wAhH1FpNCY7oFtqurRKhL1gIKvmmSBwUP1tVfXBvkfw", "boi_duong_bi_tich": "1DD7kvnhCcpk7i-bBVhfsh5IryrdHeRyb6n9zRDyX4T4", "du_truong": "1EcPKj3OEI-Iq_El7qyzWdLyRaiZXlcqWRWUIy6YvF3s"}},
+};
+
+// Season id -> {class code on last season's cards: classes those students
+// are in this season}.
+const CLASS_ALIASES = {
+  "2025_26": {"au1": ["a2", "a1"], "au2": ["a3", "a2"], "au3": ["t1", "a3"], "chien1": ["c2", "c1"], "chien2": ["a1", "c2"], "nghia1": ["n2", "n1"], "nghia2": ["n3", "n2"], "nghia3": ["h1", "n3"], "thieu1": ["t2", "t1"], "thieu2": ["t3", "t2"], "thieu3": ["n1", "t3"]},
+};
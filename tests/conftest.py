@@ -0,0 +1,82 @@
+"""
+Shared fixtures. The scripts import their siblings directly (they are run as
+`python3 scripts/<name>.py`), so the tests put scripts/ on sys.path the same way.
+"""
+
+import csv
+import os
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+# Sundays of the sample export and the 0-based TL column of each: the first
+# term's summary columns (J, K) sit between 14/9 and the second term, like the
+# real "Điểm danh" sheets
+SESSIONS = [(date(2025, 9, 7), 5), (date(2025, 9, 14), 7), (date(2026, 1, 11), 11)]
+WIDTH = 13
+
+
+def export_rows(students):
+    """
+    A "Điểm danh" export: title rows, months (row 7), dates (row 8), TL/GL
+    (row 9), then one row per student. students are (note, saint, last, first,
+    {column: mark}).
+    """
+    rows = [[""] * WIDTH for _ in range(9)]
+    rows[3][1] = "Phân đoàn CHIÊN 1 (Năm học 2025-2026)"
+    rows[5][5], rows[5][11] = "HKI", "HKII"
+    rows[6][1:5] = ["X = Có Mặt", "T = Trễ", "P = Phép", "O = Vắng"]
+    rows[6][5], rows[6][11] = "Tháng 9", "Tháng 1"
+    rows[7][1:5] = ["STT", "TÊN THÁNH", "HỌ", "TÊN"]
+    rows[7][9:11] = ["HIỆN DIỆN", "TRỄ"]
+    for day, column in SESSIONS:
+        rows[7][column] = str(day.day)
+        rows[8][column : column + 2] = ["TL", "GL"]
+    for number, (note, saint, last, first, marks) in enumerate(students, start=1):
+        row = [note, str(number), saint, last, first] + [""] * (WIDTH - 5)
+        for column, mark in marks.items():
+            row[column] = mark
+        rows.append(row)
+    return rows
+
+
+@pytest.fixture
+def class_export(tmp_path):
+    """A c1 export with two students; the second was present on 7/9 (TL)"""
+    path = tmp_path / "(C1) Danh sách (2025-2026) - Điểm danh.csv"
+    students = [
+        ("", "Giuse", "Trần Hoàng", "Khôi", {}),
+        ("06/08/2019", "Maria", "Lê Thị", "An", {5: "X", 12: "P"}),
+    ]
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        csv.writer(file).writerows(export_rows(students))
+    return path
+
+
+@pytest.fixture
+def card_settings(tmp_path):
+    """
+    The card layout from config/settings.json over small c1/c2 backgrounds in
+    tmp_path (QR box and fonts shrunk to match)
+    """
+    from card_template import load_card_settings
+
+    settings = load_card_settings()
+    font = settings["font"]
+    if not any(os.path.exists(font.get(key, "")) for key in ("path", "fallback_path")):
+        pytest.skip("card font not installed")
+
+    backgrounds = tmp_path / "backgrounds"
+    backgrounds.mkdir()
+    Image.new("RGBA", (480, 320), (250, 240, 200, 255)).save(backgrounds / "c1.png")
+    Image.new("RGB", (480, 320), (200, 230, 250)).save(backgrounds / "c2.png")
+    settings["background_dir"] = str(backgrounds)
+    settings["qr_position"]["size"] = 200
+    settings["text_positions"]["name"]["line_spacing"] = 24
+    settings["font"] = dict(font, size=22, fallback_size=20)
+    return settings
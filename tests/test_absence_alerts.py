@@ -0,0 +1,64 @@
+"""absence_alerts.py: absence streaks streamed from one class export"""
+
+import csv
+from datetime import date
+
+import pytest
+from absence_alerts import scan_class
+from conftest import export_rows
+from sheet_export import load_status_codes
+
+SEPT_7, SEPT_14, JAN_11 = date(2025, 9, 7), date(2025, 9, 14), date(2026, 1, 11)
+
+# TL columns of the three Sundays: 5, 7 and 11 (GL is the next column)
+STUDENTS = [
+    ("", "Giuse", "Trần Hoàng", "Khôi", {5: "X"}),
+    ("", "Maria", "Lê Thị", "An", {5: "X", 8: "P"}),
+    ("", "Phêrô", "Nguyễn Văn", "Bình", {}),
+    ("", "Têrêsa", "Phạm Thị", "Cúc", {5: "T", 7: "X", 12: "X"}),
+]
+
+
+@pytest.fixture
+def export(tmp_path):
+    path = tmp_path / "(C1) Danh sách (2025-2026) - Điểm danh.csv"
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        csv.writer(file).writerows(export_rows(STUDENTS))
+    return path
+
+
+def alerts_by_name(export, min_sundays, as_of=None):
+    alerts = scan_class(export, load_status_codes(), min_sundays, as_of)
+    return {alert.name: alert for alert in alerts}
+
+
+def test_streaks(export):
+    alerts = alerts_by_name(export, 2)
+    assert sorted(alerts) == ["Giuse Trần Hoàng Khôi", "Phêrô Nguyễn Văn Bình"]
+    khoi = alerts["Giuse Trần Hoàng Khôi"]
+    assert (khoi.row, khoi.absent_sundays, khoi.since, khoi.last_seen) == (
+        10,
+        2,
+        SEPT_14,
+        SEPT_7,
+    )
+    binh = alerts["Phêrô Nguyễn Văn Bình"]
+    assert (binh.absent_sundays, binh.since, binh.last_seen) == (3, SEPT_7, None)
+
+
+def test_excused_sunday_is_not_counted_or_the_start(export):
+    an = alerts_by_name(export, 1)["Maria Lê Thị An"]
+    # P (GL) on 14/9, then missed 11/1
+    assert (an.absent_sundays, an.since, an.last_seen) == (1, JAN_11, SEPT_7)
+
+
+def test_as_of_ignores_later_sundays(export):
+    alerts = alerts_by_name(export, 1, as_of=date(2025, 9, 30))
+    assert sorted(alerts) == ["Giuse Trần Hoàng Khôi", "Phêrô Nguyễn Văn Bình"]
+    assert alerts["Phêrô Nguyễn Văn Bình"].absent_sundays == 2
+
+
+def test_not_an_export(tmp_path):
+    path = tmp_path / "notes.csv"
+    path.write_text("name,phone\nKhôi,0909\n", encoding="utf-8")
+    assert scan_class(path, load_status_codes(), 3) is None
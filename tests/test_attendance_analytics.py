@@ -0,0 +1,65 @@
+"""attendance_analytics.py: the status cube and the metrics computed on it"""
+
+import csv
+import math
+
+import pytest
+from attendance_analytics import LATE, PRESENT, analyze, load_exports
+from conftest import SESSIONS, export_rows
+from sheet_export import read_header
+
+# TL columns of the three Sundays: 5, 7 and 11 (GL is the next column)
+STUDENTS = [
+    ("", "Giuse", "Trần Hoàng", "Khôi", {5: "X", 7: "T", 11: "x"}),
+    ("06/08/2019", "Maria", "Lê Thị", "An", {5: "X", 11: "P"}),
+    ("", "Phêrô", "Nguyễn Văn", "Bình", {}),
+]
+
+
+@pytest.fixture
+def cube(tmp_path):
+    path = tmp_path / "(C1) Danh sách (2025-2026) - Điểm danh.csv"
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        csv.writer(file).writerows(export_rows(STUDENTS))
+    return load_exports([path])
+
+
+def test_header_skips_the_summary_columns(cube, tmp_path):
+    header = read_header(next(tmp_path.glob("*.csv")))
+    assert header.class_code == "c1"
+    assert list(zip(header.sessions, header.session_columns, strict=True)) == SESSIONS
+
+
+def test_cube_layout(cube):
+    assert cube.codes.shape == (3, 3, 2)
+    assert cube.dates == [day for day, _ in SESSIONS]
+    assert [entry.line for entry in cube.students] == [10, 11, 12]
+    # marks are read case-insensitively
+    assert cube.codes[0, :, 0].tolist() == [PRESENT, LATE, PRESENT]
+    # only the TL columns were recorded
+    assert cube.held[0].tolist() == [[True, False]] * 3
+
+
+def test_student_metrics(cube):
+    stats = analyze(cube)
+    khoi, an, binh = 0, 1, 2
+    assert stats["student_rate"][khoi, 0] == 1.0
+    # An's excused Sunday is left out of the rate
+    assert stats["student_rate"][an, 0] == 0.5
+    assert stats["student_rate"][binh, 0] == 0.0
+    assert math.isnan(stats["student_rate"][khoi, 1])
+
+    assert stats["longest_streak"][khoi, 0] == 3
+    assert stats["late_count"][khoi, 0] == 1
+    # P neither counts nor breaks An's absence since 14/9
+    assert stats["current_absence"][an, 0] == 1
+    assert stats["current_streak"][an, 0] == 0
+    assert stats["longest_absence"][binh, 0] == 3
+
+
+def test_class_metrics(cube):
+    stats = analyze(cube)
+    assert stats["class_rate"][0, 0] == 4 / 8
+    assert stats["late_share"][0, 0] == 1 / 4
+    # late on 14/9 only, between two on-time Sundays: no trend
+    assert stats["late_trend"][0, 0] == pytest.approx(0.0)
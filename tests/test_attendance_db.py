@@ -0,0 +1,154 @@
+"""attendance_db.py: import → export round trip and scans on top of the store"""
+
+import csv
+import sqlite3
+import sys
+from datetime import datetime
+
+import pytest
+from attendance_db import (
+    class_report,
+    connect,
+    import_export,
+    import_log,
+    load_store_engine,
+    main,
+    record_event,
+    render_class,
+)
+from conftest import SESSIONS
+from scan_engine import log_scan
+from scan_log import SegmentWriter
+
+
+@pytest.fixture
+def store(tmp_path, class_export):
+    connection = connect(tmp_path / "attendance.sqlite")
+    with connection:
+        import_export(connection, class_export)
+    yield connection
+    connection.close()
+
+
+def read_rows(path):
+    with open(path, encoding="utf-8", newline="") as file:
+        return list(csv.reader(file))
+
+
+def cell(rows, row, column):
+    return rows[row][column] if column < len(rows[row]) else ""
+
+
+def test_import_counts(tmp_path, class_export):
+    connection = connect(tmp_path / "attendance.sqlite")
+    assert import_export(connection, class_export) == (2, 2)
+    connection.close()
+
+
+def test_export_round_trip(store, class_export):
+    source = read_rows(class_export)
+    exported = render_class(store, "c1")
+
+    # dates and TL/GL markers at each Sunday's real column (the second term
+    # after the summary columns)
+    for _, column in SESSIONS:
+        assert exported[7][column] == source[7][column]
+        assert exported[8][column : column + 2] == ["TL", "GL"]
+    # roster columns and every mark, students on their sheet rows
+    for row in range(9, len(source)):
+        assert exported[row][:5] == source[row][:5]
+        for _, column in SESSIONS:
+            for part in (0, 1):
+                assert cell(exported, row, column + part) == cell(
+                    source, row, column + part
+                )
+
+
+def test_scan_is_exported_and_survives_reimport(store, class_export):
+    engine = load_store_engine(store)
+    at = datetime(2026, 1, 11, 8, 15)
+    event = log_scan(engine, "Giuse Trần Hoàng Khôi c1", at, now=at)
+    assert event.result.startswith("Success")
+    with store:
+        assert record_event(store, event)
+        import_export(store, class_export)
+
+    exported = render_class(store, "c1")
+    assert exported[9][11] == "X"  # Khôi's row, 11/1 TL
+
+    # the store answers "already checked in" like the sheet would
+    again = log_scan(load_store_engine(store), "Giuse Trần Hoàng Khôi c1", at, now=at)
+    assert again.result.endswith("already checked in.")
+
+
+def test_older_scan_does_not_replace_a_newer_one(store):
+    engine = load_store_engine(store)
+    at = datetime(2026, 1, 11, 9, 5)
+    late = log_scan(engine, "Giuse Trần Hoàng Khôi c1", at, now=at)
+    assert late.status == "T"
+    # replayed out of order: the 8:30 scan comes in after the 9:05 one
+    with store:
+        record_event(store, late)
+        record_event(store, late._replace(at=datetime(2026, 1, 11, 8, 30), status="X"))
+    assert render_class(store, "c1")[9][11] == "T"
+
+    with store:
+        record_event(store, late._replace(at=datetime(2026, 1, 11, 9, 10), status="X"))
+    assert render_class(store, "c1")[9][11] == "X"
+    assert record_event(store, late._replace(status=None)) is False
+
+
+def test_scan_log_is_replayed(tmp_path, store):
+    engine = load_store_engine(store)
+    log_dir = tmp_path / "log"
+    at = datetime(2025, 9, 14, 9, 5)
+    with SegmentWriter(log_dir) as writer:
+        writer.append(log_scan(engine, "Giuse Trần Hoàng Khôi c1", at, now=at))
+        writer.append(log_scan(engine, "Phêrô Nguyễn Văn Bình c1", at, now=at))
+    with store:
+        assert import_log(store, log_dir) == 1
+    assert render_class(store, "c1")[9][7] == "T"
+
+
+def test_class_report(store):
+    # An: X on 7/9 (TL) and P on 11/1 (GL); Khôi has no marks
+    assert class_report(store) == [
+        ("c1", "2025-09-07", 1, 0, 0, 2),
+        ("c1", "2026-01-11", 0, 0, 1, 2),
+    ]
+    assert class_report(store, "c2") == []
+
+
+def test_store_from_before_session_columns(tmp_path, class_export):
+    path = tmp_path / "old.sqlite"
+    old = sqlite3.connect(path)
+    old.execute(
+        "CREATE TABLE sessions (class_code TEXT NOT NULL, session_date TEXT NOT NULL,"
+        " PRIMARY KEY (class_code, session_date)) WITHOUT ROWID"
+    )
+    old.execute("INSERT INTO sessions VALUES ('c1', '2025-09-07')")
+    old.commit()
+    old.close()
+
+    connection = connect(path)
+    try:
+        # sessions without a stored column are laid out from column F
+        assert render_class(connection, "c1")[8][5:7] == ["TL", "GL"]
+        with connection:
+            import_export(connection, class_export)
+        assert connection.execute(
+            "SELECT session_date, session_column FROM sessions ORDER BY session_date"
+        ).fetchall() == [(day.isoformat(), column) for day, column in SESSIONS]
+    finally:
+        connection.close()
+
+
+def test_import_of_a_missing_path(tmp_path, monkeypatch, capsys):
+    db = tmp_path / "attendance.sqlite"
+    missing = tmp_path / "nowhere"
+    monkeypatch.setattr(
+        sys, "argv", ["attendance_db.py", "--db", str(db), "import", str(missing)]
+    )
+    with pytest.raises(SystemExit):
+        main()
+    assert f"no exports found in {missing}" in capsys.readouterr().out
@@ -0,0 +1,114 @@
+"""attendance_matrix.py: the cube written once and mapped back for queries"""
+
+import csv
+import json
+from datetime import date
+
+import numpy as np
+import pytest
+from attendance_analytics import analyze, load_exports
+from attendance_matrix import (
+    date_columns,
+    find_rows,
+    open_matrix,
+    sidecar_path,
+    sub_cube,
+    write_matrix,
+)
+from conftest import SESSIONS, export_rows
+
+C1 = [
+    ("", "Giuse", "Trần Hoàng", "Khôi", {5: "X", 7: "T"}),
+    ("06/08/2019", "Maria", "Lê Thị", "An", {5: "X", 12: "P"}),
+]
+# Khôi is on the c2 export too (he moved up), Bình only there
+C2 = [
+    ("", "Phêrô", "Nguyễn Văn", "Bình", {11: "X"}),
+    ("", "Giuse", "Trần Hoàng", "Khôi", {11: "X", 12: "X"}),
+]
+
+
+@pytest.fixture
+def cube(tmp_path):
+    paths = []
+    for code, students in (("C1", C1), ("C2", C2)):
+        path = tmp_path / f"({code}) Danh sách (2025-2026) - Điểm danh.csv"
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            csv.writer(file).writerows(export_rows(students))
+        paths.append(path)
+    return load_exports(paths)
+
+
+@pytest.fixture
+def matrix(tmp_path, cube):
+    return open_matrix(write_matrix(cube, tmp_path / "matrix" / "attendance.u8"))
+
+
+def test_round_trip(cube, matrix):
+    assert isinstance(matrix.codes, np.memmap)
+    assert np.array_equal(matrix.codes, cube.codes)
+    assert np.array_equal(matrix.held, cube.held)
+    assert matrix.dates == cube.dates == [day for day, _ in SESSIONS]
+    assert matrix.index["classes"] == ["c1", "c2"]
+    assert matrix.index["letters"]["1"] == "X"
+
+
+def test_file_is_the_two_arrays_back_to_back(tmp_path, cube, matrix):
+    path = tmp_path / "matrix" / "attendance.u8"
+    assert path.stat().st_size == cube.codes.size + cube.held.size
+    assert matrix.index["held_offset"] == cube.codes.size
+    # no temporary files left behind
+    assert sorted(item.name for item in path.parent.iterdir()) == [
+        "attendance.json",
+        "attendance.u8",
+    ]
+
+
+def test_find_rows(matrix):
+    # one row per export the student is on, whichever way they are named
+    assert find_rows(matrix, "Giuse Trần Hoàng Khôi") == [0, 3]
+    assert find_rows(matrix, "Giuse Trần Hoàng Khôi c2") == [0, 3]
+    assert find_rows(matrix, "giusetranhoangkhoi") == [0, 3]
+    assert find_rows(matrix, "Maria Lê Thị An c1 06/08/2019") == [1]
+    assert find_rows(matrix, "Têrêsa Calcutta") == []
+
+
+def test_date_columns(matrix):
+    assert date_columns(matrix) == slice(0, 3)
+    assert date_columns(matrix, date(2025, 9, 8)) == slice(1, 3)
+    assert date_columns(matrix, end=date(2025, 9, 14)) == slice(0, 2)
+    assert date_columns(matrix, date(2025, 9, 8), date(2025, 12, 31)) == slice(1, 2)
+
+
+def test_sub_cube_of_one_class_matches_the_export(cube, matrix):
+    rows = find_rows(matrix, "Phêrô Nguyễn Văn Bình")
+    c2 = sub_cube(matrix, [rows[0], rows[0] + 1])
+    assert c2.classes == ["c2"]
+    assert c2.student_class.tolist() == [0, 0]
+    assert [entry.name for entry in c2.students] == [
+        "Phêrô Nguyễn Văn Bình",
+        "Giuse Trần Hoàng Khôi",
+    ]
+    assert np.array_equal(c2.codes, cube.codes[2:])
+    assert np.array_equal(
+        analyze(c2)["student_rate"], analyze(cube)["student_rate"][2:]
+    )
+
+
+def test_sub_cube_of_scattered_rows_and_some_sundays(cube, matrix):
+    columns = date_columns(matrix, date(2025, 9, 14))
+    khoi = sub_cube(matrix, find_rows(matrix, "Giuse Trần Hoàng Khôi"), columns)
+    assert khoi.classes == ["c1", "c2"]
+    assert khoi.student_class.tolist() == [0, 1]
+    assert khoi.dates == [date(2025, 9, 14), date(2026, 1, 11)]
+    assert np.array_equal(khoi.codes, cube.codes[[0, 3], 1:])
+    assert khoi.held.dtype == bool
+
+
+def test_other_format_version_is_refused(tmp_path, matrix):
+    path = tmp_path / "matrix" / "attendance.u8"
+    index = json.loads(sidecar_path(path).read_text(encoding="utf-8"))
+    index["version"] = 99
+    sidecar_path(path).write_text(json.dumps(index), encoding="utf-8")
+    with pytest.raises(ValueError, match="unsupported format version 99"):
+        open_matrix(path)
@@ -0,0 +1,179 @@
+"""card_render.py: deterministic, pipelined, process-pool and proof renders; --verify"""
+
+import argparse
+from multiprocessing import shared_memory
+
+import pytest
+from card_render import (
+    CAPTION_SIZE,
+    SHEET_GAP,
+    card_path,
+    render_card,
+    render_pipeline,
+    render_processes,
+    render_proofs,
+    run_cards,
+    save_card,
+    share_backgrounds,
+    verify_card,
+    verify_cards,
+    wrap_text_to_lines,
+)
+from card_template import card_layout, compile_template
+from PIL import Image
+from roster import RosterEntry
+
+KHOI = RosterEntry("c1.csv", 2, "c1", "Giuse", "Trần Hoàng", "Khôi", "")
+AN = RosterEntry("c1.csv", 3, "c1", "Maria", "Lê Thị", "An", "06/08/2019")
+BINH = RosterEntry("c2.csv", 2, "c2", "Phêrô", "Nguyễn Văn", "Bình", "")
+
+
+@pytest.fixture
+def templates(card_settings):
+    return {code: compile_template(card_settings, code) for code in ("c1", "c2")}
+
+
+def render(templates, entry, output_path, deterministic=True):
+    path = card_path(output_path, entry)
+    save_card(
+        render_card(templates[entry.class_code], entry, deterministic),
+        path,
+        deterministic,
+    )
+    return path
+
+
+def test_wrap_text_to_lines():
+    assert wrap_text_to_lines("Têrêsa Calcutta", 12) == ["Têrêsa", "Calcutta"]
+    assert wrap_text_to_lines("Giuse", 12) == ["Giuse"]
+    assert wrap_text_to_lines("", 12) == []
+
+
+def test_card_is_named_after_its_payload(tmp_path):
+    assert card_path(tmp_path, AN).name == "Maria Lê Thị An c1 06_08_2019.png"
+
+
+def test_deterministic_renders_are_byte_identical(tmp_path, templates):
+    (tmp_path / "first").mkdir()
+    (tmp_path / "second").mkdir()
+    first = render(templates, AN, tmp_path / "first")
+    second = render(templates, AN, tmp_path / "second")
+    assert first.read_bytes() == second.read_bytes()
+
+
+def test_verify_card(tmp_path, card_settings, templates):
+    layout = card_layout(card_settings, "c1")
+    deterministic = render(templates, KHOI, tmp_path)
+    assert verify_card(deterministic, KHOI.payload, layout) is None
+    # a normal (best mask) render passes too
+    normal = render(templates, AN, tmp_path, deterministic=False)
+    assert verify_card(normal, AN.payload, layout) is None
+
+    problem = verify_card(deterministic, BINH.payload, layout)
+    assert problem.startswith("QR does not match the roster payload")
+    assert verify_card(tmp_path / "missing.png", KHOI.payload, layout) == (
+        "card not rendered"
+    )
+
+
+def test_verify_cards_reports_only_failures(tmp_path, card_settings, templates):
+    jobs = []
+    for entry in (KHOI, BINH):
+        path = render(templates, entry, tmp_path)
+        jobs.append(
+            (str(path), entry.payload, card_layout(card_settings, entry.class_code))
+        )
+    # the c1 card was printed for the wrong student
+    jobs[0] = (jobs[0][0], AN.payload, jobs[0][2])
+    failures = verify_cards(jobs, workers=2)
+    assert [(path, payload) for path, payload, _ in failures] == [
+        (jobs[0][0], AN.payload)
+    ]
+
+
+def test_pipeline_writes_the_same_cards(tmp_path, templates):
+    entries = [KHOI, AN, BINH] * 3
+    expected = {}
+    (tmp_path / "sequential").mkdir()
+    for entry in entries[:3]:
+        path = render(templates, entry, tmp_path / "sequential")
+        expected[path.name] = path.read_bytes()
+
+    output = tmp_path / "pipeline"
+    output.mkdir()
+    written = render_pipeline(entries, templates, output, deterministic=True)
+    assert written == len(entries)
+    assert {path.name: path.read_bytes() for path in output.iterdir()} == expected
+
+
+def test_pipeline_stops_on_a_failed_card(tmp_path, templates):
+    stray = KHOI._replace(class_code="t1")  # no template
+    with pytest.raises(KeyError):
+        render_pipeline([KHOI, stray] + [AN] * 20, templates, tmp_path)
+
+
+def test_processes_write_the_same_cards(tmp_path, card_settings, templates):
+    entries = [KHOI, AN, BINH]
+    (tmp_path / "sequential").mkdir()
+    expected = {}
+    for entry in entries:
+        path = render(templates, entry, tmp_path / "sequential")
+        expected[path.name] = path.read_bytes()
+
+    output = tmp_path / "processes"
+    output.mkdir()
+    count = render_processes(entries, templates, card_settings, output, True, 2)
+    assert count == len(entries)
+    # c1 is RGBA and c2 RGB (shared as RGBX): both come back in their own mode
+    assert {path.name: path.read_bytes() for path in output.iterdir()} == expected
+
+
+def test_shared_backgrounds(templates):
+    blocks, specs = share_backgrounds(templates)
+    try:
+        assert {code: spec[1:] for code, spec in specs.items()} == {
+            "c1": ("RGBA", "RGBA", (480, 320)),
+            "c2": ("RGBX", "RGB", (480, 320)),
+        }
+        assert [block.size >= 480 * 320 * 4 for block in blocks] == [True, True]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=specs["c1"][0])
+
+
+def test_proofs_are_tiled_onto_numbered_sheets(tmp_path, card_settings):
+    half = {
+        code: compile_template(card_settings, code, scale=0.5) for code in ("c1", "c2")
+    }
+    entries = [KHOI, AN, BINH, KHOI, AN]
+    output = tmp_path / "proof"
+    output.mkdir()
+    assert render_proofs(entries, half, output, columns=2, rows=2) == (5, 2)
+    assert sorted(path.name for path in output.iterdir()) == [
+        "proof-001.png",
+        "proof-002.png",
+    ]
+
+    width = 2 * (240 + SHEET_GAP) + SHEET_GAP
+    cell_height = 160 + CAPTION_SIZE + SHEET_GAP
+    with Image.open(output / "proof-001.png") as sheet:
+        assert sheet.size == (width, 2 * cell_height + SHEET_GAP)
+        # the first card sits in the top left corner, as rendered
+        first = render_card(half["c1"], KHOI).convert("RGB")
+        corner = (SHEET_GAP, SHEET_GAP, SHEET_GAP + 240, SHEET_GAP + 160)
+        assert sheet.crop(corner).tobytes() == first.tobytes()
+    # the last card alone on one row
+    with Image.open(output / "proof-002.png") as sheet:
+        assert sheet.size == (width, cell_height + SHEET_GAP)
+
+
+@pytest.mark.parametrize("scale", [0, 1.5])
+def test_proof_scale_is_checked(tmp_path, scale, capsys):
+    args = argparse.Namespace(verify=False, proof=scale, sheet_columns=4, sheet_rows=6)
+    with pytest.raises(SystemExit):
+        run_cards(args, [KHOI], tmp_path / "cards")
+    assert f"--proof scale must be in (0, 1], got {scale}" in capsys.readouterr().out
+    assert not (tmp_path / "cards").exists()
@@ -0,0 +1,50 @@
+"""card_template.py: the layout in config/settings.json compiled per background"""
+
+from card_template import (
+    background_path,
+    card_layout,
+    compile_template,
+    qr_box,
+    scale_layout,
+)
+
+
+def test_class_overrides_merge_into_the_layout(card_settings):
+    card_settings["backgrounds"] = {"c2": {"qr_position": {"x_percent": 30}}}
+    layout = card_layout(card_settings, "c2")
+    assert layout["qr_position"] == {"x_percent": 30, "y_percent": 60, "size": 200}
+    assert card_layout(card_settings, "c1")["qr_position"]["x_percent"] == 32
+    assert "backgrounds" not in layout
+
+
+def test_qr_box_is_centred_on_the_percent_position(card_settings):
+    layout = card_layout(card_settings, "c1")
+    # 32% of 480 and 60% of 320, minus half the 200 px box
+    assert qr_box(layout, (480, 320)) == (53, 92, 200)
+
+
+def test_compile_template(card_settings):
+    template = compile_template(card_settings, "c1")
+    assert template.static.size == (480, 320)
+    assert template.qr_box == (53, 92, 200)
+    assert template.text_anchor == (369, 160)
+    assert (template.line_spacing, template.wrap_chars) == (24, 12)
+    assert template.fill == (0, 0, 0, 255)
+
+
+def test_missing_background(card_settings):
+    assert background_path(card_settings, "t1") is None
+    assert compile_template(card_settings, "t1") is None
+
+
+def test_scaled_template_shrinks_pixels_not_percents(card_settings):
+    layout = card_layout(card_settings, "c1")
+    assert scale_layout(layout, 1) is layout
+    half = scale_layout(layout, 0.5)
+    assert half["qr_position"] == {"x_percent": 32, "y_percent": 60, "size": 100}
+    assert half["text_positions"]["name"]["line_spacing"] == 12
+    assert (half["font"]["size"], half["font"]["fallback_size"]) == (11, 10)
+
+    template = compile_template(card_settings, "c1", scale=0.5)
+    assert template.static.size == (240, 160)
+    assert template.qr_box == (26, 46, 100)
@@ -0,0 +1,69 @@
+"""latency_report.py: timing lines from every log export format"""
+
+import json
+import sys
+
+import pytest
+from latency_report import histogram, main, percentile, read_timings
+
+SCAN = {"evt": "scan", "class": "c1", "outcome": "ok", "path": "direct", "ms": {"total": 420, "masterMap": 12, "write": 300}}  # fmt: skip
+FLUSH = {"evt": "flush", "writes": 3, "ms": {"total": 900, "apply": 850}}
+
+
+def test_cloud_logging_json_array(tmp_path):
+    path = tmp_path / "downloaded-logs.json"
+    entries = [
+        {"jsonPayload": {"message": json.dumps(SCAN)}},
+        {"textPayload": "Flush done " + json.dumps(FLUSH)},
+        {"jsonPayload": SCAN},
+        {"textPayload": "Master cache cleared"},
+    ]
+    path.write_text(json.dumps(entries), encoding="utf-8")
+    assert list(read_timings(path)) == [SCAN, FLUSH, SCAN]
+
+
+def test_json_lines_and_copied_text(tmp_path):
+    path = tmp_path / "executions.txt"
+    path.write_text(
+        "\n".join(
+            [
+                json.dumps({"textPayload": json.dumps(SCAN)}),
+                f"10:42:07 AM\tInfo\t{json.dumps(FLUSH)}",
+                "10:42:08 AM\tInfo\tChecked in An → spreadsheet:x",
+                '{"evt": broken',
+            ]
+        ),
+        encoding="utf-8",
+    )
+    assert list(read_timings(path)) == [SCAN, FLUSH]
+
+
+def test_percentile_and_histogram():
+    values = list(range(1, 101))
+    assert (percentile(values, 0.5), percentile(values, 0.99)) == (50, 99)
+    assert percentile([7], 0.9) == 7
+    assert histogram([10, 60, 99, 100, 20000]) == [1, 2, 1, 0, 0, 0, 0, 0, 1]
+
+
+def test_report_for_one_class(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "logs.jsonl"
+    other = {**SCAN, "class": "c2"}
+    path.write_text(
+        "\n".join(json.dumps(record) for record in (SCAN, other, FLUSH)),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(sys, "argv", ["latency_report.py", str(path), "--class", "c1"])
+    main()
+
+    out = capsys.readouterr().out
+    assert "📊 1 scan lines (ok/direct 1)" in out
+    # total first, then the slowest phase
+    assert out.index("⏱️  total") < out.index("⏱️  write") < out.index("⏱️  masterMap")
+
+
+def test_no_timing_lines(tmp_path, monkeypatch):
+    path = tmp_path / "empty.log"
+    path.write_text("nothing here\n", encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", ["latency_report.py", str(path)])
+    with pytest.raises(SystemExit):
+        main()
@@ -0,0 +1,68 @@
+"""normalize.py against Code.js normalize() (conformance corpus)"""
+
+import csv
+import shutil
+
+import pytest
+from normalize import (
+    CORPUS_PATH,
+    EDGE_CASES,
+    check_corpus,
+    corpus_inputs,
+    js_normalize_all,
+    js_trim,
+    normalize,
+)
+
+
+def test_corpus_matches_code_js():
+    count, mismatches = check_corpus()
+    assert count > len(EDGE_CASES)
+    assert mismatches == []
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("Giuse Đỗ Phúc Đông Ân", "giusedophucdongan"),
+        ("  Maria Lê Thị An 06/08/2019 ", "marialethian06/08/2019"),
+        ("NGHĨA 3", "nghia3"),
+    ],
+)
+def test_known_keys(text, expected):
+    assert normalize(text) == expected
+
+
+def test_javascript_whitespace():
+    # U+FEFF and U+3000 are whitespace in JS; U+001C and U+0085 are not
+    assert js_trim("\ufeff An\u3000") == "An"
+    assert normalize("An\u001cB\u0085") == "an\u001cb\u0085"
+    assert normalize("An\u200aB\u202f") == "anb"
+
+
+def test_memoized():
+    normalize.cache_clear()
+    for _ in range(3):
+        normalize("Giuse Trần Hoàng Khôi")
+    info = normalize.cache_info()
+    assert (info.misses, info.hits) == (1, 2)
+
+
+def test_check_corpus_reports_mismatches(tmp_path):
+    corpus = tmp_path / "corpus.csv"
+    with open(corpus, "w", encoding="utf-8", newline="") as file:
+        csv.writer(file).writerows(
+            [["input", "expected"], ["Đỗ An", "doan"], ["Lê Bình", "le binh"]]
+        )
+    assert check_corpus(corpus) == (2, [("Lê Bình", "le binh", "lebinh")])
+
+
+def test_corpus_covers_the_rosters():
+    with open(CORPUS_PATH, encoding="utf-8", newline="") as file:
+        inputs = {row["input"] for row in csv.DictReader(file)}
+    assert set(corpus_inputs()) <= inputs
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+def test_edge_cases_against_node():
+    assert [normalize(text) for text in EDGE_CASES] == js_normalize_all(EDGE_CASES)
@@ -0,0 +1,263 @@
+"""scan_aggregator.py: local answers, de-duplication and batched forwarding"""
+
+import asyncio
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+
+import pytest
+import scan_aggregator
+from scan_aggregator import Aggregator, Upstream, UpstreamError
+from scan_engine import load_engine
+
+KHOI = "Giuse Trần Hoàng Khôi c1"
+AN = "Maria Lê Thị An c1 06/08/2019"
+SUNDAY_830 = datetime(2025, 9, 7, 8, 30)
+CHECKED_IN = "Success: Giuse Trần Hoàng Khôi (c1) checked in at 08:30:00."
+
+
+class FakeUpstream:
+    """Answers every scan like logScanBatch, recording the batches"""
+
+    url = "https://script.google.com/macros/s/test/exec"
+
+    def __init__(self):
+        self.batches = []
+
+    def send(self, batch):
+        self.batches.append(batch)
+        return [{"id": scan["id"], "result": "ok", "retry": False} for scan in batch]
+
+
+@pytest.fixture
+def sunday(monkeypatch):
+    """The aggregator's clock at 8:30 on the first session of the sample export"""
+
+    class Sunday(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return SUNDAY_830
+
+    monkeypatch.setattr(scan_aggregator, "datetime", Sunday)
+
+
+def aggregator(class_export, upstream=None, unsent_path=None):
+    return Aggregator(load_engine([class_export]), [], upstream, unsent_path)
+
+
+def scan(data, scan_id, at=SUNDAY_830):
+    return {"id": scan_id, "data": data, "scannedAt": int(at.timestamp() * 1000)}
+
+
+def test_new_check_ins_are_queued(class_export, sunday):
+    agg = aggregator(class_export, FakeUpstream())
+    assert agg.scan(KHOI) == CHECKED_IN
+    # An is already marked X for 7/9 in the export: answered, logged, not sent
+    assert agg.scan(AN).endswith("already checked in.")
+    stranger = "Phêrô Nguyễn Văn Bình c1"
+    assert agg.scan(stranger).startswith("Error:")
+
+    assert [event.payload for event in agg.writer] == [KHOI, AN, stranger]
+    assert [scan["data"] for scan in agg.pending] == [KHOI]
+    assert agg.pending[0]["scannedAt"] == int(SUNDAY_830.timestamp() * 1000)
+
+
+def test_repeat_scans_get_the_first_answer(class_export, sunday):
+    agg = aggregator(class_export, FakeUpstream())
+    first = agg.scan(KHOI)
+    assert agg.scan(KHOI) == first
+    assert agg.counts["scans"] == 1 and agg.counts["repeats"] == 1
+    assert len(agg.writer) == 1 and len(agg.pending) == 1
+
+    # outside the window the card is routed again (and is now already in)
+    agg.recent[KHOI] = (agg.recent[KHOI][0] - scan_aggregator.DEDUP_WINDOW_S, first)
+    assert agg.scan(KHOI).endswith("already checked in.")
+    assert len(agg.pending) == 1
+
+
+def test_phone_time_is_kept(class_export, sunday):
+    agg = aggregator(class_export)
+    at = datetime(2025, 9, 7, 8, 5)
+    assert agg.scan(KHOI, int(at.timestamp() * 1000)).endswith("at 08:05:00.")
+    # nothing to forward to without --upstream
+    assert not agg.pending
+
+
+def test_batches_are_capped(class_export, monkeypatch):
+    agg = aggregator(class_export, FakeUpstream())
+    for number in range(scan_aggregator.BATCH_MAX + 5):
+        agg.enqueue(scan(KHOI, f"id{number}"))
+    assert len(agg.take_batch()) == scan_aggregator.BATCH_MAX
+    assert len(agg.take_batch()) == 5
+
+    monkeypatch.setattr(scan_aggregator, "BATCH_MAX_QUERY", 300)
+    for number in range(5):
+        agg.enqueue(scan(KHOI, f"id{number}"))
+    sizes = []
+    while agg.pending:
+        sizes.append(len(agg.take_batch()))
+    assert sum(sizes) == 5 and max(sizes) < 5
+
+
+def test_settle_retries_at_the_front(class_export, capsys):
+    agg = aggregator(class_export, FakeUpstream())
+    for scan_id in ("a", "b", "c", "d"):
+        agg.enqueue(scan(KHOI, scan_id))
+    batch = agg.take_batch()
+    agg.pending.append(batch.pop())  # "d" still waiting for the next batch
+
+    results = [
+        {"id": "a", "result": "Success", "retry": False},
+        {"id": "b", "result": "Error: busy", "retry": True},
+        {"id": "z", "result": "not ours", "retry": False},
+    ]
+    # "c" was left out of the answer: sent again too
+    assert agg.settle(batch, results) == 2
+    assert [scan["id"] for scan in agg.pending] == ["b", "c", "d"]
+    assert agg.pending[0]["attempts"] == 1
+    assert agg.counts["forwarded"] == 1
+
+    agg.pending[0]["attempts"] = scan_aggregator.MAX_ATTEMPTS - 1
+    batch = [agg.pending.popleft()]
+    assert agg.settle(batch, [{"id": "b", "result": "Error: busy", "retry": True}]) == 0
+    assert agg.counts["dropped"] == 1
+    assert f"Gave up on {KHOI}: Error: busy" in capsys.readouterr().out
+
+
+def test_forwarder_sends_batches(class_export, monkeypatch):
+    monkeypatch.setattr(scan_aggregator, "LINGER_S", 0)
+    upstream = FakeUpstream()
+
+    async def run():
+        agg = aggregator(class_export, upstream)
+        for number in range(30):
+            agg.enqueue(scan(KHOI, f"k{number}"))
+        task = asyncio.create_task(agg.forward())
+        while agg.counts["forwarded"] < 30:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return agg
+
+    agg = asyncio.run(asyncio.wait_for(run(), 5))
+    assert [len(batch) for batch in upstream.batches] == [25, 5]
+    assert set(upstream.batches[0][0]) == {"id", "data", "scannedAt"}
+    assert not agg.pending
+
+
+def test_unsent_scans_survive_a_restart(tmp_path, class_export, capsys):
+    unsent = tmp_path / "unsent.json"
+    agg = aggregator(class_export, FakeUpstream(), unsent)
+    agg.enqueue(scan(KHOI, "a"))
+    agg.enqueue(scan(AN, "b"))
+    agg.save_unsent()
+    assert [item["id"] for item in json.loads(unsent.read_text("utf-8"))] == ["a", "b"]
+
+    # without --upstream the file waits for a run that has one
+    aggregator(class_export, None, unsent).load_unsent()
+    assert unsent.exists()
+
+    restarted = aggregator(class_export, FakeUpstream(), unsent)
+    restarted.load_unsent()
+    assert [scan["id"] for scan in restarted.pending] == ["a", "b"]
+    assert restarted.pending[0]["attempts"] == 0
+    assert not unsent.exists()
+    assert "📤 2 scans from the last run queued for upload" in capsys.readouterr().out
+
+
+def test_routes(class_export, sunday):
+    agg = aggregator(class_export, FakeUpstream())
+    status, content_type, page = agg.route("GET", "/", b"")
+    assert (status, content_type) == (200, "text/html")
+    assert "function aggregatorRun" in page
+
+    body = json.dumps([[scan(KHOI, "a")]]).encode()
+    status, _, text = agg.route("POST", "/run/logScanBatch", body)
+    assert status == 200
+    assert json.loads(text) == [{"id": "a", "result": CHECKED_IN, "retry": False}]
+    # the web app's doGet(?name=...) on a phone with the plain page
+    assert agg.route("GET", f"/?name={quote(KHOI)}", b"") == (
+        200,
+        "text/plain",
+        CHECKED_IN,
+    )
+
+    status, _, text = agg.route("GET", "/status", b"")
+    assert json.loads(text) == {
+        "scans": 1,
+        "repeats": 1,
+        "forwarded": 0,
+        "dropped": 0,
+        "queued": 1,
+        "upstream": FakeUpstream.url,
+    }
+    assert agg.route("POST", "/run/deleteEverything", b"[]")[0] == 404
+    assert agg.route("POST", "/run/logScan", b"{not json")[0] == 400
+    assert agg.route("GET", "/favicon.ico", b"")[0] == 404
+
+
+@pytest.fixture
+def web_app():
+    """A doGet stand-in: /exec redirects, /echo answers the batch"""
+    connections = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):  # noqa: N802
+            connections.add(self.client_address)
+            parts = urlsplit(self.path)
+            if parts.path == "/exec":
+                self.send_response(302)
+                self.send_header("Location", f"/echo?{parts.query}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if parts.path == "/echo":
+                batch = json.loads(parse_qs(parts.query)["batch"][0])
+                body = json.dumps(
+                    [{"id": scan["id"], "result": scan["data"]} for scan in batch]
+                )
+            else:
+                body = "<html>Sign in</html>"
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", connections
+    server.shutdown()
+    server.server_close()
+
+
+def test_upstream_follows_the_redirect_on_one_connection(web_app):
+    base, connections = web_app
+    upstream = Upstream(f"{base}/exec")
+    try:
+        for scan_id in ("a", "b"):
+            answer = upstream.send([scan(KHOI, scan_id)])
+            assert answer == [{"id": scan_id, "result": KHOI}]
+    finally:
+        upstream.close()
+    assert len(connections) == 1
+
+    upstream = Upstream(f"{base}/signin")
+    with pytest.raises(UpstreamError, match="not a batch answer"):
+        upstream.send([scan(KHOI, "a")])
+    upstream.close()
+
+
+def test_upstream_down():
+    upstream = Upstream("http://127.0.0.1:9/exec", timeout=2)
+    with pytest.raises(UpstreamError):
+        upstream.send([scan(KHOI, "a")])
@@ -0,0 +1,106 @@
+"""scan_engine.log_scan() routing, against the answers logScan() gives"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from scan_engine import load_engine, log_scan
+
+KHOI = "Giuse Trần Hoàng Khôi c1"
+AN = "Maria Lê Thị An c1 06/08/2019"
+SUNDAY = datetime(2025, 9, 7)
+
+
+@pytest.fixture
+def engine(class_export):
+    return load_engine([class_export])
+
+
+def scan(engine, payload, at, now=None):
+    return log_scan(engine, payload, at, now=now or at)
+
+
+def test_morning_scan_marks_tl(engine):
+    event = scan(engine, KHOI, SUNDAY.replace(hour=8, minute=30))
+    assert event.result == "Success: Giuse Trần Hoàng Khôi (c1) checked in at 08:30:00."
+    assert (event.class_code, event.row) == ("c1", 10)
+    assert (event.session, event.part, event.status) == (date(2025, 9, 7), 0, "X")
+
+
+def test_late_and_afternoon(engine):
+    late = scan(engine, KHOI, SUNDAY.replace(hour=9, minute=5))
+    assert (late.part, late.status) == (0, "T")
+    afternoon = scan(engine, KHOI, SUNDAY.replace(hour=10, minute=30))
+    assert (afternoon.part, afternoon.status) == (1, "X")
+
+
+def test_skip_window(engine):
+    event = scan(engine, KHOI, SUNDAY.replace(hour=9, minute=30))
+    assert event.result.startswith("Skipped: No attendance marked between 09:10")
+    assert event.status is None
+
+
+def test_weekday_scan_goes_to_next_sunday(engine):
+    event = scan(engine, KHOI, datetime(2025, 9, 10, 8, 0))
+    assert event.session == date(2025, 9, 14)
+
+
+def test_second_term_session(engine):
+    event = scan(engine, KHOI, datetime(2026, 1, 11, 8, 0))
+    assert event.session == date(2026, 1, 11)
+
+
+def test_no_matching_column(engine):
+    event = scan(engine, KHOI, datetime(2026, 6, 7, 8, 0))
+    assert event.result == "Error: No matching column for today's date."
+
+
+def test_already_checked_in(engine):
+    # An's TL mark for 7/9 is in the export
+    assert scan(engine, AN, SUNDAY.replace(hour=8)).result == (
+        "Success: Maria Lê Thị An (c1) already checked in."
+    )
+    first = scan(engine, KHOI, SUNDAY.replace(hour=8))
+    second = scan(engine, KHOI, SUNDAY.replace(hour=8, minute=1))
+    assert first.result.endswith("checked in at 08:00:00.")
+    assert second.result.endswith("already checked in.")
+
+
+def test_replay_age(engine):
+    now = SUNDAY.replace(hour=8)
+    recent = scan(engine, KHOI, now - timedelta(days=6), now)
+    assert recent.result.startswith("Success")
+    stale = now - timedelta(days=8)
+    event = scan(engine, KHOI, stale, now)
+    assert (
+        event.result == 'Error: Scan of "Giuse Trần Hoàng Khôi" is too old to record.'
+    )
+    assert event.at == stale
+
+
+def test_future_clock_is_logged_at_now(engine):
+    now = SUNDAY.replace(hour=8)
+    small_skew = scan(engine, KHOI, now + timedelta(minutes=2), now)
+    assert small_skew.at == now + timedelta(minutes=2)
+    event = scan(engine, AN, now + timedelta(hours=3), now)
+    assert event.at == now
+    assert event.session == date(2025, 9, 7)
+
+
+def test_last_season_class_alias(engine):
+    # chien1 (2024-25) moved into c1, see CLASS_ALIASES in Seasons.js
+    event = scan(engine, "Giuse Trần Hoàng Khôi chien1", SUNDAY.replace(hour=8))
+    assert event.result == "Success: Giuse Trần Hoàng Khôi (c1) checked in at 08:00:00."
+    assert event.class_code == "c1"
+
+
+def test_wrong_class(engine):
+    event = scan(engine, "Giuse Trần Hoàng Khôi au1", SUNDAY.replace(hour=8))
+    assert event.result == 'Error: "Giuse Trần Hoàng Khôi" not found in class au1.'
+
+
+def test_not_in_master_map(engine):
+    event = scan(engine, "Phêrô Nguyễn Văn Bình c1", SUNDAY.replace(hour=8))
+    assert event.result == 'Error: "Phêrô Nguyễn Văn Bình" not found in master map.'
+    # the birthday is part of the key
+    event = scan(engine, "Maria Lê Thị An c1", SUNDAY.replace(hour=8))
+    assert event.result.startswith('Error: "Maria Lê Thị An" not found')
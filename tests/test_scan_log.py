@@ -0,0 +1,57 @@
+"""scan_log.py: appended scans folded back into copies of the exports"""
+
+import argparse
+import csv
+from datetime import datetime
+
+from scan_engine import load_engine, log_scan
+from scan_log import SegmentWriter, compact, fold_events, read_events
+
+KHOI = "Giuse Trần Hoàng Khôi c1"
+
+
+def read_rows(path):
+    with open(path, encoding="utf-8", newline="") as file:
+        return list(csv.reader(file))
+
+
+def record(engine, log_dir, *scans):
+    with SegmentWriter(log_dir, max_events=2) as writer:
+        for payload, at in scans:
+            writer.append(log_scan(engine, payload, at, now=at))
+
+
+def test_latest_scan_per_cell_wins(tmp_path, class_export):
+    engine = load_engine([class_export])
+    log_dir = tmp_path / "log"
+    # replayed out of order: the 9:05 scan is appended before the 8:30 one
+    record(
+        engine,
+        log_dir,
+        (KHOI, datetime(2025, 9, 7, 9, 5)),
+        (KHOI, datetime(2025, 9, 7, 8, 30)),
+        ("Phêrô Nguyễn Văn Bình c1", datetime(2025, 9, 7, 8, 0)),
+    )
+    assert len(list(log_dir.glob("segment-*.jsonl"))) == 2
+    assert fold_events(read_events(log_dir)) == {("c1", 10, "2025-09-07", 0): "T"}
+
+
+def test_compact_skips_files_that_are_not_exports(tmp_path, class_export, capsys):
+    engine = load_engine([class_export])
+    log_dir = tmp_path / "log"
+    record(engine, log_dir, (KHOI, datetime(2026, 1, 11, 8, 0)))
+    other = tmp_path / "notes.csv"
+    other.write_text("name,phone\nKhôi,0909\n", encoding="utf-8")
+
+    args = argparse.Namespace(
+        log_dir=log_dir, exports=tmp_path, output=tmp_path / "compacted"
+    )
+    compact(args)
+
+    assert (
+        "⚠️  Skipping notes.csv: no 'Điểm danh' header found" in capsys.readouterr().out
+    )
+    assert not (tmp_path / "compacted" / "notes.csv").exists()
+    rows = read_rows(tmp_path / "compacted" / class_export.name)
+    assert rows[9][11] == "X"  # Khôi's row, 11/1 TL
+    assert rows[10][5] == "X"  # An's existing mark is kept
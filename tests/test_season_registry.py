@@ -0,0 +1,67 @@
+"""season_registry.py: class aliases for last season's cards and Seasons.js"""
+
+from datetime import date
+
+from roster import (
+    SEASONS_JS_PATH,
+    RosterEntry,
+    active_season,
+    load_class_aliases,
+    load_seasons,
+)
+from season_registry import build_registry, class_aliases, render_js
+
+CURRENT_CODES = {"c1", "c2", "t2"}
+
+
+def entries(class_code, names):
+    return [
+        RosterEntry("roster.csv", line, class_code, "Giuse", "Trần", name, "")
+        for line, name in enumerate(names, start=2)
+    ]
+
+
+def test_aliases_follow_the_students():
+    previous = {"chien1": entries("chien1", [f"An {i}" for i in range(20)])}
+    current = {
+        "c2": entries("c2", [f"An {i}" for i in range(15)]),
+        "c1": entries("c1", ["An 15", "An 16"]),
+        # one student in a class two years up: a name collision, not an alias
+        "t2": entries("t2", ["An 17"]),
+    }
+    aliases = class_aliases(previous, current, CURRENT_CODES)
+    # most common first; c1 is also chien1's renamed code
+    assert aliases == {"chien1": ["c2", "c1"]}
+
+
+def test_renamed_class_is_accepted_without_students():
+    previous = {"chien1": entries("chien1", ["An"])}
+    assert class_aliases(previous, {}, CURRENT_CODES) == {"chien1": ["c1"]}
+    # a code that still exists needs the students to move
+    previous = {"c2": entries("c2", ["An"])}
+    assert class_aliases(previous, {}, CURRENT_CODES) == {}
+
+
+def test_small_moves_are_reported(capsys):
+    previous = {"c2": entries("c2", [f"An {i}" for i in range(20)])}
+    current = {"t2": entries("t2", ["An 0"])}
+    assert class_aliases(previous, current, CURRENT_CODES) == {}
+    assert "c2 -> t2: only 1 of 20 students, not an alias" in capsys.readouterr().err
+
+
+def test_active_season():
+    seasons = {
+        "2024_25": {"start": "2024-08-01", "spreadsheets": {}},
+        "2025_26": {"start": "2025-08-01", "spreadsheets": {}},
+    }
+    assert active_season(seasons, date(2025, 7, 31)) == "2024_25"
+    assert active_season(seasons, date(2025, 8, 1)) == "2025_26"
+    assert active_season(seasons, date(2020, 1, 1)) == "2024_25"
+
+
+def test_committed_seasons_js_is_current():
+    seasons = load_seasons()
+    registry = build_registry(seasons)
+    assert SEASONS_JS_PATH.read_text(encoding="utf-8") == render_js(registry)
+    # and the scripts read the active season's aliases back from it
+    assert load_class_aliases() == registry["aliases"][active_season(seasons)]
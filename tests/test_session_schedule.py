@@ -0,0 +1,75 @@
+"""session_schedule.py: compiled tables, lookups and the generated Schedule.js"""
+
+import pytest
+from session_schedule import (
+    SCHEDULE_JS_PATH,
+    compile_schedules,
+    load_config,
+    lookup,
+    render_js,
+    to_seconds,
+    warmup_times,
+)
+
+
+@pytest.fixture
+def config():
+    return load_config()
+
+
+@pytest.fixture
+def tables(config):
+    return compile_schedules(config)
+
+
+def test_default_table(tables):
+    assert tables["default"] == [
+        [0, "X", 0],
+        [to_seconds("09:00:00"), "T", 0],
+        [to_seconds("09:10:00"), None, None],
+        [to_seconds("10:00:00"), "X", 1],
+        [to_seconds("12:00:00"), "O", 1],
+    ]
+
+
+@pytest.mark.parametrize(
+    ("time", "expected"),
+    [
+        ("00:00:00", ("X", 0, "00:00:00", "09:00:00")),
+        ("08:59:59", ("X", 0, "00:00:00", "09:00:00")),
+        ("09:00:00", ("T", 0, "09:00:00", "09:10:00")),
+        ("09:30:00", (None, None, "09:10:00", "10:00:00")),
+        ("10:00:00", ("X", 1, "10:00:00", "12:00:00")),
+        ("23:59:59", ("O", 1, "12:00:00", "24:00:00")),
+    ],
+)
+def test_lookup_boundaries(tables, time, expected):
+    status, offset, start, end = expected
+    assert lookup(tables, "c1", to_seconds(time)) == (
+        status,
+        offset,
+        to_seconds(start),
+        to_seconds(end),
+    )
+
+
+def test_class_schedule_overlays_the_evening(tables):
+    # du_truong keeps the morning rules until its first session
+    assert lookup(tables, "du_truong", to_seconds("08:30:00"))[0] == "X"
+    assert lookup(tables, "du_truong", to_seconds("17:59:59"))[0] == "O"
+    assert lookup(tables, "du_truong", to_seconds("18:30:00"))[:2] == ("X", 1)
+    assert lookup(tables, "du_truong", to_seconds("19:05:00"))[:2] == ("T", 1)
+    assert lookup(tables, "du_truong", to_seconds("21:00:00"))[:2] == ("O", 1)
+
+
+def test_warmup_an_hour_before_each_session(config):
+    assert warmup_times(config) == [
+        to_seconds("08:00:00"),
+        to_seconds("09:00:00"),
+        to_seconds("17:00:00"),
+    ]
+
+
+def test_committed_schedule_js_is_current(config, tables):
+    warmup = (config["warmup"]["weekday"], warmup_times(config))
+    assert SCHEDULE_JS_PATH.read_text(encoding="utf-8") == render_js(tables, warmup)
@@ -0,0 +1,87 @@
+"""validate_rosters.py and the roster.py helpers it checks payloads with"""
+
+import sys
+
+import pytest
+from roster import canonical_date, parse_payload, read_roster
+from validate_rosters import UNKNOWN_CLASS, check_note, check_round_trip, main
+
+
+def write_roster(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = ["GHI CHÚ,STT,TÊN THÁNH,HỌ,TÊN"] + [",".join(row) for row in rows]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def roster(tmp_path):
+    return write_roster(
+        tmp_path / "2025_26" / "c1.csv",
+        [
+            ("", "1", "Giuse", "Trần Hoàng", "Khôi"),
+            ("6/8/2019", "2", "Maria", "Lê Thị", "An"),
+            ("", "", "", "Tổng", ""),  # not a student row
+        ],
+    )
+
+
+def test_read_roster(roster):
+    khoi, an = read_roster(roster)
+    assert (khoi.line, khoi.class_code, khoi.payload) == (
+        2,
+        "c1",
+        "Giuse Trần Hoàng Khôi c1",
+    )
+    assert an.payload == "Maria Lê Thị An c1 6/8/2019"
+    assert an.master_key == "marialethian06/08/2019"
+
+
+def test_parse_payload_like_logscan():
+    parsed = parse_payload("  Maria Lê Thị An   c1 06/08/2019 ")
+    assert parsed == ("Maria Lê Thị An", "c1", "06/08/2019", "marialethian06/08/2019")
+    assert parse_payload("").class_name == ""
+    assert canonical_date("6/8/2019") == "06/08/2019"
+    assert canonical_date("06-08-2019") == ""
+
+
+def test_short_date_note_does_not_round_trip(roster):
+    _, an = read_roster(roster)
+    level, message = check_note(an)
+    assert level == "error"
+    assert "use '06/08/2019'" in message
+    # logScan reads "6/8/2019" as the class code
+    assert [issue[:2] for issue in check_round_trip(an, {"c1"})] == [
+        ("error", "round trip"),
+        ("error", "round trip"),
+    ]
+
+
+def test_unknown_class_is_a_structured_warning(roster):
+    khoi, _ = read_roster(roster)
+    assert check_round_trip(khoi, {"c1"}) == []
+    assert check_round_trip(khoi, {"c2"}, "2025_26") == [
+        ("warning", UNKNOWN_CLASS, "class 'c1' is not in season 2025_26")
+    ]
+
+
+def test_main_reports_collisions_and_unknown_class_once_per_file(
+    tmp_path, monkeypatch, capsys
+):
+    write_roster(
+        tmp_path / "2025_26" / "zz9.csv",
+        [
+            ("", "1", "Giuse", "Trần Hoàng", "Khôi"),
+            ("", "2", "Giuse", "Trần Hoàng", "Khôi"),
+        ],
+    )
+    monkeypatch.setattr(sys, "argv", ["validate_rosters.py", str(tmp_path)])
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+
+    assert exit_info.value.code == 1
+
+    out = capsys.readouterr().out
+    assert out.count("class 'zz9' is not in season 2025_26") == 1
+    assert "zz9.csv:3: 'Giuse Trần Hoàng Khôi' collides with" in out
+    assert "1 errors, 1 warnings" in out
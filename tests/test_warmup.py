@@ -0,0 +1,52 @@
+"""warmup.py and the engine cache scan_log.py record reuses"""
+
+import os
+import time
+from datetime import date
+
+from scan_engine import load_cached_engine, load_engine, save_engine, session_index
+from session_schedule import load_config
+from warmup import crontab_lines
+
+
+def test_crontab_matches_the_warmup_triggers(tmp_path):
+    lines = crontab_lines(load_config(), tmp_path)
+    assert [line.split(" cd ")[0] for line in lines] == [
+        "0 8 * * 0",
+        "0 9 * * 0",
+        "0 17 * * 0",
+    ]
+    assert all(line.endswith(f"scripts/warmup.py {tmp_path}") for line in lines)
+
+
+def test_session_index_is_remembered(class_export):
+    engine = load_engine([class_export])
+    assert session_index(engine, "c1", date(2025, 9, 10)) == 1
+    assert engine.columns == {("c1", date(2025, 9, 10)): 1}
+    assert session_index(engine, "c1", date(2026, 6, 7)) is None
+
+
+def test_cached_engine_is_reused_for_any_spelling(tmp_path, class_export, monkeypatch):
+    cache = tmp_path / "scan_cache.pickle"
+    save_engine(load_engine([class_export]), cache)
+
+    monkeypatch.chdir(tmp_path)
+    relative = class_export.relative_to(tmp_path)
+    cached = load_cached_engine([relative], cache)
+    assert cached is not None
+    assert "giusetranhoangkhoi" in cached.master_map
+
+
+def test_cached_engine_is_dropped_when_the_inputs_change(tmp_path, class_export):
+    cache = tmp_path / "scan_cache.pickle"
+    save_engine(load_engine([class_export]), cache)
+
+    other = tmp_path / "(C2) Danh sách (2025-2026) - Điểm danh.csv"
+    other.write_bytes(class_export.read_bytes())
+    # a different set of exports
+    assert load_cached_engine([class_export, other], cache) is None
+
+    # an export edited after the warm-up
+    later = time.time() + 60
+    os.utime(class_export, (later, later))
+    assert load_cached_engine([class_export], cache) is None